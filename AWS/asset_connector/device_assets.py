@@ -4,7 +4,9 @@ This module provides functionality to collect AWS EC2 instance data and convert
 to OCSF Device Inventory format for asset management and security monitoring.
 """
 
-from collections.abc import Generator
+import os
+from collections.abc import Generator, Iterable
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from typing import Any, Dict, List, Optional
 
@@ -75,6 +77,13 @@ class AwsDeviceAssetConnector(AssetConnector):
         super().__init__(*args, **kwargs)
         self.context = PersistentJSON("context.json", self._data_path)
         self.new_most_recent_date: Optional[str] = None
+        self.multi_region = os.getenv("AWS_EC2_MULTI_REGION", "false").lower() in ("1", "true", "yes")
+        self.max_region_workers = max(1, int(os.getenv("AWS_EC2_MAX_REGION_WORKERS", 8)))
+
+        # One client per region, kept for the lifetime of the connector
+        self._clients: Dict[Optional[str], boto3.client] = {}
+        # Regions that failed during the last collection
+        self._failed_regions: List[str] = []
 
     @property
     def most_recent_date_seen(self) -> Optional[str]:
@@ -110,9 +119,14 @@ class AwsDeviceAssetConnector(AssetConnector):
             self.log(f"Failed to update checkpoint: {str(e)}", level="error")
             self.log_exception(e)
 
-    def client(self) -> boto3.client:
+    def client(self, region_name: Optional[str] = None) -> boto3.client:
         """Create and return a configured AWS EC2 client.
 
+        The client of each region is created once and reused by the following calls.
+
+        Args:
+            region_name: The region of the client, the configured region if None
+
         Returns:
             A configured boto3 EC2 client
 
@@ -120,13 +134,18 @@ class AwsDeviceAssetConnector(AssetConnector):
             NoCredentialsError: If AWS credentials are not configured
             ClientError: If there's an error creating the client
         """
+        if region_name in self._clients:
+            return self._clients[region_name]
+
         try:
             session = boto3.Session(
                 aws_access_key_id=self.module.configuration.aws_access_key,
                 aws_secret_access_key=self.module.configuration.aws_secret_access_key,
                 region_name=self.module.configuration.aws_region_name,
             )
-            return session.client("ec2")
+            client = session.client("ec2") if region_name is None else session.client("ec2", region_name=region_name)
+            self._clients[region_name] = client
+            return client
         except NoCredentialsError as e:
             self.log("AWS credentials not found or invalid", level="error")
             self.log_exception(e)
@@ -265,6 +284,64 @@ class AwsDeviceAssetConnector(AssetConnector):
         else:
             return OperatingSystem(name=platform_details, type=OSTypeStr.UNKNOWN, type_id=OSTypeId.UNKNOWN)
 
+    def get_enabled_regions(self) -> List[str]:
+        """Get the regions enabled for the account.
+
+        Returns:
+            The names of the enabled regions
+        """
+        response = self.client().describe_regions(AllRegions=False)
+        return [region["RegionName"] for region in response.get("Regions", []) if region.get("RegionName")]
+
+    def _describe_region_instances(self, region_name: str, client: boto3.client) -> List[Dict[str, Any]]:
+        """Fetch all the pages of EC2 instances of a region.
+
+        Args:
+            region_name: The name of the region
+            client: The EC2 client of the region
+
+        Returns:
+            The pages of the DescribeInstances responses
+        """
+        pages = list(client.get_paginator("describe_instances").paginate())
+        self.log(f"Fetched {len(pages)} pages of instances in region {region_name}", level="debug")
+        return pages
+
+    def _get_multi_region_pages(self) -> Generator[Dict[str, Any], None, None]:
+        """Fetch the EC2 instances of all the enabled regions concurrently.
+
+        The regions are swept on a bounded thread pool, and their pages are yielded as soon as a region
+        is complete. A region that fails is logged and skipped, so the other regions are still collected,
+        and is recorded in `_failed_regions` so that the checkpoint is not advanced past its instances.
+
+        Yields:
+            The pages of the DescribeInstances responses of all the regions
+        """
+        self._failed_regions = []
+        regions = self.get_enabled_regions()
+        self.log(f"Collecting devices in {len(regions)} regions", level="info")
+
+        # boto3 sessions are not thread-safe: the clients are created before being shared with the workers
+        clients = {region_name: self.client(region_name) for region_name in regions}
+
+        with ThreadPoolExecutor(max_workers=self.max_region_workers) as executor:
+            futures = {
+                executor.submit(self._describe_region_instances, region_name, client): region_name
+                for region_name, client in clients.items()
+            }
+
+            for future in as_completed(futures):
+                region_name = futures[future]
+                try:
+                    pages = future.result()
+                except Exception as e:
+                    self.log(f"Failed to collect devices in region {region_name}: {str(e)}", level="error")
+                    self.log_exception(e)
+                    self._failed_regions.append(region_name)
+                    continue
+
+                yield from pages
+
     def get_aws_devices(self) -> Generator[List[AwsDevice], None, None]:
         """Fetch AWS EC2 instances and convert them to AwsDevice objects.
 
@@ -278,8 +355,11 @@ class AwsDeviceAssetConnector(AssetConnector):
         self.log("Starting AWS device collection...", level="info")
 
         try:
-            paginator = self.client().get_paginator("describe_instances")
-            page_iterator = paginator.paginate()
+            page_iterator: Iterable[Dict[str, Any]]
+            if self.multi_region:
+                page_iterator = self._get_multi_region_pages()
+            else:
+                page_iterator = self.client().get_paginator("describe_instances").paginate()
 
             # Parse the date filter for incremental collection
             date_filter: Optional[datetime] = None
@@ -542,8 +622,16 @@ class AwsDeviceAssetConnector(AssetConnector):
                         self.log_exception(e)
                         continue
 
-            # Update checkpoint with the new date
-            self.new_most_recent_date = new_most_recent_date
+            # The instances of the failed regions are collected on the next run: keep the checkpoint
+            if self._failed_regions:
+                self.log(
+                    f"Checkpoint not updated, failed to collect devices in regions: {', '.join(self._failed_regions)}",
+                    level="warning",
+                )
+            else:
+                # Update checkpoint with the new date
+                self.new_most_recent_date = new_most_recent_date
+
             self.log(f"Asset collection completed. Generated {asset_count} device inventory events", level="info")
 
         except Exception as e:
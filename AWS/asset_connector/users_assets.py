@@ -4,6 +4,9 @@ This module provides functionality to collect AWS IAM user data and convert it
 to OCSF User Inventory format for asset management and security monitoring.
 """
 
+import csv
+import io
+import os
 from collections.abc import Generator
 from datetime import datetime
 from typing import Any, Dict, List, Optional
@@ -71,6 +74,12 @@ class AwsUsersAssetConnector(AssetConnector):
         super().__init__(*args, **kwargs)
         self.context = PersistentJSON("context.json", self._data_path)
         self.new_most_recent_date: Optional[str] = None
+        self.bulk_inventory = os.getenv("AWS_IAM_BULK_INVENTORY", "false").lower() in ("1", "true", "yes")
+
+        # Clients and memos kept for the duration of a collection run
+        self._iam_client: Optional[boto3.client] = None
+        self._group_privileges_memo: Dict[str, List[str]] = {}
+        self._admin_groups_memo: Dict[str, bool] = {}
 
     @property
     def most_recent_date_seen(self) -> Optional[str]:
@@ -109,6 +118,8 @@ class AwsUsersAssetConnector(AssetConnector):
     def client(self) -> boto3.client:
         """Create and return a configured AWS IAM client.
 
+        The client is created once and reused by the following calls.
+
         Returns:
             A configured boto3 IAM client
 
@@ -116,13 +127,17 @@ class AwsUsersAssetConnector(AssetConnector):
             NoCredentialsError: If AWS credentials are not configured
             ClientError: If there's an error creating the client
         """
+        if self._iam_client is not None:
+            return self._iam_client
+
         try:
             session = boto3.Session(
                 aws_access_key_id=self.module.configuration.aws_access_key,
                 aws_secret_access_key=self.module.configuration.aws_secret_access_key,
                 region_name=self.module.configuration.aws_region_name,
             )
-            return session.client("iam")
+            self._iam_client = session.client("iam")
+            return self._iam_client
         except NoCredentialsError as e:
             self.log("AWS credentials not found or invalid", level="error")
             self.log_exception(e)
@@ -135,6 +150,8 @@ class AwsUsersAssetConnector(AssetConnector):
     def group_privileges(self, group_name: str) -> List[str]:
         """Retrieve the list of policies attached to a specific group.
 
+        The policies are fetched once per group during a collection run.
+
         Args:
             group_name: The name of the group to retrieve policies for
 
@@ -149,6 +166,9 @@ class AwsUsersAssetConnector(AssetConnector):
             self.log("Empty group name provided, returning False for admin status", level="warning")
             return []
 
+        if group_name in self._group_privileges_memo:
+            return self._group_privileges_memo[group_name]
+
         try:
             policies = []
             paginator = self.client().get_paginator("list_attached_group_policies")
@@ -159,6 +179,8 @@ class AwsUsersAssetConnector(AssetConnector):
                     policy_name = attached_policy.get("PolicyName")
                     if policy_name:
                         policies.append(policy_name)
+
+            self._group_privileges_memo[group_name] = policies
             return policies
 
         except ClientError as e:
@@ -310,11 +332,10 @@ class AwsUsersAssetConnector(AssetConnector):
             BotoCoreError: If there's a low-level boto3 error
         """
         self.log("Starting AWS user collection...", level="info")
+        self._group_privileges_memo.clear()
+        self._admin_groups_memo.clear()
 
         try:
-            paginator = self.client().get_paginator("list_users")
-            page_iterator = paginator.paginate()
-
             # Parse the date filter for incremental collection
             date_filter: Optional[datetime] = None
             if self.most_recent_date_seen:
@@ -324,14 +345,22 @@ class AwsUsersAssetConnector(AssetConnector):
                     self.log(f"Invalid date format in checkpoint: {self.most_recent_date_seen}", level="warning")
                     self.log_exception(e)
 
+            if self.bulk_inventory:
+                pages = self._get_bulk_user_pages()
+            else:
+                pages = (
+                    [(user, None, None) for user in page.get("Users", [])]
+                    for page in self.client().get_paginator("list_users").paginate()
+                )
+
             user_count = 0
-            for page in page_iterator:
+            for page in pages:
                 users = []
 
-                for user in page.get("Users", []):
+                for user, groups, has_mfa in page:
                     try:
                         # Extract user information with proper error handling
-                        aws_user = self._extract_user_from_iam_user(user, date_filter)
+                        aws_user = self._extract_user_from_iam_user(user, date_filter, groups, has_mfa)
                         if aws_user:
                             users.append(aws_user)
                             user_count += 1
@@ -360,23 +389,119 @@ class AwsUsersAssetConnector(AssetConnector):
             self.log_exception(e)
             raise
 
-    def user_has_admin_policy(self, user_groups: List[Group]) -> bool:
-        """Check if a user has admin policies."""
+    def get_mfa_statuses(self) -> Optional[Dict[str, bool]]:
+        """Get the MFA status of all the users from the IAM credential report.
+
+        The report is generated by AWS at most every 4 hours. When it is not available yet,
+        its generation is requested and the MFA status must be checked user by user.
+
+        Returns:
+            The MFA status of each user name, or None if the report is not available
+        """
+        try:
+            client = self.client()
+            if client.generate_credential_report().get("State") != "COMPLETE":
+                self.log("Credential report is being generated, checking MFA user by user", level="info")
+                return None
+
+            report = client.get_credential_report()
+            content = report.get("Content", b"")
+            content = content.decode("utf-8") if isinstance(content, bytes) else content
+
+            return {
+                row["user"]: row.get("mfa_active", "").lower() == "true"
+                for row in csv.DictReader(io.StringIO(content))
+            }
+
+        except Exception as e:
+            self.log(f"Failed to get the credential report, checking MFA user by user: {str(e)}", level="warning")
+            return None
+
+    def _get_bulk_user_pages(
+        self,
+    ) -> Generator[List[tuple[Dict[str, Any], List[Group], Optional[bool]]], None, None]:
+        """Fetch the users and their groups with a single sweep of the account authorization details.
+
+        The groups referenced by a user may be listed in a later page, so the whole sweep is read
+        before yielding the users, page by page.
+
+        Yields:
+            Pages of users with their groups and MFA status (None when unknown)
+
+        Raises:
+            ClientError: If there's an error communicating with AWS
+            BotoCoreError: If there's a low-level boto3 error
+        """
+        paginator = self.client().get_paginator("get_account_authorization_details")
+
+        user_pages: List[List[Dict[str, Any]]] = []
+        groups: Dict[str, Group] = {}
+        for page in paginator.paginate(Filter=["User", "Group"]):
+            user_pages.append(page.get("UserDetailList", []))
+
+            for group in page.get("GroupDetailList", []):
+                group_name = group.get("GroupName", "")
+                privileges = [
+                    policy["PolicyName"]
+                    for policy in group.get("AttachedManagedPolicies", [])
+                    if policy.get("PolicyName")
+                ]
+                self._group_privileges_memo[group_name] = privileges
+                groups[group_name] = Group(name=group_name, uid=group.get("Arn", ""), privileges=privileges)
+
+        self.log(f"Fetched {len(groups)} groups from the account authorization details", level="debug")
+
+        mfa_statuses = self.get_mfa_statuses()
+        for users in user_pages:
+            yield [
+                (
+                    user,
+                    [groups[group_name] for group_name in user.get("GroupList", []) if group_name in groups],
+                    mfa_statuses.get(user.get("UserName", "")) if mfa_statuses is not None else None,
+                )
+                for user in users
+            ]
+
+    def is_admin_group(self, group: Group) -> bool:
+        """Check if a group has admin policies.
+
+        The result is kept for the duration of the collection run.
+
+        Args:
+            group: The group to check
+
+        Returns:
+            True if one of the policies of the group is an admin policy
+        """
+        if group.uid and group.uid in self._admin_groups_memo:
+            return self._admin_groups_memo[group.uid]
+
         admin_patterns = ["admin", "administrator", "poweruser"]
+        is_admin = any(pattern in policy.lower() for policy in group.privileges or [] for pattern in admin_patterns)
+
+        if group.uid:
+            self._admin_groups_memo[group.uid] = is_admin
 
-        for group in user_groups:
-            for policy in group.privileges:
-                policy_lower = policy.lower()
-                if any(pattern in policy_lower for pattern in admin_patterns):
-                    return True
-        return False
+        return is_admin
 
-    def _extract_user_from_iam_user(self, user: Dict[str, Any], date_filter: Optional[datetime]) -> Optional[AwsUser]:
+    def user_has_admin_policy(self, user_groups: List[Group]) -> bool:
+        """Check if a user has admin policies."""
+        return any(self.is_admin_group(group) for group in user_groups)
+
+    def _extract_user_from_iam_user(
+        self,
+        user: Dict[str, Any],
+        date_filter: Optional[datetime],
+        groups: Optional[List[Group]] = None,
+        has_mfa: Optional[bool] = None,
+    ) -> Optional[AwsUser]:
         """Extract user information from an AWS IAM user.
 
         Args:
             user: The AWS IAM user data
             date_filter: Optional date filter for incremental collection
+            groups: The groups of the user, fetched from AWS if None
+            has_mfa: The MFA status of the user, fetched from AWS if None
 
         Returns:
             An AwsUser object if the user should be included, None otherwise
@@ -416,17 +541,19 @@ class AwsUsersAssetConnector(AssetConnector):
             )
 
             # Fetch groups, MFA status, and admin status for the user
-            try:
-                groups = self.get_groups_for_user(user_name)
-            except Exception as e:
-                self.log(f"Failed to fetch groups for user {user_name}: {str(e)}", level="warning")
-                groups = []
-
-            try:
-                has_mfa = self.get_mfa_status_for_user(user_name)
-            except Exception as e:
-                self.log(f"Failed to check MFA status for user {user_name}: {str(e)}", level="warning")
-                has_mfa = False
+            if groups is None:
+                try:
+                    groups = self.get_groups_for_user(user_name)
+                except Exception as e:
+                    self.log(f"Failed to fetch groups for user {user_name}: {str(e)}", level="warning")
+                    groups = []
+
+            if has_mfa is None:
+                try:
+                    has_mfa = self.get_mfa_status_for_user(user_name)
+                except Exception as e:
+                    self.log(f"Failed to check MFA status for user {user_name}: {str(e)}", level="warning")
+                    has_mfa = False
 
             # Extract organization from ARN
             org = self._extract_organization_from_arn(user_arn)
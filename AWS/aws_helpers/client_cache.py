@@ -0,0 +1,116 @@
+"""Cache of long-lived aiobotocore clients."""
+
+import asyncio
+import hashlib
+from collections.abc import AsyncGenerator
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any
+
+from aiobotocore.config import AioConfig
+from aiobotocore.session import AioSession
+from loguru import logger
+from sekoia_automation.aio.helpers.aws.client import AwsClient, AwsConfigurationT
+
+
+class AwsClientsCache:
+    """
+    Cache of aiobotocore clients.
+
+    Clients are created once per service, region and credentials, and keep their pool of HTTP connections
+    until the cache is closed. The cache is owned by the connector, so its clients live as long as the connector.
+    """
+
+    def __init__(self, max_pool_connections: int = 10) -> None:
+        """
+        Initialize AwsClientsCache.
+
+        Args:
+            max_pool_connections: int: the maximum number of HTTP connections kept by each client
+        """
+        self.max_pool_connections = max_pool_connections
+        self._clients: dict[tuple[str, str, str], Any] = {}
+        self._exit_stack = AsyncExitStack()
+        self._lock = asyncio.Lock()
+
+    async def get_client(self, session: AioSession, client_name: str, region_name: str, credentials_key: str) -> Any:
+        """
+        Get the client for the service, region and credentials, creating it if necessary.
+
+        Args:
+            session: AioSession: the session holding the credentials
+            client_name: str
+            region_name: str
+            credentials_key: str: identifier of the credentials of the session
+
+        Returns:
+            Any: the aiobotocore client
+        """
+        key = (client_name, region_name, credentials_key)
+        if client := self._clients.get(key):
+            return client
+
+        async with self._lock:
+            if key not in self._clients:
+                logger.info(f"Creating {client_name} client for region {region_name}")
+                self._clients[key] = await self._exit_stack.enter_async_context(
+                    session.create_client(
+                        client_name,
+                        region_name=region_name,
+                        config=AioConfig(max_pool_connections=self.max_pool_connections),
+                    )
+                )
+
+            return self._clients[key]
+
+    async def close(self) -> None:
+        """Close all the clients and their connections."""
+        self._clients.clear()
+
+        exit_stack, self._exit_stack = self._exit_stack, AsyncExitStack()
+        await exit_stack.aclose()
+
+
+class CachedAwsClient(AwsClient[AwsConfigurationT]):
+    """
+    Aws client that reuses the aiobotocore clients of a cache.
+
+    Without cache, a new aiobotocore client is created for each usage.
+    """
+
+    def __init__(self, configuration: AwsConfigurationT, clients_cache: AwsClientsCache | None = None) -> None:
+        """
+        Initialize CachedAwsClient.
+
+        Args:
+            configuration: AWS configuration
+            clients_cache: AwsClientsCache | None
+        """
+        super().__init__(configuration)
+        self._clients_cache = clients_cache
+
+    @asynccontextmanager
+    async def client(self, client_name: str) -> AsyncGenerator[Any, None]:
+        """
+        Get AWS client.
+
+        The cached client is not closed when leaving the context.
+
+        Args:
+            client_name: str
+
+        Yields:
+            Any: the aiobotocore client
+        """
+        if self._clients_cache is None or self._configuration is None:
+            async with self.get_client(client_name) as client:
+                yield client
+
+            return
+
+        credentials_key = hashlib.sha256(
+            f"{self._configuration.aws_access_key_id}:{self._configuration.aws_secret_access_key}".encode("utf-8")
+        ).hexdigest()
+
+        yield await self._clients_cache.get_client(
+            self.get_session, client_name, self._configuration.aws_region, credentials_key
+        )
@@ -0,0 +1,56 @@
+"""Sampled profiling of the hot paths, for analysis in production."""
+
+import cProfile
+import os
+import random
+import tempfile
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+
+from loguru import logger
+
+
+@contextmanager
+def sampled_profile(name: str) -> Generator[None, None, None]:
+    """
+    Profile a sample of the executions of the block with cProfile.
+
+    The profiling is enabled by the environment:
+    - AWS_PROFILING_SAMPLE_RATE: the ratio, between 0 and 1, of the executions to profile (0 by default)
+    - AWS_PROFILING_DIR: the directory of the dumps (the temporary directory by default)
+    - AWS_PROFILING_MAX_DUMPS: the number of dumps to keep, the oldest ones are removed (10 by default)
+
+    The dumps can be read with `python -m pstats` or snakeviz.
+
+    Args:
+        name: str: the prefix of the dumps
+    """
+    sample_rate = float(os.getenv("AWS_PROFILING_SAMPLE_RATE", 0))
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+
+        try:
+            directory = Path(os.getenv("AWS_PROFILING_DIR", tempfile.gettempdir()))
+            directory.mkdir(parents=True, exist_ok=True)
+
+            dump_path = directory / f"{name}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}.prof"
+            profiler.dump_stats(dump_path)
+            logger.info(f"Profile dumped to {dump_path}")
+
+            # Keep only the most recent dumps
+            max_dumps = int(os.getenv("AWS_PROFILING_MAX_DUMPS", 10))
+            dumps = sorted(directory.glob(f"{name}-*.prof"), key=lambda path: path.stat().st_mtime)
+            for old_dump in dumps[: max(len(dumps) - max_dumps, 0)]:
+                old_dump.unlink(missing_ok=True)
+        except Exception as error:
+            logger.warning(f"Failed to dump the profile: {error}")
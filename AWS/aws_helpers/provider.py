@@ -3,12 +3,17 @@ from abc import ABCMeta, abstractmethod
 from contextlib import AbstractAsyncContextManager
 from typing import Protocol
 
-from aws_helpers.utils import AsyncReader
+from aws_helpers.utils import AsyncReader, ReadStats
 
 
 class AwsS3Client(Protocol):
     def read_key(
-        self, key: str, bucket: str | None = None, loop: asyncio.AbstractEventLoop | None = None
+        self,
+        key: str,
+        bucket: str | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+        streaming: bool = False,
+        stats: ReadStats | None = None,
     ) -> AbstractAsyncContextManager[AsyncReader]:
         """
         Reads content from S3 object.
@@ -16,6 +21,8 @@ class AwsS3Client(Protocol):
         Args:
             key: str
             bucket: str | None: if not provided, then use default bucket from configuration
+            streaming: bool: read the object chunk by chunk instead of loading it in memory
+            stats: ReadStats | None: statistics updated while reading the object
 
         Yields:
             AsyncReader: The reader of the S3 object
@@ -2,46 +2,62 @@
 
 import asyncio
 import io
+import time
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from aiofiles.threadpool.binary import AsyncBufferedReader
 from loguru import logger
 from pydantic.v1 import Field
-from sekoia_automation.aio.helpers.aws.client import AwsClient, AwsConfiguration
+from sekoia_automation.aio.helpers.aws.client import AwsConfiguration
 
-from aws_helpers.utils import AsyncReader, async_gzip_open, is_gzip_compressed
+from aws_helpers.client_cache import AwsClientsCache, CachedAwsClient
+from aws_helpers.utils import AsyncReader, AsyncStreamReader, ReadStats, async_gzip_open, is_gzip_compressed
 
 
 class S3Configuration(AwsConfiguration):
     """AWS S3 wrapper configuration."""
 
     bucket: str | None = Field(default=None, description="AWS S3 bucket name")
+    stream_buffer_size: int = Field(
+        default=1024 * 1024, description="Size, in bytes, of the chunks read from the objects in streaming mode"
+    )
 
 
 # mypy: ignore-errors
-class S3Wrapper(AwsClient[S3Configuration]):
+class S3Wrapper(CachedAwsClient[S3Configuration]):
     """Aws S3 wrapper."""
 
-    def __init__(self, configuration: S3Configuration) -> None:
+    def __init__(self, configuration: S3Configuration, clients_cache: AwsClientsCache | None = None) -> None:
         """
         Initialize S3Wrapper.
 
         Args:
             configuration: AWS configuration
+            clients_cache: AwsClientsCache | None: cache of the long-lived clients
         """
-        super().__init__(configuration)
+        super().__init__(configuration, clients_cache)
 
     @asynccontextmanager
     async def read_key(
-        self, key: str, bucket: str | None = None, loop: asyncio.AbstractEventLoop | None = None
+        self,
+        key: str,
+        bucket: str | None = None,
+        loop: asyncio.AbstractEventLoop | None = None,
+        streaming: bool = False,
+        stats: ReadStats | None = None,
     ) -> AsyncGenerator[AsyncReader, None]:
         """
         Reads text file from S3 bucket.
 
+        In streaming mode, the object is read and inflated chunk by chunk, instead of being loaded in memory.
+
         Args:
             key: str
             bucket: str | None: if not provided, then use default bucket from configuration
+            streaming: bool: read the object chunk by chunk
+            stats: ReadStats | None: statistics updated while reading the object.
+                The inflated bytes are only measured in streaming mode.
 
         Yields:
             str:
@@ -51,12 +67,45 @@ class S3Wrapper(AwsClient[S3Configuration]):
         if loop is None:
             loop = asyncio.get_running_loop()
 
+        if stats is None:
+            stats = ReadStats()
+
         logger.info(f"Reading object {key} from bucket {bucket}")
 
-        async with self.get_client("s3") as s3:
+        async with self.client("s3") as s3:
+            start = time.perf_counter()
             response = await s3.get_object(Bucket=bucket, Key=key)
+            stats.fetch_duration = time.perf_counter() - start
+            stats.object_size = response.get("ContentLength") or 0
+
             async with response["Body"] as stream:
-                with io.BytesIO(await stream.read()) as content:
+                if streaming:
+                    # Read the first chunk to detect the compression of the object
+                    start = time.perf_counter()
+                    first_chunk = await stream.read(self._configuration.stream_buffer_size)
+                    stats.download_duration += time.perf_counter() - start
+                    stats.downloaded_bytes += len(first_chunk)
+
+                    stream_reader = AsyncStreamReader(
+                        stream,
+                        buffer_size=self._configuration.stream_buffer_size,
+                        compressed=is_gzip_compressed(first_chunk),
+                        initial_data=first_chunk,
+                        stats=stats,
+                    )
+                    try:
+                        yield stream_reader
+                    finally:
+                        await stream_reader.close()
+
+                    return
+
+                start = time.perf_counter()
+                data = await stream.read()
+                stats.download_duration += time.perf_counter() - start
+                stats.downloaded_bytes += len(data)
+
+                with io.BytesIO(data) as content:
                     if is_gzip_compressed(content.getbuffer()):
                         async_reader = await async_gzip_open(content, loop=loop)
                     else:
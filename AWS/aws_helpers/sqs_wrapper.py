@@ -1,12 +1,14 @@
 """Aws sqs client wrapper with its config class."""
 
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Sequence
 from contextlib import asynccontextmanager
 
 from async_lru import alru_cache
 from loguru import logger
 from pydantic.v1 import Field
-from sekoia_automation.aio.helpers.aws.client import AwsClient, AwsConfiguration
+from sekoia_automation.aio.helpers.aws.client import AwsConfiguration
+
+from aws_helpers.client_cache import AwsClientsCache, CachedAwsClient
 
 
 class SqsConfiguration(AwsConfiguration):
@@ -18,17 +20,18 @@ class SqsConfiguration(AwsConfiguration):
     queue_url: str | None = Field(descripton="AWS SQS queue url")
 
 
-class SqsWrapper(AwsClient[SqsConfiguration]):
+class SqsWrapper(CachedAwsClient[SqsConfiguration]):
     """Aws SQS wrapper."""
 
-    def __init__(self, configuration: SqsConfiguration) -> None:
+    def __init__(self, configuration: SqsConfiguration, clients_cache: AwsClientsCache | None = None) -> None:
         """
         Initialize SqsTest.
 
         Args:
             configuration: AWS configuration
+            clients_cache: AwsClientsCache | None: cache of the long-lived clients
         """
-        super().__init__(configuration)
+        super().__init__(configuration, clients_cache)
 
         logger.info(
             """
@@ -62,7 +65,7 @@ class SqsWrapper(AwsClient[SqsConfiguration]):
         if self._configuration and self._configuration.queue_url:
             result = self._configuration.queue_url
         else:
-            async with self.get_client("sqs") as sqs:
+            async with self.client("sqs") as sqs:
                 data = await sqs.get_queue_url(QueueName=self._configuration.queue_name)
                 result = data.get("QueueUrl")
 
@@ -71,6 +74,32 @@ class SqsWrapper(AwsClient[SqsConfiguration]):
 
         raise ValueError("Queue url is not defined")
 
+    async def delete_messages(self, receipt_handles: Sequence[str]) -> None:
+        """
+        Delete messages from the queue.
+
+        Messages are deleted by batches of 10, the maximum allowed by DeleteMessageBatch.
+
+        Args:
+            receipt_handles: Sequence[str]
+        """
+        queue_url = await self.queue_url()
+
+        async with self.client("sqs") as sqs:
+            for index in range(0, len(receipt_handles), 10):
+                entries = [
+                    {"Id": str(entry_id), "ReceiptHandle": receipt_handle}
+                    for entry_id, receipt_handle in enumerate(receipt_handles[index : index + 10])
+                ]
+                response = await sqs.delete_message_batch(QueueUrl=queue_url, Entries=entries)
+
+                for failure in response.get("Failed", []):
+                    logger.warning(
+                        "Failed to delete message {entry_id} from sqs: {reason}",
+                        entry_id=failure.get("Id"),
+                        reason=failure.get("Message"),
+                    )
+
     @asynccontextmanager
     async def receive_messages(
         self,
@@ -83,6 +112,8 @@ class SqsWrapper(AwsClient[SqsConfiguration]):
         Receive SQS messages.
 
         After processing messages they will be deleted from queue if delete_consumed_messages is True.
+        If the processing fails, the messages are kept in the queue and will be received again once
+        the visibility timeout expires.
 
         Example of usage:
         with sqs.receive_messages() as messages:
@@ -108,7 +139,7 @@ class SqsWrapper(AwsClient[SqsConfiguration]):
         if visibility_timeout is not None and visibility_timeout < 0:
             raise ValueError("timeout should be a positive integer")
 
-        async with self.get_client("sqs") as sqs:
+        async with self.client("sqs") as sqs:
             try:
                 response = await sqs.receive_message(
                     QueueUrl=queue_url,
@@ -125,17 +156,20 @@ class SqsWrapper(AwsClient[SqsConfiguration]):
                 raise e
 
             result = []
+            for message in response.get("Messages", []):
+                result.append((message["Body"], int(message["Attributes"]["SentTimestamp"])))
 
-            try:
-                for message in response.get("Messages", []):
-                    result.append((message["Body"], int(message["Attributes"]["SentTimestamp"])))
-
-                logger.info(f"Received {len(result)} messages from sqs queue {self._configuration.queue_name}")
-
-                yield result
-            finally:
-                # We should delete messages from queue after releasing context manager if it is configured
-                if delete_consumed_messages and response.get("Messages", []):
-                    logger.info("Deleting consumed messages from sqs")
-                    for message in response.get("Messages", []):
-                        await sqs.delete_message(QueueUrl=queue_url, ReceiptHandle=message["ReceiptHandle"])
+            logger.info(f"Received {len(result)} messages from sqs queue {self._configuration.queue_name}")
+
+        try:
+            yield result
+        except Exception:
+            if response.get("Messages", []):
+                logger.warning("Failed to process messages from sqs. They will be received again")
+
+            raise
+
+        # We should delete messages from queue after processing them if it is configured
+        if delete_consumed_messages and response.get("Messages", []):
+            logger.info("Deleting consumed messages from sqs")
+            await self.delete_messages([message["ReceiptHandle"] for message in response.get("Messages", [])])
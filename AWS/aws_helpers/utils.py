@@ -1,12 +1,20 @@
 import asyncio
 import codecs
 import gzip
+import time
+import zlib
 from abc import abstractmethod
+from collections.abc import AsyncGenerator, AsyncIterable, AsyncIterator, Callable, Iterator
 from concurrent.futures import Executor
+from dataclasses import dataclass
 from functools import partial
 from typing import Any, BinaryIO, Protocol
 from urllib.parse import unquote
 
+import orjson
+import pyarrow
+import pyarrow.compute
+import pyarrow.parquet
 from aiofiles.threadpool.binary import AsyncBufferedReader
 
 
@@ -101,3 +109,366 @@ async def async_gzip_open(
     )
     f = await loop.run_in_executor(executor, cb)
     return AsyncBufferedReader(f, loop=loop, executor=executor)  # type: ignore[arg-type]
+
+
+@dataclass
+class ReadStats:
+    """Statistics about the read of an S3 object."""
+
+    # Size of the object, as announced by S3
+    object_size: int = 0
+    # Duration, in seconds, of the GetObject request, until the headers of the response are received
+    fetch_duration: float = 0.0
+    # Bytes read from the body of the object, and the time spent waiting for them
+    downloaded_bytes: int = 0
+    download_duration: float = 0.0
+    # Bytes produced by the inflation of gzip content, and the time spent inflating them
+    inflated_bytes: int = 0
+    inflate_duration: float = 0.0
+
+
+class AsyncStreamReader:
+    """
+    Read the body of an S3 object chunk by chunk.
+
+    Gzip compressed content is inflated incrementally, so the memory used by the reader is bounded by the size
+    of the buffer instead of the size of the object.
+    """
+
+    def __init__(
+        self,
+        body: Any,
+        buffer_size: int,
+        compressed: bool = False,
+        initial_data: bytes = b"",
+        stats: ReadStats | None = None,
+    ) -> None:
+        """
+        Initialize AsyncStreamReader.
+
+        Args:
+            body: Any: the aiobotocore body of the object
+            buffer_size: int: the size of the chunks to read and inflate
+            compressed: bool: whether the content is gzip compressed
+            initial_data: bytes: data already read from the body
+            stats: ReadStats | None: statistics updated with the bytes read and inflated
+        """
+        self._body = body
+        self._buffer_size = buffer_size
+        self._compressed = compressed
+        # Decompressor of the current gzip member, None between the members
+        self._decompressor: Any = None
+        self._raw = initial_data
+        self._pending = bytearray()
+        self.stats = stats or ReadStats()
+
+    async def _read_body(self) -> bytes:
+        """
+        Read the next chunk of the body.
+
+        Returns:
+            bytes:
+        """
+        start = time.perf_counter()
+        result: bytes = await self._body.read(self._buffer_size)
+        self.stats.download_duration += time.perf_counter() - start
+        self.stats.downloaded_bytes += len(result)
+
+        return result
+
+    async def _next_chunk(self) -> bytes:
+        """
+        Get the next chunk of decoded content.
+
+        Returns:
+            bytes: an empty bytes object at the end of the stream
+
+        Raises:
+            EOFError: if the body ends in the middle of a gzip member
+        """
+        if not self._compressed:
+            if self._raw:
+                chunk, self._raw = self._raw, b""
+                return chunk
+
+            return await self._read_body()
+
+        while True:
+            if not self._raw:
+                self._raw = await self._read_body()
+                if not self._raw:
+                    if self._decompressor is not None:
+                        raise EOFError("Compressed file ended before the end-of-stream marker was reached")
+
+                    return b""
+
+            if self._decompressor is None:
+                # The content can be made of several gzip members, optionally padded with zeroes
+                self._raw = self._raw.lstrip(b"\x00")
+                if not self._raw:
+                    continue
+
+                self._decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+            start = time.perf_counter()
+            chunk = self._decompressor.decompress(self._raw, self._buffer_size)
+            self.stats.inflate_duration += time.perf_counter() - start
+            self.stats.inflated_bytes += len(chunk)
+            if self._decompressor.eof:
+                # Start a new decompressor on the next gzip member
+                self._raw = self._decompressor.unused_data
+                self._decompressor = None
+            else:
+                self._raw = self._decompressor.unconsumed_tail
+
+            if chunk:
+                return chunk
+
+    async def read(self, size: int = -1, /) -> bytes:
+        """
+        Read up to `size` bytes of decoded content.
+
+        Args:
+            size: int: if negative, read the whole remaining content
+
+        Returns:
+            bytes:
+        """
+        while size < 0 or len(self._pending) < size:
+            chunk = await self._next_chunk()
+            if not chunk:
+                break
+
+            self._pending += chunk
+
+        if size < 0:
+            size = len(self._pending)
+
+        result = bytes(self._pending[:size])
+        del self._pending[:size]
+
+        return result
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        """
+        Iterate over the chunks of decoded content.
+
+        Yields:
+            bytes:
+        """
+        if self._pending:
+            chunk = bytes(self._pending)
+            self._pending.clear()
+            yield chunk
+
+        while chunk := await self._next_chunk():
+            yield chunk
+
+    async def close(self) -> None:
+        """Release the buffers of the reader. The body itself is closed by its owner."""
+        self._raw = b""
+        self._pending.clear()
+
+
+async def iter_records(chunks: AsyncIterable[bytes], separator: bytes) -> AsyncGenerator[bytes, None]:
+    """
+    Split a stream of chunks into records.
+
+    The separator can be made of several bytes and overlap two chunks.
+    Like `bytes.split`, it yields an empty record when the content ends with the separator.
+
+    Args:
+        chunks: AsyncIterable[bytes]
+        separator: bytes
+
+    Yields:
+        bytes:
+    """
+    # The chunks of the pending record are joined only once a separator is found in the new bytes.
+    # `overlap` holds the last bytes of the pending record, where a separator may start.
+    overlap_size = len(separator) - 1
+    pending: list[bytes] = []
+    overlap = b""
+    async for chunk in chunks:
+        window = overlap + chunk if overlap else chunk
+        if separator not in window:
+            pending.append(chunk)
+            overlap = window[-overlap_size:] if overlap_size > 0 else b""
+            continue
+
+        *records, last = (b"".join(pending) + chunk if pending else chunk).split(separator)
+        for record in records:
+            yield record
+
+        pending = [last]
+        overlap = last[-overlap_size:] if overlap_size > 0 else b""
+
+    yield b"".join(pending)
+
+
+async def iter_chunks(reader: AsyncReader, chunk_size: int = 1024 * 1024) -> AsyncGenerator[bytes, None]:
+    """
+    Read a stream chunk by chunk.
+
+    Args:
+        reader: AsyncReader
+        chunk_size: int
+
+    Yields:
+        bytes:
+    """
+    while chunk := await reader.read(chunk_size):
+        yield chunk
+
+
+async def iter_text_records(reader: AsyncReader, separator: str) -> AsyncGenerator[str, None]:
+    """
+    Split a stream into non-empty text records, without loading the whole content in memory.
+
+    Args:
+        reader: AsyncReader
+        separator: str: the separator between the records, possibly made of several characters
+
+    Yields:
+        str:
+    """
+    async for record in iter_records(iter_chunks(reader), separator.encode("utf-8")):
+        if len(record) > 0:
+            yield record.decode("utf-8")
+
+
+async def skip_records(records: AsyncIterable[str], count: int) -> AsyncGenerator[str, None]:
+    """
+    Skip the first records of a stream of records.
+
+    Args:
+        records: AsyncIterable[str]
+        count: int: the number of records to skip
+
+    Yields:
+        str:
+    """
+    index = 0
+    async for record in records:
+        if index >= count:
+            yield record
+        else:
+            index += 1
+
+
+async def skip_comments(records: AsyncIterable[str]) -> AsyncGenerator[str, None]:
+    """
+    Skip the commented records, starting with the character `#`, of a stream of records.
+
+    Args:
+        records: AsyncIterable[str]
+
+    Yields:
+        str:
+    """
+    async for record in records:
+        if not record.strip().startswith("#"):
+            yield record
+
+
+def iter_parquet_batches(content: bytes, batch_size: int = 10000) -> Iterator[pyarrow.RecordBatch]:
+    """
+    Iterate over the record batches of a Parquet file.
+
+    Only one batch of rows is decoded at a time.
+
+    Args:
+        content: bytes: the content of the Parquet file
+        batch_size: int: the maximum number of rows per batch
+
+    Yields:
+        pyarrow.RecordBatch:
+    """
+    parquet_file = pyarrow.parquet.ParquetFile(pyarrow.BufferReader(content))
+    yield from parquet_file.iter_batches(batch_size=batch_size)
+
+
+def _map_timestamp_types(
+    data_type: pyarrow.DataType, mapper: Callable[[pyarrow.TimestampType], pyarrow.DataType]
+) -> pyarrow.DataType:
+    """
+    Replace the timestamp types, including the ones nested in lists, structs and maps, of a type.
+
+    Args:
+        data_type: pyarrow.DataType
+        mapper: Callable[[pyarrow.TimestampType], pyarrow.DataType]
+
+    Returns:
+        pyarrow.DataType:
+    """
+    if pyarrow.types.is_timestamp(data_type):
+        return mapper(data_type)
+
+    if pyarrow.types.is_struct(data_type):
+        return pyarrow.struct(
+            [
+                data_type.field(index).with_type(_map_timestamp_types(data_type.field(index).type, mapper))
+                for index in range(data_type.num_fields)
+            ]
+        )
+
+    if pyarrow.types.is_map(data_type):
+        return pyarrow.map_(
+            data_type.key_field.with_type(_map_timestamp_types(data_type.key_type, mapper)),
+            data_type.item_field.with_type(_map_timestamp_types(data_type.item_type, mapper)),
+            keys_sorted=data_type.keys_sorted,
+        )
+
+    if pyarrow.types.is_list(data_type):
+        return pyarrow.list_(data_type.value_field.with_type(_map_timestamp_types(data_type.value_type, mapper)))
+
+    if pyarrow.types.is_large_list(data_type):
+        return pyarrow.large_list(data_type.value_field.with_type(_map_timestamp_types(data_type.value_type, mapper)))
+
+    if pyarrow.types.is_fixed_size_list(data_type):
+        return pyarrow.list_(
+            data_type.value_field.with_type(_map_timestamp_types(data_type.value_type, mapper)), data_type.list_size
+        )
+
+    return data_type
+
+
+def _to_epoch_timestamps(column: pyarrow.Array) -> pyarrow.Array:
+    """
+    Convert the timestamps of a column, including the nested ones, to milliseconds since epoch.
+
+    Args:
+        column: pyarrow.Array
+
+    Returns:
+        pyarrow.Array: the column itself if it contains no timestamp
+    """
+    epoch_type = _map_timestamp_types(column.type, lambda _: pyarrow.int64())
+    if epoch_type == column.type:
+        return column
+
+    milliseconds_type = _map_timestamp_types(column.type, lambda data_type: pyarrow.timestamp("ms", data_type.tz))
+    return pyarrow.compute.cast(pyarrow.compute.cast(column, milliseconds_type, safe=False), epoch_type)
+
+
+def record_batch_to_json(batch: pyarrow.RecordBatch, epoch_timestamps: bool = False) -> Iterator[str]:
+    """
+    Serialize the rows of a record batch to JSON.
+
+    The columns are converted one by one with `pyarrow.compute`, then the rows are serialized in a single pass.
+
+    Args:
+        batch: pyarrow.RecordBatch
+        epoch_timestamps: bool: serialize the timestamps as milliseconds since epoch instead of ISO 8601 dates
+
+    Yields:
+        str:
+    """
+    names = batch.schema.names
+    columns = batch.columns
+
+    if epoch_timestamps:
+        columns = [_to_epoch_timestamps(column) for column in columns]
+
+    for values in zip(*(column.to_pylist() for column in columns)):
+        yield orjson.dumps(dict(zip(names, values))).decode("utf-8")
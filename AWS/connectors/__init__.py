@@ -1,8 +1,10 @@
 """All available connectors for this module."""
 
 import asyncio
+import os
 import time
 from abc import ABCMeta
+from dataclasses import dataclass, field
 from functools import cached_property
 from typing import Any, Optional
 
@@ -12,7 +14,19 @@ from sekoia_automation.aio.helpers.aws.client import AwsClient, AwsConfiguration
 from sekoia_automation.connector import Connector, DefaultConnectorConfiguration
 from sekoia_automation.module import Module
 
-from .metrics import EVENTS_LAG, FORWARD_EVENTS_DURATION, MESSAGES_AGE, OUTCOMING_EVENTS
+from aws_helpers.client_cache import AwsClientsCache
+from aws_helpers.profiling import sampled_profile
+
+from .metrics import (
+    EVENTS_LAG,
+    FORWARD_EVENTS_DURATION,
+    MESSAGES_AGE,
+    OUTCOMING_EVENTS,
+    PENDING_EVENTS,
+    RECEIVED_MESSAGES,
+    STAGE_DURATION,
+    track_stage,
+)
 
 
 class AwsModuleConfiguration(BaseModel):
@@ -59,6 +73,16 @@ class AbstractAwsConnector(AsyncConnector, metaclass=ABCMeta):
 
         return AwsClient(config)
 
+    @cached_property
+    def clients_cache(self) -> AwsClientsCache:
+        """
+        Cache of the long-lived AWS clients of the connector.
+
+        Returns:
+            AwsClientsCache:
+        """
+        return AwsClientsCache(max_pool_connections=int(os.getenv("AWS_MAX_POOL_CONNECTIONS", 10)))
+
     async def next_batch(self) -> tuple[int, list[int]]:
         """
         Get next batch of messages.
@@ -80,7 +104,9 @@ class AbstractAwsConnector(AsyncConnector, metaclass=ABCMeta):
                     processing_start = time.time()
                     current_lag: int = 0
 
-                    batch_result: tuple[int, list[int]] = loop.run_until_complete(self.next_batch())
+                    # Profile a sample of the batches when enabled by the environment
+                    with sampled_profile(self.__class__.__name__):
+                        batch_result: tuple[int, list[int]] = loop.run_until_complete(self.next_batch())
                     message_count, messages_timestamp = batch_result
 
                     # compute the duration of the batch
@@ -120,8 +146,196 @@ class AbstractAwsConnector(AsyncConnector, metaclass=ABCMeta):
             except Exception as e:
                 self.log_exception(e)
 
+        # Release the connections of the cached clients
+        if "clients_cache" in self.__dict__:
+            asyncio.get_event_loop().run_until_complete(self.clients_cache.close())
+
     def stop(self, *args: Any, **kwargs: Optional[Any]) -> None:  # pragma: no cover
         """
         Stop the connector
         """
         super(Connector, self).stop(*args, **kwargs)
+
+
+@dataclass
+class SqsBatch:
+    """State of a batch of SQS messages shared by the receivers and the push stage."""
+
+    # Events waiting to be pushed, with the future to resolve once they are pushed
+    queue: asyncio.Queue[tuple[list[str], asyncio.Future[None]] | None] = field(default_factory=asyncio.Queue)
+    received_events: int = 0
+    pushed_events: int = 0
+    timestamps: list[int] = field(default_factory=list)
+
+
+class AbstractAwsSqsConnector(AbstractAwsConnector, metaclass=ABCMeta):
+    """
+    All connectors that consume messages from SQS.
+
+    Several receivers poll the queue concurrently and feed a shared push stage,
+    which flushes the events to the intakes by size or by time.
+    The messages are acknowledged only once their events are pushed.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Optional[Any]) -> None:
+        """Init AbstractAwsSqsConnector."""
+
+        super().__init__(*args, **kwargs)
+        self.limit_of_events_to_push = int(os.getenv("AWS_BATCH_SIZE", 10000))
+        self.sqs_max_messages = int(os.getenv("AWS_SQS_MAX_MESSAGES", 10))
+        self.sqs_visibility_timeout = int(os.getenv("AWS_SQS_VISIBILITY_TIMEOUT", 60))
+        self.sqs_receivers = max(int(os.getenv("AWS_SQS_RECEIVERS", 1)), 1)
+        self.push_interval = float(os.getenv("AWS_PUSH_INTERVAL", 5))
+
+    async def _process_messages(self, messages: list[tuple[str, int]]) -> tuple[list[str], int]:
+        """
+        Process the messages received from SQS.
+
+        Args:
+            messages: list[tuple[str, int]]: list of message content and message sent timestamp
+
+        Returns:
+            tuple[list[str], int]: the events to push and the number of events already pushed to the intakes
+        """
+        raise NotImplementedError("_process_messages method must be implemented")
+
+    async def _consume_messages(self, batch: SqsBatch, received: asyncio.Future[int]) -> None:
+        """
+        Receive messages from SQS, process them and wait for their events to be pushed.
+
+        Leaving the receiving context acknowledges the messages.
+
+        Args:
+            batch: SqsBatch
+            received: asyncio.Future[int]: resolved with the number of events once the messages are processed
+        """
+        intake_key = self.configuration.intake_key
+
+        start = time.perf_counter()
+        async with self.sqs_wrapper.receive_messages(
+            max_messages=self.sqs_max_messages, visibility_timeout=self.sqs_visibility_timeout
+        ) as messages:
+            STAGE_DURATION.labels(intake_key=intake_key, stage="sqs_receive").observe(time.perf_counter() - start)
+            RECEIVED_MESSAGES.labels(intake_key=intake_key).inc(len(messages))
+            batch.timestamps.extend(message_timestamp for _, message_timestamp in messages)
+
+            events: list[str] = []
+            pushed_count = 0
+            if messages:
+                with track_stage(intake_key, "process"):
+                    events, pushed_count = await self._process_messages(messages)
+            batch.pushed_events += pushed_count
+
+            pushed: asyncio.Future[None] | None = None
+            if events:
+                pushed = asyncio.get_running_loop().create_future()
+                batch.queue.put_nowait((events, pushed))
+
+            received.set_result(len(events) + pushed_count)
+
+            if pushed is not None:
+                await pushed
+
+    async def _receive_messages(self, batch: SqsBatch, task_group: asyncio.TaskGroup) -> None:
+        """
+        Poll SQS until the queue is empty or the batch is full.
+
+        The next poll doesn't wait for the events of the previous one to be pushed.
+
+        Args:
+            batch: SqsBatch
+            task_group: asyncio.TaskGroup
+        """
+        while batch.received_events < self.limit_of_events_to_push:
+            received: asyncio.Future[int] = asyncio.get_running_loop().create_future()
+            task_group.create_task(self._consume_messages(batch, received))
+
+            events_count = await received
+            if events_count == 0:
+                break
+
+            batch.received_events += events_count
+
+    async def _flush_events(self, batch: SqsBatch, events: list[str], pushed: list[asyncio.Future[None]]) -> None:
+        """
+        Push the events to the intakes and notify the receivers.
+
+        Args:
+            batch: SqsBatch
+            events: list[str]
+            pushed: list[asyncio.Future[None]]
+        """
+        try:
+            with track_stage(self.configuration.intake_key, "push"):
+                batch.pushed_events += len(await self.push_data_to_intakes(events=events))
+        except Exception as error:
+            for future in pushed:
+                if not future.done():
+                    future.set_exception(error)
+        else:
+            for future in pushed:
+                if not future.done():
+                    future.set_result(None)
+
+    async def _push_events(self, batch: SqsBatch) -> None:
+        """
+        Push the events of the batch to the intakes.
+
+        Events are flushed when the buffer is full, when the push interval is elapsed
+        or when all the receivers are done.
+
+        Args:
+            batch: SqsBatch
+        """
+        loop = asyncio.get_running_loop()
+        events: list[str] = []
+        pushed: list[asyncio.Future[None]] = []
+        deadline: float | None = None
+        finished = False
+
+        while not finished:
+            timeout = None if deadline is None else max(deadline - loop.time(), 0)
+            try:
+                item = await asyncio.wait_for(batch.queue.get(), timeout)
+            except TimeoutError:
+                # The push interval is elapsed
+                pass
+            else:
+                if item is None:
+                    finished = True
+                else:
+                    events.extend(item[0])
+                    pushed.append(item[1])
+                    if deadline is None:
+                        deadline = loop.time() + self.push_interval
+
+            PENDING_EVENTS.labels(intake_key=self.configuration.intake_key).set(len(events))
+
+            is_full = len(events) >= self.limit_of_events_to_push
+            is_expired = deadline is not None and loop.time() >= deadline
+            if events and (finished or is_full or is_expired):
+                await self._flush_events(batch, events, pushed)
+                events, pushed, deadline = [], [], None
+
+                PENDING_EVENTS.labels(intake_key=self.configuration.intake_key).set(0)
+
+    async def next_batch(self) -> tuple[int, list[int]]:
+        """
+        Get next batch of messages.
+
+        Contains main logic of the connector.
+
+        Returns:
+            tuple[int, list[int]]:
+        """
+        batch = SqsBatch()
+
+        async with asyncio.TaskGroup() as task_group:
+            task_group.create_task(self._push_events(batch))
+
+            await asyncio.gather(*(self._receive_messages(batch, task_group) for _ in range(self.sqs_receivers)))
+
+            # All the receivers are done: flush the remaining events
+            batch.queue.put_nowait(None)
+
+        return batch.pushed_events, batch.timestamps
@@ -1,5 +1,9 @@
 """All necessary metrics."""
 
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+
 from prometheus_client import Counter, Gauge, Histogram
 
 # Declare common prometheus metrics
@@ -48,3 +52,73 @@ DISCARDED_EVENTS = Counter(
     namespace=prom_aws_namespace,
     labelnames=["intake_key"],
 )
+
+RECEIVED_MESSAGES = Counter(
+    name="received_messages",
+    documentation="Number of messages received from AWS SQS",
+    namespace=prom_aws_namespace,
+    labelnames=["intake_key"],
+)
+
+PENDING_EVENTS = Gauge(
+    name="pending_events",
+    documentation="Number of events waiting in the push buffer",
+    namespace=prom_aws_namespace,
+    labelnames=["intake_key"],
+)
+
+STAGE_DURATION = Histogram(
+    name="stage_duration",
+    documentation="Duration, in seconds, of each stage of the collect",
+    namespace=prom_aws_namespace,
+    labelnames=["intake_key", "stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, float("inf")),
+)
+
+IN_FLIGHT_OPERATIONS = Gauge(
+    name="in_flight_operations",
+    documentation="Number of operations in progress in each stage of the collect",
+    namespace=prom_aws_namespace,
+    labelnames=["intake_key", "stage"],
+)
+
+OBJECT_SIZE = Histogram(
+    name="object_size",
+    documentation="Size, in bytes, of the S3 objects",
+    namespace=prom_aws_namespace,
+    labelnames=["intake_key"],
+    buckets=(1024, 16 * 1024, 128 * 1024, 1024**2, 8 * 1024**2, 64 * 1024**2, 512 * 1024**2, float("inf")),
+)
+
+DOWNLOADED_BYTES = Counter(
+    name="downloaded_bytes",
+    documentation="Number of bytes downloaded from AWS S3",
+    namespace=prom_aws_namespace,
+    labelnames=["intake_key"],
+)
+
+INFLATED_BYTES = Counter(
+    name="inflated_bytes",
+    documentation="Number of bytes produced by the inflation of the compressed S3 objects",
+    namespace=prom_aws_namespace,
+    labelnames=["intake_key"],
+)
+
+
+@contextmanager
+def track_stage(intake_key: str, stage: str) -> Generator[None, None, None]:
+    """
+    Observe the duration of a stage and count the operations of the stage in progress.
+
+    Args:
+        intake_key: str
+        stage: str
+    """
+    in_flight = IN_FLIGHT_OPERATIONS.labels(intake_key=intake_key, stage=stage)
+    in_flight.inc()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        in_flight.dec()
+        STAGE_DURATION.labels(intake_key=intake_key, stage=stage).observe(time.perf_counter() - start)
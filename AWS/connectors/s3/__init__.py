@@ -1,6 +1,8 @@
 """Package for all s3 connectors impl."""
 
+import asyncio
 import os
+import time
 from abc import ABCMeta
 from asyncio import BoundedSemaphore
 from collections.abc import AsyncGenerator
@@ -9,9 +11,16 @@ from typing import Any, Optional
 import orjson
 from pydantic.v1 import BaseModel, Field
 
-from aws_helpers.utils import AsyncReader, normalize_s3_key, unescape_string
-from connectors import AbstractAwsConnector, AbstractAwsConnectorConfiguration
-from connectors.metrics import INCOMING_EVENTS
+from aws_helpers.utils import AsyncReader, ReadStats, normalize_s3_key, unescape_string
+from connectors import AbstractAwsConnectorConfiguration, AbstractAwsSqsConnector
+from connectors.metrics import (
+    DOWNLOADED_BYTES,
+    INCOMING_EVENTS,
+    INFLATED_BYTES,
+    OBJECT_SIZE,
+    STAGE_DURATION,
+    track_stage,
+)
 
 
 class AwsS3QueuedConfiguration(AbstractAwsConnectorConfiguration):
@@ -33,19 +42,19 @@ class AwsS3LogsBaseConfiguration(BaseModel):
         return unescape_string(self.separator)
 
 
-class AbstractAwsS3QueuedConnector(AbstractAwsConnector, metaclass=ABCMeta):
+class AbstractAwsS3QueuedConnector(AbstractAwsSqsConnector, metaclass=ABCMeta):
     """All connectors that use SQS to trigger S3 events."""
 
     configuration: AwsS3QueuedConfiguration
 
+    # Set to True when `_parse_content` consumes the stream chunk by chunk, so the S3 objects are not loaded in memory
+    stream_content: bool = False
+
     def __init__(self, *args: Any, **kwargs: Optional[Any]) -> None:
         """Init AbstractAwsS3QueuedConnector."""
 
         super().__init__(*args, **kwargs)
-        self.limit_of_events_to_push = int(os.getenv("AWS_BATCH_SIZE", 10000))
-        self.sqs_max_messages = int(os.getenv("AWS_SQS_MAX_MESSAGES", 10))
-        self.sqs_visibility_timeout = int(os.getenv("AWS_SQS_VISIBILITY_TIMEOUT", 60))
-        self.s3_max_fetch_concurrency = int(os.getenv("AWS_S3_MAX_CONCURRENCY_FETCH", 10000))
+        self.s3_max_fetch_concurrency = int(os.getenv("AWS_S3_MAX_CONCURRENCY_FETCH", 10))
         self.s3_fetch_concurrency_sem = BoundedSemaphore(self.s3_max_fetch_concurrency)
 
     def _parse_content(self, stream: AsyncReader) -> AsyncGenerator[str, None]:  # pragma: no cover
@@ -74,83 +83,132 @@ class AbstractAwsS3QueuedConnector(AbstractAwsConnector, metaclass=ABCMeta):
             "object", {}
         ).get("key")
 
-    async def next_batch(self, previous_processing_end: float | None = None) -> tuple[int, list[int]]:
+    def _observe_object_read(self, stats: ReadStats, duration: float, push_duration: float) -> None:
+        """
+        Report the statistics about the read of an S3 object.
+
+        The parsing duration is the time spent on the object, except fetching, downloading, inflating
+        and pushing its events.
+
+        Args:
+            stats: ReadStats
+            duration: float: the time spent on the object
+            push_duration: float: the time spent pushing the events of the object
+        """
+        intake_key = self.configuration.intake_key
+
+        OBJECT_SIZE.labels(intake_key=intake_key).observe(stats.object_size)
+        DOWNLOADED_BYTES.labels(intake_key=intake_key).inc(stats.downloaded_bytes)
+        INFLATED_BYTES.labels(intake_key=intake_key).inc(stats.inflated_bytes)
+
+        parse_duration = (
+            duration - stats.fetch_duration - stats.download_duration - stats.inflate_duration - push_duration
+        )
+        for stage, stage_duration in (
+            ("s3_fetch", stats.fetch_duration),
+            ("s3_download", stats.download_duration),
+            ("inflate", stats.inflate_duration),
+            ("parse", max(parse_duration, 0)),
+        ):
+            STAGE_DURATION.labels(intake_key=intake_key, stage=stage).observe(stage_duration)
+
+    async def _process_notification(self, notification: dict[str, Any], records: list[str]) -> int:
         """
-        Get next batch of messages.
+        Fetch and parse the S3 object referenced by the notification.
 
-        Contains main logic of the connector.
+        The parsed events are appended to the shared buffer of records.
+        When the buffer reaches the limit of events to push, it is flushed to the intakes.
+        Failures to fetch or parse the object are logged, while failures to push the events are raised
+        so that the SQS messages are not acknowledged.
 
         Args:
-            previous_processing_end: float | None
+            notification: dict[str, Any]
+            records: list[str]: the shared buffer of events to push
 
         Returns:
-            tuple[int, list[int]]:
+            int: the number of events pushed to the intakes
         """
-        records = []
+        intake_key = self.configuration.intake_key
         result = 0
-        timestamps_to_log: list[int] = []
-
-        continue_receiving = True
+        push_error: Exception | None = None
+        stats = ReadStats()
+        push_duration = 0.0
+
+        try:
+            s3_bucket, s3_key = self._get_object_from_notification(notification)
+
+            if s3_bucket is None:
+                raise ValueError("Bucket is undefined", notification)
+
+            if s3_key is None:
+                raise ValueError("Key is undefined", notification)
+
+            normalized_key = normalize_s3_key(s3_key)
+
+            start = time.perf_counter()
+            stream: AsyncReader
+            async with self.s3_fetch_concurrency_sem:
+                STAGE_DURATION.labels(intake_key=intake_key, stage="s3_wait").observe(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                with track_stage(intake_key, "s3_object"):
+                    async with self.s3_wrapper.read_key(
+                        bucket=s3_bucket, key=normalized_key, streaming=self.stream_content, stats=stats
+                    ) as stream:
+                        async for event in self._parse_content(stream):
+                            records.append(event)
+
+                            if len(records) >= self.limit_of_events_to_push:
+                                # Take the content of the buffer before pushing,
+                                # so the other fetches can keep filling it
+                                events = records[:]
+                                records.clear()
+                                push_start = time.perf_counter()
+                                try:
+                                    with track_stage(intake_key, "push"):
+                                        result += len(await self.push_data_to_intakes(events=events))
+                                except Exception as error:
+                                    push_error = error
+                                    break
+                                finally:
+                                    push_duration += time.perf_counter() - push_start
+
+                self._observe_object_read(stats, time.perf_counter() - start, push_duration)
+
+        except Exception as e:
+            self.log(
+                message=f"Failed to fetch content of {notification}: {str(e)}",
+                level="warning",
+            )
+
+        if push_error is not None:
+            raise push_error
+
+        return result
+
+    async def _process_messages(self, messages: list[tuple[str, int]]) -> tuple[list[str], int]:
+        """
+        Fetch and parse the S3 objects notified in the SQS messages.
 
-        while continue_receiving:
+        Args:
             messages: list[tuple[str, int]]
-            async with self.sqs_wrapper.receive_messages(
-                max_messages=self.sqs_max_messages, visibility_timeout=self.sqs_visibility_timeout
-            ) as messages:
-                message_records = []
-
-                if not messages:
-                    continue_receiving = False
-
-                for message_data in messages:
-                    message, message_timestamp = message_data
-
-                    timestamps_to_log.append(message_timestamp)
-                    try:
-                        # Records is a list of strings
-                        message_records.extend(self._get_notifs_from_sqs_message(message))
-                    except ValueError as e:
-                        self.log_exception(e, message=f"Invalid JSON in message.\nInvalid message is: {message}")
-
-                if not message_records:
-                    continue_receiving = False
-
-                INCOMING_EVENTS.labels(intake_key=self.configuration.intake_key).inc(len(message_records))
-                for record in message_records:
-                    try:
-                        s3_bucket, s3_key = self._get_object_from_notification(record)
-
-                        if s3_bucket is None:
-                            raise ValueError("Bucket is undefined", record)
-
-                        if s3_key is None:
-                            raise ValueError("Key is undefined", record)
-
-                        normalized_key = normalize_s3_key(s3_key)
-
-                        stream: AsyncReader
-                        async with (
-                            self.s3_fetch_concurrency_sem,
-                            self.s3_wrapper.read_key(bucket=s3_bucket, key=normalized_key) as stream,
-                        ):
-                            async for event in self._parse_content(stream):
-                                records.append(event)
-
-                                if len(records) >= self.limit_of_events_to_push:
-                                    continue_receiving = False
-                                    result += len(await self.push_data_to_intakes(events=records))
-                                    records = []
-
-                    except Exception as e:
-                        self.log(
-                            message=f"Failed to fetch content of {record}: {str(e)}",
-                            level="warning",
-                        )
-
-            if not records:
-                continue_receiving = False
-
-        if records:
-            result += len(await self.push_data_to_intakes(events=records))
-
-        return result, timestamps_to_log
+
+        Returns:
+            tuple[list[str], int]: the events to push and the number of events already pushed to the intakes
+        """
+        message_records = []
+        for message, _ in messages:
+            try:
+                # Records is a list of strings
+                message_records.extend(self._get_notifs_from_sqs_message(message))
+            except ValueError as e:
+                self.log_exception(e, message=f"Invalid JSON in message.\nInvalid message is: {message}")
+
+        INCOMING_EVENTS.labels(intake_key=self.configuration.intake_key).inc(len(message_records))
+
+        # Fetch and parse the S3 objects concurrently. The concurrency is bounded by the semaphore
+        records: list[str] = []
+        async with asyncio.TaskGroup() as task_group:
+            tasks = [task_group.create_task(self._process_notification(record, records)) for record in message_records]
+
+        return records, sum(task.result() for task in tasks)
@@ -1,3 +1,4 @@
+import os
 from functools import cached_property
 
 from aws_helpers.provider import AwsProvider
@@ -27,9 +28,10 @@ class AwsAccountProvider(AwsProvider):
             aws_access_key_id=self.module.configuration.aws_access_key,
             aws_secret_access_key=self.module.configuration.aws_secret_access_key,
             aws_region=self.module.configuration.aws_region_name,
+            stream_buffer_size=int(os.getenv("AWS_S3_STREAM_BUFFER_SIZE", 1024 * 1024)),
         )
 
-        return S3Wrapper(config)
+        return S3Wrapper(config, self.clients_cache)
 
     @cached_property
     def sqs_wrapper(self) -> SqsWrapper:
@@ -48,4 +50,4 @@ class AwsAccountProvider(AwsProvider):
             aws_region=self.module.configuration.aws_region_name,
         )
 
-        return SqsWrapper(config)
+        return SqsWrapper(config, self.clients_cache)
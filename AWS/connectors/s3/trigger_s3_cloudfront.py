@@ -9,7 +9,7 @@ from typing import Any
 import orjson
 import pandas as pd
 
-from aws_helpers.utils import AsyncReader, unescape_string
+from aws_helpers.utils import AsyncReader, iter_text_records
 from connectors.s3 import AbstractAwsS3QueuedConnector, AwsS3LogsBaseConfiguration, AwsS3QueuedConfiguration
 from connectors.s3.provider import AwsAccountProvider
 
@@ -25,6 +25,7 @@ class BaseAwsS3CloudFrontTrigger:
 
     configuration: AwsS3CloudFrontConfiguration
     name = "AWS S3 CloudFront Logs"
+    stream_content = True
 
     def data_to_kv(self, records: list[str]) -> Any:
         """
@@ -141,8 +142,8 @@ class BaseAwsS3CloudFrontTrigger:
         Returns:
              Generator:
         """
-        content = await stream.read()
-        records = [record for record in content.decode("utf-8").split(self.configuration.sep) if len(record) > 0]
+        # The records are aggregated, so they are all needed
+        records = [record async for record in iter_text_records(stream, self.configuration.sep)]
 
         # return [] if there's no records
         if not records:
@@ -1,15 +1,111 @@
 """Contains AwsS3FlowLogsTrigger."""
 
 import ipaddress
-from collections.abc import AsyncGenerator
-from itertools import islice
+from bisect import bisect_right
+from collections.abc import AsyncGenerator, AsyncIterable, Sequence
 
-from aws_helpers.utils import AsyncReader, unescape_string
+from aws_helpers.utils import AsyncReader, iter_text_records, skip_comments, skip_records
 from connectors.metrics import DISCARDED_EVENTS
 from connectors.s3 import AbstractAwsS3QueuedConnector, AwsS3LogsBaseConfiguration, AwsS3QueuedConfiguration
 from connectors.s3.provider import AwsAccountProvider
 
 
+def get_private_ipv4_networks() -> tuple[ipaddress.IPv4Network, ...]:
+    """
+    Get the private IPv4 networks, as defined by `ipaddress.IPv4Address.is_private` in the running Python.
+
+    The networks change across Python versions, so they are read from the `ipaddress` module,
+    without the exceptions of the private networks (e.g. 192.0.0.9/32 since Python 3.13).
+
+    Returns:
+        tuple[ipaddress.IPv4Network, ...]: empty if the `ipaddress` module doesn't expose them
+    """
+    constants = getattr(ipaddress, "_IPv4Constants", None)
+    networks: list[ipaddress.IPv4Network] = list(getattr(constants, "_private_networks", ()))
+    for exception in getattr(constants, "_private_networks_exceptions", ()):
+        networks = [
+            subnet
+            for network in networks
+            for subnet in (network.address_exclude(exception) if exception.subnet_of(network) else [network])
+        ]
+
+    return tuple(networks)
+
+
+PRIVATE_IPV4_NETWORKS = get_private_ipv4_networks()
+
+
+class PrivateAddressMatcher:
+    """
+    Classify IP addresses as private with integer range checks.
+
+    IPv4 addresses are converted to integers and looked up in the sorted ranges of private networks.
+    Other addresses, and all of them if no private network is known, fall back on the `ipaddress` module.
+    """
+
+    def __init__(self, networks: Sequence[ipaddress.IPv4Network | str] = PRIVATE_IPV4_NETWORKS) -> None:
+        """
+        Initialize PrivateAddressMatcher.
+
+        Args:
+            networks: Sequence[ipaddress.IPv4Network | str]: the private IPv4 networks
+        """
+        ranges = sorted(
+            (int(network.network_address), int(network.broadcast_address))
+            for network in map(ipaddress.IPv4Network, networks)
+        )
+        self._starts = [start for start, _ in ranges]
+        self._ends = [end for _, end in ranges]
+
+    def is_private_ipv4(self, address: int) -> bool:
+        """
+        Check if the IPv4 address, as integer, is private
+
+        Args:
+            address: int
+
+        Returns:
+            bool:
+        """
+        index = bisect_right(self._starts, address) - 1
+
+        return index >= 0 and address <= self._ends[index]
+
+    def is_private_or_not_ip(self, value: str) -> bool:
+        """
+        Check if the value is a private IP address or is not an IP address
+
+        Args:
+            value: str
+
+        Returns:
+            bool:
+        """
+        parts = value.split(".")
+        if len(parts) == 4 and self._starts:
+            address = 0
+            for part in parts:
+                # Like `ipaddress`, reject the octets with leading zeros
+                if not (part.isascii() and part.isdigit()) or len(part) > 3 or (len(part) > 1 and part[0] == "0"):
+                    return True
+
+                octet = int(part)
+                if octet > 255:
+                    return True
+
+                address = (address << 8) | octet
+
+            return self.is_private_ipv4(address)
+
+        if ":" not in value and len(parts) != 4:
+            return True
+
+        try:
+            return ipaddress.ip_address(value).is_private
+        except ValueError:  # if value is not IP then just omit it
+            return True
+
+
 class AwsS3FlowLogsConfiguration(AwsS3QueuedConfiguration, AwsS3LogsBaseConfiguration):
     """AwsS3FlowLogsTrigger configuration."""
 
@@ -21,6 +117,11 @@ class BaseAwsS3FlowLogsTrigger:
 
     configuration: AwsS3FlowLogsConfiguration
     name = "AWS S3 Flow Logs"
+    stream_content = True
+
+    # Fields of the flow logs that contain IP addresses
+    address_fields = ("srcaddr", "dstaddr", "pkt-srcaddr", "pkt-dstaddr")
+    private_address_matcher = PrivateAddressMatcher()
 
     @staticmethod
     def check_all_ips_are_private(input_str: str) -> bool:
@@ -42,6 +143,81 @@ class BaseAwsS3FlowLogsTrigger:
 
         return all([ip.is_private for ip in ips])
 
+    @classmethod
+    def get_address_positions(cls, header: str) -> list[int] | None:
+        """
+        Get the positions of the address fields from the header of a flow logs file
+
+        Args:
+            header: str: the first line of the file, e.g. "version account-id interface-id srcaddr dstaddr ..."
+
+        Returns:
+            list[int] | None: None if the line is not a header
+        """
+        fields = header.split(" ")
+        positions = [position for position, field in enumerate(fields) if field in cls.address_fields]
+
+        return positions or None
+
+    def is_private_record(self, record: str, positions: list[int] | None, fields_count: int) -> bool:
+        """
+        Check if all IPs in the record are private
+
+        Only the address fields are checked when their positions are known.
+
+        Args:
+            record: str
+            positions: list[int] | None: the positions of the address fields
+            fields_count: int: the number of fields described by the header
+
+        Returns:
+            bool:
+        """
+        if positions is not None:
+            fields = record.split(" ")
+            if len(fields) == fields_count:
+                return all(
+                    self.private_address_matcher.is_private_or_not_ip(fields[position]) for position in positions
+                )
+
+        return self.check_all_ips_are_private(record)
+
+    async def discard_private_records(self, records: AsyncIterable[str]) -> AsyncGenerator[str, None]:
+        """
+        Discard the records whose IPs are all private
+
+        The positions of the address fields are read from the header, if the first record is a header.
+        The commented records must be skipped beforehand, so that a comment is not taken as the header.
+
+        Args:
+            records: AsyncIterable[str]
+
+        Yields:
+            str:
+        """
+        positions: list[int] | None = None
+        fields_count = 0
+        is_first_record = True
+        discarded_count = 0
+        try:
+            async for record in records:
+                if is_first_record:
+                    is_first_record = False
+                    positions = self.get_address_positions(record)
+                    if positions is not None:
+                        # The header contains no IP: it is discarded
+                        fields_count = len(record.split(" "))
+                        discarded_count += 1
+                        continue
+
+                if not self.is_private_record(record, positions, fields_count):
+                    yield record
+                else:
+                    discarded_count += 1
+        finally:
+            if discarded_count > 0:
+                DISCARDED_EVENTS.labels(intake_key=self.configuration.intake_key).inc(discarded_count)
+
     async def _parse_content(self, stream: AsyncReader) -> AsyncGenerator[str, None]:
         """
         Parse content from S3 bucket.
@@ -52,20 +228,12 @@ class BaseAwsS3FlowLogsTrigger:
         Returns:
              Generator:
         """
-        content = await stream.read()
-
-        records: list[str] = []
-        for record in content.decode("utf-8").split(self.configuration.sep):
-            if len(record) > 0:
-                if not self.check_all_ips_are_private(record):
-                    records.append(record)
-                else:
-                    DISCARDED_EVENTS.labels(intake_key=self.configuration.intake_key).inc()
+        records = iter_text_records(stream, self.configuration.sep)
 
-        if self.configuration.ignore_comments:  # pragma: no cover
-            records = [record for record in records if not record.strip().startswith("#")]
+        if self.configuration.ignore_comments:
+            records = skip_comments(records)
 
-        for record in list(islice(records, self.configuration.skip_first, None)):
+        async for record in skip_records(self.discard_private_records(records), self.configuration.skip_first):
             yield record
 
 
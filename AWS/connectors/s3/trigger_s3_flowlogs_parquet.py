@@ -1,14 +1,13 @@
 """Contains AwsS3ParquetRecordsTrigger."""
 
-import io
 import ipaddress
 from collections.abc import AsyncGenerator, Sequence
 from typing import Any
 
-import orjson
-import pandas
+import pyarrow
+import pyarrow.compute
 
-from aws_helpers.utils import AsyncReader
+from aws_helpers.utils import AsyncReader, iter_parquet_batches, record_batch_to_json
 from connectors.metrics import DISCARDED_EVENTS
 from connectors.s3 import AbstractAwsS3QueuedConnector, AwsS3QueuedConfiguration
 from connectors.s3.provider import AwsAccountProvider
@@ -40,6 +39,48 @@ class BaseAwsS3FlowLogsParquetRecordsTrigger:
 
         return all([ip.is_private for ip in ips])
 
+    @staticmethod
+    def is_public_ip(value: Any) -> bool:
+        """
+        Check if the value is a public IP address
+
+        Args:
+            value: Any
+
+        Returns:
+            bool:
+        """
+        try:
+            return not ipaddress.ip_address(value).is_private
+        except (TypeError, ValueError):  # if value is not IP then just omit it
+            return False
+
+    def filter_private_records(self, batch: pyarrow.RecordBatch, names: Sequence[str]) -> pyarrow.RecordBatch:
+        """
+        Remove the records of a batch whose IPs are all private
+
+        The addresses are classified once per distinct value, then the filter is applied on the whole columns.
+
+        Args:
+            batch: pyarrow.RecordBatch
+            names: Sequence[str]
+
+        Returns:
+            pyarrow.RecordBatch:
+        """
+        mask = pyarrow.array([False] * batch.num_rows, type=pyarrow.bool_())
+        for name in names:
+            if name not in batch.schema.names:
+                continue
+
+            column = batch.column(name)
+            public_ips = [value for value in pyarrow.compute.unique(column).to_pylist() if self.is_public_ip(value)]
+            if public_ips:
+                is_public = pyarrow.compute.is_in(column, value_set=pyarrow.array(public_ips, type=column.type))
+                mask = pyarrow.compute.or_(mask, pyarrow.compute.fill_null(is_public, False))
+
+        return batch.filter(mask)
+
     async def _parse_content(self, stream: AsyncReader) -> AsyncGenerator[str, None]:
         """
         Parse content from S3 bucket.
@@ -54,15 +95,14 @@ class BaseAwsS3FlowLogsParquetRecordsTrigger:
         if len(content) == 0:
             return
 
-        reader = io.BytesIO(content)
-        df = pandas.read_parquet(reader)
+        for batch in iter_parquet_batches(content):
+            records = self.filter_private_records(batch, ("srcaddr", "dstaddr"))
+
+            if discarded_count := batch.num_rows - records.num_rows:
+                DISCARDED_EVENTS.labels(intake_key=self.configuration.intake_key).inc(discarded_count)
 
-        for record in df.to_dict(orient="records"):
-            if len(record) > 0:
-                if not self.check_all_ips_are_private(record, ("srcaddr", "dstaddr")):
-                    yield orjson.dumps(record).decode("utf-8")
-                else:
-                    DISCARDED_EVENTS.labels(intake_key=self.configuration.intake_key).inc()
+            for record in record_batch_to_json(records):
+                yield record
 
 
 class AwsS3FlowLogsParquetRecordsTrigger(
@@ -1,9 +1,8 @@
 """Contains AwsS3LogsTrigger."""
 
 from collections.abc import AsyncGenerator
-from itertools import islice
 
-from aws_helpers.utils import AsyncReader, unescape_string
+from aws_helpers.utils import AsyncReader, iter_text_records, skip_comments, skip_records
 from connectors.s3 import AbstractAwsS3QueuedConnector, AwsS3LogsBaseConfiguration, AwsS3QueuedConfiguration
 from connectors.s3.provider import AwsAccountProvider
 
@@ -19,6 +18,7 @@ class BaseAwsS3LogsTrigger:
 
     configuration: AwsS3LogsConfiguration
     name = "AWS S3 Logs"
+    stream_content = True
 
     async def _parse_content(self, stream: AsyncReader) -> AsyncGenerator[str, None]:
         """
@@ -30,14 +30,12 @@ class BaseAwsS3LogsTrigger:
         Returns:
              Generator:
         """
-        content = await stream.read()
-
-        records = [record for record in content.decode("utf-8").split(self.configuration.sep) if len(record) > 0]
+        records = iter_text_records(stream, self.configuration.sep)
 
         if self.configuration.ignore_comments:
-            records = [record for record in records if not record.strip().startswith("#")]
+            records = skip_comments(records)
 
-        for record in list(islice(records, self.configuration.skip_first, None)):
+        async for record in skip_records(records, self.configuration.skip_first):
             yield record
 
 
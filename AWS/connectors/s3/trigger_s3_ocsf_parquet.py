@@ -1,13 +1,11 @@
 """Contains AwsS3ParquetRecordsTrigger."""
 
-import io
 from collections.abc import AsyncGenerator
 from typing import Any
 
 import orjson
-import pandas
 
-from aws_helpers.utils import AsyncReader
+from aws_helpers.utils import AsyncReader, iter_parquet_batches, record_batch_to_json
 from connectors.s3 import AbstractAwsS3QueuedConnector
 from connectors.s3.provider import AwsAccountProvider
 
@@ -46,13 +44,10 @@ class BaseAwsS3OcsfTrigger:
         if len(content) == 0:
             return
 
-        reader = io.BytesIO(content)
-        df = pandas.read_parquet(reader)
-        records = orjson.loads(df.to_json(orient="records"))
-
-        for record in records:
-            if len(record) > 0:
-                yield orjson.dumps(record).decode("utf-8")
+        for batch in iter_parquet_batches(content):
+            # Keep the timestamps as milliseconds since epoch, as they were serialized until now
+            for record in record_batch_to_json(batch, epoch_timestamps=True):
+                yield record
 
 
 class AwsS3OcsfTrigger(BaseAwsS3OcsfTrigger, AbstractAwsS3QueuedConnector, AwsAccountProvider):
@@ -1,6 +1,8 @@
 """Contains AwsS3RecordsTrigger."""
 
+import re
 from collections.abc import AsyncGenerator
+from functools import cache
 from typing import Any
 
 import orjson
@@ -52,6 +54,30 @@ class BaseAwsS3RecordsTrigger:
         "default": {"unsupported": ["List", "Describe", "GetRecords"]},
     }
 
+    @classmethod
+    @cache
+    def _compiled_events_prefixes(cls) -> dict[str, tuple[re.Pattern[str] | None, re.Pattern[str] | None, bool]]:
+        """
+        Compile the prefixes of the events, once per class.
+
+        Returns:
+            dict[str, tuple[re.Pattern[str] | None, re.Pattern[str] | None, bool]]:
+                for each event source, the patterns of the unsupported and the supported prefixes,
+                and the validity of the events that match none of them
+        """
+
+        def compile_prefixes(prefixes: list[str]) -> re.Pattern[str] | None:
+            return re.compile("|".join(map(re.escape, prefixes))) if prefixes else None
+
+        return {
+            event_source: (
+                compile_prefixes(prefixes.get("unsupported", [])),
+                compile_prefixes(prefixes.get("supported", [])),
+                len(prefixes.get("supported", [])) == 0 and len(prefixes.get("unsupported", [])) != 0,
+            )
+            for event_source, prefixes in cls._events_prefixes.items()
+        }
+
     @classmethod
     def is_valid_payload(cls, payload: dict[str, Any]) -> bool:
         """
@@ -63,23 +89,19 @@ class BaseAwsS3RecordsTrigger:
         Returns:
             bool:
         """
+        events_prefixes = cls._compiled_events_prefixes()
+
         event_source = payload.get("eventSource", "")
         event_name = payload.get("eventName", "")
-        if event_source not in cls._events_prefixes.keys():
-            event_source = "default"
-
-        supported = cls._events_prefixes[event_source].get("supported", [])
-        unsupported = cls._events_prefixes[event_source].get("unsupported", [])
+        unsupported, supported, is_valid_by_default = events_prefixes.get(event_source) or events_prefixes["default"]
 
-        for prefix in unsupported:
-            if event_name.startswith(prefix):
-                return False
+        if unsupported is not None and unsupported.match(event_name):
+            return False
 
-        for prefix in supported:
-            if event_name.startswith(prefix):
-                return True
+        if supported is not None and supported.match(event_name):
+            return True
 
-        return len(supported) == 0 and len(unsupported) != 0
+        return is_valid_by_default
 
     async def _parse_content(self, stream: AsyncReader) -> AsyncGenerator[str, None]:
         """
@@ -1,13 +1,12 @@
 """Contains AwsSqsMessagesTrigger."""
 
-import os
 from functools import cached_property
-from typing import Any, Optional
+from typing import Any
 
 import orjson
 
 from aws_helpers.sqs_wrapper import SqsConfiguration, SqsWrapper
-from connectors import AbstractAwsConnector, AbstractAwsConnectorConfiguration
+from connectors import AbstractAwsConnectorConfiguration, AbstractAwsSqsConnector
 
 
 class AwsSqsMessagesTriggerConfiguration(AbstractAwsConnectorConfiguration):
@@ -19,20 +18,12 @@ class AwsSqsMessagesTriggerConfiguration(AbstractAwsConnectorConfiguration):
     queue_name: str
 
 
-class AwsSqsMessagesTrigger(AbstractAwsConnector):
+class AwsSqsMessagesTrigger(AbstractAwsSqsConnector):
     """Implementation of AWS SQS Messages trigger."""
 
     name = "AWS SQS Messages"
     configuration: AwsSqsMessagesTriggerConfiguration
 
-    def __init__(self, *args: Any, **kwargs: Optional[Any]) -> None:
-        """Init AbstractAwsS3QueuedConnector."""
-
-        super().__init__(*args, **kwargs)
-        self.limit_of_events_to_push = int(os.getenv("AWS_BATCH_SIZE", 10000))
-        self.sqs_max_messages = int(os.getenv("AWS_SQS_MAX_MESSAGES", 10))
-        self.sqs_visibility_timeout = int(os.getenv("AWS_SQS_VISIBILITY_TIMEOUT", 60))
-
     @cached_property
     def sqs_wrapper(self) -> SqsWrapper:
         """
@@ -50,7 +41,7 @@ class AwsSqsMessagesTrigger(AbstractAwsConnector):
             aws_region=self.module.configuration.aws_region_name,
         )
 
-        return SqsWrapper(config)
+        return SqsWrapper(config, self.clients_cache)
 
     def is_aws_notification(self, message: Any) -> bool:
         """
@@ -63,48 +54,27 @@ class AwsSqsMessagesTrigger(AbstractAwsConnector):
         """
         return isinstance(message, dict) and "Records" in message and isinstance(message["Records"], list)
 
-    async def next_batch(self) -> tuple[int, list[int]]:
+    async def _process_messages(self, messages: list[tuple[str, int]]) -> tuple[list[str], int]:
         """
-        Get next batch of messages.
+        Extract the records from the SQS messages.
 
-        Contains main logic of the connector.
+        Args:
+            messages: list[tuple[str, int]]
 
         Returns:
-            tuple[list[str], list[int]]:
+            tuple[list[str], int]: the records to push and the number of records already pushed to the intakes
         """
         records = []
-        timestamps_to_log: list[int] = []
-
-        continue_receiving = True
-        while continue_receiving:
-            async with self.sqs_wrapper.receive_messages(
-                max_messages=self.sqs_max_messages, visibility_timeout=self.sqs_visibility_timeout
-            ) as messages:
-                if not messages:
-                    continue_receiving = False
-
-                for data in messages:
-                    message, message_timestamp = data
-
-                    timestamps_to_log.append(message_timestamp)
-                    try:
-                        content = orjson.loads(message)
-                        if self.is_aws_notification(content):
-                            # The message is an AWS notification, we extract the Records field
-                            records.extend(content.get("Records", []))
-                        else:
-                            # The message is a raw message, we add it as is
-                            records.append(content)
-                    except ValueError as e:
-                        self.log_exception(e, message=f"Invalid JSON in message.\nInvalid message is: {message}")
-
-            if len(records) >= self.limit_of_events_to_push or not records:
-                continue_receiving = False
-
-        self.log(message=f"Forwarding {len(records)} messages", level="info")
-
-        result: list[str] = await self.push_data_to_intakes(
-            events=[orjson.dumps(record).decode("utf-8") for record in records],
-        )
-
-        return len(result), timestamps_to_log
+        for message, _ in messages:
+            try:
+                content = orjson.loads(message)
+                if self.is_aws_notification(content):
+                    # The message is an AWS notification, we extract the Records field
+                    records.extend(content.get("Records", []))
+                else:
+                    # The message is a raw message, we add it as is
+                    records.append(content)
+            except ValueError as e:
+                self.log_exception(e, message=f"Invalid JSON in message.\nInvalid message is: {message}")
+
+        return [orjson.dumps(record).decode("utf-8") for record in records], 0
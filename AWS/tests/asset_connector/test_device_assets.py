@@ -1094,3 +1094,104 @@ def test_update_checkpoint_integration(test_aws_device_asset_connector):
 
     # Verify logging was called
     test_aws_device_asset_connector.log.assert_called_with(f"Checkpoint updated with date: {test_date}", level="info")
+
+
+def describe_instances_page(instance_id: str, region: str) -> dict:
+    return {
+        "Reservations": [
+            {
+                "OwnerId": "123456789012",
+                "Instances": [
+                    {
+                        "InstanceId": instance_id,
+                        "InstanceType": "t2.micro",
+                        "LaunchTime": isoparse("2023-10-01T12:00:00Z"),
+                        "Placement": {"AvailabilityZone": f"{region}a"},
+                    }
+                ],
+            }
+        ]
+    }
+
+
+def multi_region_clients(regions: list[str], failing_regions: set[str]) -> tuple[dict, mock.MagicMock]:
+    """Mock the EC2 clients of the regions, the failing ones raising on DescribeInstances."""
+    clients = {}
+
+    def client_side_effect(region_name=None):
+        if region_name not in clients:
+            region_client = mock.MagicMock()
+            if region_name is None:
+                region_client.describe_regions.return_value = {"Regions": [{"RegionName": name} for name in regions]}
+            elif region_name in failing_regions:
+                region_client.get_paginator.return_value.paginate.side_effect = ClientError(
+                    {"Error": {"Code": "UnauthorizedOperation", "Message": "Access denied"}}, "DescribeInstances"
+                )
+            else:
+                region_client.get_paginator.return_value.paginate.return_value = [
+                    describe_instances_page(f"i-{region_name}", region_name)
+                ]
+            clients[region_name] = region_client
+
+        return clients[region_name]
+
+    return clients, mock.MagicMock(side_effect=client_side_effect)
+
+
+def test_get_aws_devices_multi_region(test_aws_device_asset_connector):
+    """Test the devices of all the enabled regions are collected, skipping the failing regions."""
+    regions = ["eu-west-1", "eu-west-3", "us-east-1", "ap-south-1"]
+    clients, client = multi_region_clients(regions, {"ap-south-1"})
+
+    test_aws_device_asset_connector.client = client
+    test_aws_device_asset_connector.multi_region = True
+    test_aws_device_asset_connector.max_region_workers = 2
+
+    devices = [device for page in test_aws_device_asset_connector.get_aws_devices() for device in page]
+
+    assert sorted(device.device.uid for device in devices) == ["i-eu-west-1", "i-eu-west-3", "i-us-east-1"]
+    assert {device.device.region for device in devices} == {"eu-west-1a", "eu-west-3a", "us-east-1a"}
+    clients[None].describe_regions.assert_called_once_with(AllRegions=False)
+    test_aws_device_asset_connector.log.assert_any_call("Successfully collected 3 AWS devices", level="info")
+
+
+def test_get_assets_multi_region_failure_keeps_checkpoint(test_aws_device_asset_connector):
+    """Test the checkpoint is not advanced when a region fails, so its instances are collected later."""
+    regions = ["eu-west-1", "ap-south-1"]
+    checkpoint = "2023-01-01T00:00:00+00:00"
+    with test_aws_device_asset_connector.context as cache:
+        cache["most_recent_date_seen"] = checkpoint
+
+    test_aws_device_asset_connector.multi_region = True
+    _, test_aws_device_asset_connector.client = multi_region_clients(regions, {"ap-south-1"})
+
+    assets = list(test_aws_device_asset_connector.get_assets())
+    test_aws_device_asset_connector.update_checkpoint()
+
+    assert [asset.device.uid for asset in assets] == ["i-eu-west-1"]
+    assert test_aws_device_asset_connector.new_most_recent_date is None
+    assert test_aws_device_asset_connector.most_recent_date_seen == checkpoint
+
+    # Once all the regions succeed, the checkpoint is advanced
+    _, test_aws_device_asset_connector.client = multi_region_clients(regions, set())
+
+    assets = list(test_aws_device_asset_connector.get_assets())
+    test_aws_device_asset_connector.update_checkpoint()
+
+    assert sorted(asset.device.uid for asset in assets) == ["i-ap-south-1", "i-eu-west-1"]
+    assert test_aws_device_asset_connector.most_recent_date_seen > checkpoint
+
+
+def test_client_cached_per_region(test_aws_device_asset_connector):
+    """Test one client is created per region."""
+    with mock.patch("boto3.Session") as mock_session:
+        mock_session.return_value.client.side_effect = lambda *args, **kwargs: mock.MagicMock()
+
+        default_client = test_aws_device_asset_connector.client()
+        region_client = test_aws_device_asset_connector.client("us-east-1")
+
+        assert test_aws_device_asset_connector.client() is default_client
+        assert test_aws_device_asset_connector.client("us-east-1") is region_client
+        assert region_client is not default_client
+        mock_session.return_value.client.assert_called_with("ec2", region_name="us-east-1")
+        assert mock_session.return_value.client.call_count == 2
@@ -3,7 +3,7 @@ from unittest import mock
 import pytest
 from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
 from dateutil.parser import isoparse
-from sekoia_automation.asset_connector.models.ocsf.user import UserOCSFModel
+from sekoia_automation.asset_connector.models.ocsf.user import UserOCSFModel, UserTypeId
 
 from asset_connector.users_assets import AwsUser, AwsUsersAssetConnector
 from connectors import AwsModule, AwsModuleConfiguration
@@ -1059,3 +1059,106 @@ def test_get_assets_with_exception(test_aws_users_asset_connector):
         # Verify that the method handled the error gracefully and continued processing
         test_aws_users_asset_connector.get_groups_for_user.assert_called_once_with("testuser")
         test_aws_users_asset_connector.get_mfa_status_for_user.assert_called_once_with("testuser")
+
+
+def get_authorization_details_paginator(operation_name):
+    mock_paginator = mock.MagicMock()
+    if operation_name == "get_account_authorization_details":
+        mock_paginator.paginate.return_value = [
+            {
+                "UserDetailList": [
+                    {
+                        "UserName": "adminuser",
+                        "UserId": "AID1111111111EXAMPLE",
+                        "Arn": "arn:aws:iam::123456789012:user/adminuser",
+                        "CreateDate": isoparse("2023-10-01T12:00:00Z"),
+                        "GroupList": ["admins", "readers"],
+                    },
+                    {
+                        "UserName": "testuser",
+                        "UserId": "AID2222222222EXAMPLE",
+                        "Arn": "arn:aws:iam::123456789012:user/testuser",
+                        "CreateDate": isoparse("2023-10-01T12:00:00Z"),
+                        "GroupList": ["readers"],
+                    },
+                ],
+                "GroupDetailList": [
+                    {
+                        "GroupName": "readers",
+                        "Arn": "arn:aws:iam::123456789012:group/readers",
+                        "AttachedManagedPolicies": [
+                            {"PolicyName": "ReadOnlyAccess", "PolicyArn": "arn:aws:iam::aws:policy/ReadOnlyAccess"}
+                        ],
+                    }
+                ],
+            },
+            {
+                "UserDetailList": [],
+                "GroupDetailList": [
+                    {
+                        "GroupName": "admins",
+                        "Arn": "arn:aws:iam::123456789012:group/admins",
+                        "AttachedManagedPolicies": [
+                            {
+                                "PolicyName": "AdministratorAccess",
+                                "PolicyArn": "arn:aws:iam::aws:policy/AdministratorAccess",
+                            }
+                        ],
+                    }
+                ],
+            },
+        ]
+    return mock_paginator
+
+
+def test_get_assets_bulk_inventory(test_aws_users_asset_connector):
+    """Test the bulk inventory fetches the users, groups and MFA status without per-user calls."""
+    mock_client = mock.MagicMock()
+    mock_client.get_paginator.side_effect = get_authorization_details_paginator
+    mock_client.generate_credential_report.return_value = {"State": "COMPLETE"}
+    mock_client.get_credential_report.return_value = {
+        "Content": b"user,arn,mfa_active\n"
+        b"adminuser,arn:aws:iam::123456789012:user/adminuser,true\n"
+        b"testuser,arn:aws:iam::123456789012:user/testuser,false\n"
+    }
+    test_aws_users_asset_connector.client = mock.MagicMock(return_value=mock_client)
+    test_aws_users_asset_connector.bulk_inventory = True
+
+    assets = {asset.user.name: asset.user for asset in test_aws_users_asset_connector.get_assets()}
+
+    assert [group.name for group in assets["adminuser"].groups] == ["admins", "readers"]
+    assert assets["adminuser"].has_mfa is True
+    assert assets["adminuser"].type_id == UserTypeId.ADMIN
+    assert [group.privileges for group in assets["testuser"].groups] == [["ReadOnlyAccess"]]
+    assert assets["testuser"].has_mfa is False
+    assert assets["testuser"].type_id == UserTypeId.USER
+
+    assert [call.args[0] for call in mock_client.get_paginator.call_args_list] == ["get_account_authorization_details"]
+    mock_client.list_mfa_devices.assert_not_called()
+
+
+def test_get_assets_bulk_inventory_without_credential_report(test_aws_users_asset_connector):
+    """Test the bulk inventory checks MFA user by user while the credential report is generated."""
+    mock_client = mock.MagicMock()
+    mock_client.get_paginator.side_effect = get_authorization_details_paginator
+    mock_client.generate_credential_report.return_value = {"State": "STARTED"}
+    mock_client.list_mfa_devices.return_value = {"MFADevices": []}
+    test_aws_users_asset_connector.client = mock.MagicMock(return_value=mock_client)
+    test_aws_users_asset_connector.bulk_inventory = True
+
+    assets = list(test_aws_users_asset_connector.get_assets())
+
+    assert [asset.user.has_mfa for asset in assets] == [False, False]
+    assert mock_client.list_mfa_devices.call_count == 2
+    mock_client.get_credential_report.assert_not_called()
+
+
+def test_group_privileges_memo(test_aws_users_asset_connector):
+    """Test the policies of a group are fetched once."""
+    mock_client = mock.MagicMock()
+    mock_client.get_paginator.side_effect = get_paginator_side_effect
+    test_aws_users_asset_connector.client = mock.MagicMock(return_value=mock_client)
+
+    assert test_aws_users_asset_connector.group_privileges("testgroup") == ["ReadOnlyAccess"]
+    assert test_aws_users_asset_connector.group_privileges("testgroup") == ["ReadOnlyAccess"]
+    mock_client.get_paginator.assert_called_once_with("list_attached_group_policies")
@@ -0,0 +1,97 @@
+"""Test the cache of AWS clients."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from faker import Faker
+
+from aws_helpers.client_cache import AwsClientsCache
+from aws_helpers.sqs_wrapper import SqsConfiguration, SqsWrapper
+
+
+def mock_session() -> MagicMock:
+    """
+    Create a session that creates a new mocked client on each call.
+
+    Returns:
+        MagicMock:
+    """
+    session = MagicMock()
+    session.contexts = []
+
+    def create_client(*args, **kwargs) -> MagicMock:
+        context = MagicMock()
+        context.__aenter__ = AsyncMock(return_value=MagicMock())
+        context.__aexit__ = AsyncMock(return_value=None)
+        session.contexts.append(context)
+
+        return context
+
+    session.create_client.side_effect = create_client
+
+    return session
+
+
+@pytest.mark.asyncio
+async def test_clients_cache_reuses_clients():
+    """Test the cache creates one client per service, region and credentials."""
+    session = mock_session()
+    cache = AwsClientsCache(max_pool_connections=20)
+
+    s3_client = await cache.get_client(session, "s3", "eu-west-1", "credentials")
+    assert await cache.get_client(session, "s3", "eu-west-1", "credentials") is s3_client
+
+    assert await cache.get_client(session, "s3", "eu-west-3", "credentials") is not s3_client
+    assert await cache.get_client(session, "sqs", "eu-west-1", "credentials") is not s3_client
+    assert await cache.get_client(session, "s3", "eu-west-1", "other credentials") is not s3_client
+
+    assert session.create_client.call_count == 4
+    assert session.create_client.call_args.kwargs["config"].max_pool_connections == 20
+
+
+@pytest.mark.asyncio
+async def test_clients_cache_close():
+    """Test closing the cache closes its clients."""
+    session = mock_session()
+    cache = AwsClientsCache()
+
+    await cache.get_client(session, "s3", "eu-west-1", "credentials")
+    await cache.close()
+
+    session.contexts[0].__aexit__.assert_awaited_once()
+
+    # A new client is created after closing the cache
+    await cache.get_client(session, "s3", "eu-west-1", "credentials")
+    assert session.create_client.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_wrapper_with_clients_cache(session_faker: Faker):
+    """
+    Test the wrappers use the cached clients.
+
+    Args:
+        session_faker: Faker
+    """
+    configuration = SqsConfiguration(
+        aws_access_key_id=session_faker.word(),
+        aws_secret_access_key=session_faker.word(),
+        queue_name=session_faker.word(),
+        queue_url=session_faker.url(),
+        aws_region=session_faker.word(),
+    )
+    cache = AwsClientsCache()
+    cache.get_client = AsyncMock()
+    cache.get_client.return_value.delete_message_batch = AsyncMock(return_value={})
+
+    sqs_wrapper = SqsWrapper(configuration, cache)
+
+    with patch("aws_helpers.sqs_wrapper.SqsWrapper.get_client") as mock_client:
+        await sqs_wrapper.delete_messages(["receipt_handle_1"])
+        await sqs_wrapper.delete_messages(["receipt_handle_2"])
+
+        mock_client.assert_not_called()
+
+    assert cache.get_client.call_count == 2
+    assert cache.get_client.call_args.args[1:3] == ("sqs", configuration.aws_region)
+    assert cache.get_client.return_value.delete_message_batch.call_count == 2
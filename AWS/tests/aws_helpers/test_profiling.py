@@ -0,0 +1,43 @@
+"""Test the sampled profiling."""
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from aws_helpers.profiling import sampled_profile
+
+
+def test_sampled_profile_disabled(tmp_path: Path):
+    """
+    Test no profile is dumped by default.
+
+    Args:
+        tmp_path: Path
+    """
+    with patch.dict(os.environ, {"AWS_PROFILING_DIR": str(tmp_path)}):
+        with sampled_profile("connector"):
+            sum(range(1000))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_sampled_profile_dumps(tmp_path: Path):
+    """
+    Test the profiles are dumped, keeping only the most recent ones.
+
+    Args:
+        tmp_path: Path
+    """
+    for index in range(3):
+        (tmp_path / f"connector-old{index}.prof").write_bytes(b"")
+        os.utime(tmp_path / f"connector-old{index}.prof", (index, index))
+
+    environ = {"AWS_PROFILING_SAMPLE_RATE": "1", "AWS_PROFILING_DIR": str(tmp_path), "AWS_PROFILING_MAX_DUMPS": "2"}
+    with patch.dict(os.environ, environ):
+        with sampled_profile("connector"):
+            sum(range(1000))
+
+    dumps = sorted(path.name for path in tmp_path.iterdir())
+    assert len(dumps) == 2
+    assert "connector-old2.prof" in dumps
+    assert all(path.stat().st_size > 0 for path in tmp_path.iterdir() if "old" not in path.name)
@@ -7,6 +7,7 @@ import pytest
 from faker import Faker
 
 from aws_helpers.s3_wrapper import S3Configuration, S3Wrapper
+from aws_helpers.utils import ReadStats
 
 
 @pytest.mark.asyncio
@@ -131,3 +132,51 @@ async def test_read_compressed_content_key(session_faker: Faker, content_type: s
         # Assert that the S3 client methods were called with the correct arguments
         mock_client.assert_called_once_with("s3")
         mock_s3.get_object.assert_called_once_with(Bucket=bucket, Key=key)
+
+
+@pytest.mark.asyncio
+async def test_read_key_streaming(session_faker: Faker):
+    """
+    Test read_key method in streaming mode.
+
+    Args:
+        session_faker: Faker
+    """
+    key = session_faker.file_path(depth=2, extension="txt")
+    bucket = session_faker.word()
+    text = "\n".join(session_faker.sentences(nb=50))
+    compressed = gzip.compress(text.encode("utf-8"))
+
+    configuration = S3Configuration(
+        aws_access_key_id=session_faker.word(),
+        aws_secret_access_key=session_faker.word(),
+        aws_region=session_faker.word(),
+        bucket=bucket,
+        stream_buffer_size=64,
+    )
+
+    s3 = S3Wrapper(configuration)
+
+    with patch("aws_helpers.s3_wrapper.S3Wrapper.get_client") as mock_client:
+        mock_s3 = MagicMock()
+        mock_s3.get_object = AsyncMock()
+
+        mock_client.return_value.__aenter__.return_value = mock_s3
+
+        s3_response = {"Body": AsyncMock(), "ContentLength": len(compressed)}
+        s3_response["Body"].__aenter__.return_value = s3_response["Body"]
+        s3_response["Body"].read = AsyncMock(
+            side_effect=[compressed[i : i + 64] for i in range(0, len(compressed), 64)] + [b""]
+        )
+
+        mock_s3.get_object.return_value = s3_response
+
+        stats = ReadStats()
+        async with s3.read_key(key, streaming=True, stats=stats) as stream:
+            assert await stream.read() == text.encode("utf-8")
+
+        s3_response["Body"].read.assert_called_with(64)
+        assert stats.object_size == len(compressed)
+        assert stats.downloaded_bytes == len(compressed)
+        assert stats.inflated_bytes == len(text.encode("utf-8"))
+        mock_s3.get_object.assert_called_once_with(Bucket=bucket, Key=key)
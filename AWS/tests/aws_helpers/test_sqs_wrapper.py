@@ -155,8 +155,8 @@ async def test_receive_messages(sqs_wrapper, sqs_wrapper_configuration, session_
         mock_sqs.receive_message = AsyncMock()
         mock_sqs.receive_message.return_value = expected_response
 
-        mock_sqs.delete_message = AsyncMock()
-        mock_sqs.delete_message.return_value = {}
+        mock_sqs.delete_message_batch = AsyncMock()
+        mock_sqs.delete_message_batch.return_value = {"Successful": [{"Id": "0"}, {"Id": "1"}]}
 
         mock_sqs.get_queue_url = AsyncMock()
         mock_sqs.get_queue_url.return_value = {"QueueUrl": queue_url}
@@ -176,5 +176,70 @@ async def test_receive_messages(sqs_wrapper, sqs_wrapper_configuration, session_
             VisibilityTimeout=60,
         )
 
-        mock_sqs.delete_message.assert_any_call(QueueUrl=queue_url, ReceiptHandle=receipt_handle_1)
-        mock_sqs.delete_message.assert_any_call(QueueUrl=queue_url, ReceiptHandle=receipt_handle_2)
+        mock_sqs.delete_message_batch.assert_called_once_with(
+            QueueUrl=queue_url,
+            Entries=[{"Id": "0", "ReceiptHandle": receipt_handle_1}, {"Id": "1", "ReceiptHandle": receipt_handle_2}],
+        )
+
+
+@pytest.mark.asyncio
+async def test_receive_messages_processing_failure(sqs_wrapper, session_faker):
+    """
+    Test receive_messages method keeps the messages in the queue when the processing fails.
+
+    Args:
+        sqs_wrapper: SqsWrapper
+        session_faker: Faker
+    """
+    expected_response = {
+        "Messages": [
+            {
+                "Body": session_faker.sentence(),
+                "ReceiptHandle": session_faker.word(),
+                "Attributes": {"SentTimestamp": session_faker.pyint(min_value=1, max_value=1000)},
+            },
+        ]
+    }
+
+    with patch("aws_helpers.sqs_wrapper.SqsWrapper.get_client") as mock_client:
+        mock_sqs = MagicMock()
+        mock_sqs.receive_message = AsyncMock(return_value=expected_response)
+        mock_sqs.delete_message_batch = AsyncMock()
+        mock_sqs.get_queue_url = AsyncMock(return_value={"QueueUrl": session_faker.url()})
+
+        mock_client.return_value.__aenter__.return_value = mock_sqs
+
+        with pytest.raises(ValueError):
+            async with sqs_wrapper.receive_messages() as messages:
+                assert len(messages) == 1
+
+                raise ValueError("Failed to push events")
+
+        mock_sqs.delete_message_batch.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_delete_messages(sqs_wrapper, session_faker):
+    """
+    Test delete_messages method deletes messages by batches of 10.
+
+    Args:
+        sqs_wrapper: SqsWrapper
+        session_faker: Faker
+    """
+    queue_url = session_faker.url()
+    receipt_handles = [session_faker.uuid4() for _ in range(25)]
+
+    with patch("aws_helpers.sqs_wrapper.SqsWrapper.get_client") as mock_client:
+        mock_sqs = MagicMock()
+        mock_sqs.delete_message_batch = AsyncMock(
+            return_value={"Failed": [{"Id": "0", "SenderFault": False, "Code": "500", "Message": "Internal error"}]}
+        )
+        mock_sqs.get_queue_url = AsyncMock(return_value={"QueueUrl": queue_url})
+
+        mock_client.return_value.__aenter__.return_value = mock_sqs
+
+        await sqs_wrapper.delete_messages(receipt_handles)
+
+        assert mock_sqs.delete_message_batch.call_count == 3
+        assert [len(call.kwargs["Entries"]) for call in mock_sqs.delete_message_batch.call_args_list] == [10, 10, 5]
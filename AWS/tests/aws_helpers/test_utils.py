@@ -1,14 +1,33 @@
 """Test utils module."""
 
 import io
+from datetime import datetime, timezone
 from gzip import compress
 from unittest.mock import MagicMock
 
 import aiofiles
+import pyarrow
+import pyarrow.parquet
 import pytest
 from faker import Faker
 
-from aws_helpers.utils import async_gzip_open, get_content, is_gzip_compressed, normalize_s3_key, unescape_string
+from aws_helpers.utils import (
+    AsyncStreamReader,
+    ReadStats,
+    async_gzip_open,
+    get_content,
+    is_gzip_compressed,
+    iter_chunks,
+    iter_parquet_batches,
+    iter_records,
+    iter_text_records,
+    normalize_s3_key,
+    record_batch_to_json,
+    skip_comments,
+    skip_records,
+    unescape_string,
+)
+from tests.helpers import async_bytesIO, async_list
 
 
 def test_normalize_s3_key():
@@ -75,3 +94,170 @@ def test_unescape_separator():
     # Need to be backward compatible - we had literal values before
     test_2 = "\r\n\t,"
     assert unescape_string(test_2) == "\r\n\t,"
+
+
+@pytest.mark.asyncio
+async def test_async_stream_reader():
+    content = b"first line\nsecond line\nthird line"
+
+    reader = AsyncStreamReader(await async_bytesIO(content[4:]), buffer_size=4, initial_data=content[:4])
+    assert await reader.read(6) == content[:6]
+    assert await reader.read() == content[6:]
+    assert await reader.read() == b""
+
+
+@pytest.mark.asyncio
+async def test_async_stream_reader_gzip_multiple_members():
+    content = b"".join(f"line {i}\n".encode() for i in range(1000))
+    compressed = compress(content[:3000]) + compress(content[3000:]) + b"\x00" * 8
+
+    reader = AsyncStreamReader(
+        await async_bytesIO(compressed[10:]), buffer_size=16, compressed=True, initial_data=compressed[:10]
+    )
+    chunks = await async_list(reader)
+
+    assert b"".join(chunks) == content
+    assert max(len(chunk) for chunk in chunks) <= 16
+
+
+@pytest.mark.asyncio
+async def test_async_stream_reader_gzip_truncated():
+    content = b"".join(f"line {i}\n".encode() for i in range(1000))
+    compressed = compress(content[:3000]) + compress(content[3000:])
+
+    reader = AsyncStreamReader(await async_bytesIO(compressed[:-20]), buffer_size=16, compressed=True)
+    with pytest.raises(EOFError):
+        await reader.read()
+
+
+@pytest.mark.asyncio
+async def test_async_stream_reader_stats():
+    content = b"".join(f"line {i}\n".encode() for i in range(1000))
+    compressed = compress(content)
+
+    stats = ReadStats()
+    reader = AsyncStreamReader(await async_bytesIO(compressed), buffer_size=64, compressed=True, stats=stats)
+
+    assert await reader.read() == content
+    assert stats.downloaded_bytes == len(compressed)
+    assert stats.inflated_bytes == len(content)
+    assert stats.download_duration > 0
+    assert stats.inflate_duration > 0
+
+
+@pytest.mark.asyncio
+async def test_iter_records():
+    content = b"first<SEP>second<SEP><SEP>third<SEP>"
+
+    reader = AsyncStreamReader(await async_bytesIO(content), buffer_size=3)
+    assert await async_list(iter_records(reader, b"<SEP>")) == content.split(b"<SEP>")
+
+
+@pytest.mark.asyncio
+async def test_iter_records_long_record_in_small_chunks():
+    long_record = b"x" * 100_000 + b"<SE"
+    content = b"first<SEP>" + long_record + b"<SEP>last"
+
+    async def chunks(size: int):
+        for index in range(0, len(content), size):
+            yield content[index : index + size]
+
+    for size in (1, 2, 3, 7, 1024):
+        assert await async_list(iter_records(chunks(size), b"<SEP>")) == [b"first", long_record, b"last"]
+
+
+def test_iter_parquet_batches():
+    table = pyarrow.table({"id": list(range(25)), "name": [f"name {i}" for i in range(25)]})
+    content = io.BytesIO()
+    pyarrow.parquet.write_table(table, content)
+
+    batches = list(iter_parquet_batches(content.getvalue(), batch_size=10))
+
+    assert [batch.num_rows for batch in batches] == [10, 10, 5]
+    assert pyarrow.Table.from_batches(batches).equals(table)
+
+
+def test_record_batch_to_json():
+    batch = pyarrow.RecordBatch.from_pylist(
+        [
+            {
+                "time_dt": datetime(2024, 1, 1, 12, 0, 0, 123000, tzinfo=timezone.utc),
+                "endpoint": {"ip": "10.0.0.1", "port": 443.0, "seen": datetime(2024, 1, 1, tzinfo=timezone.utc)},
+                "tags": None,
+            }
+        ],
+        schema=pyarrow.schema(
+            [
+                ("time_dt", pyarrow.timestamp("us", tz="UTC")),
+                (
+                    "endpoint",
+                    pyarrow.struct(
+                        [("ip", pyarrow.string()), ("port", pyarrow.float64()), ("seen", pyarrow.timestamp("s"))]
+                    ),
+                ),
+                ("tags", pyarrow.list_(pyarrow.string())),
+            ]
+        ),
+    )
+
+    assert list(record_batch_to_json(batch, epoch_timestamps=True)) == [
+        '{"time_dt":1704110400123,"endpoint":{"ip":"10.0.0.1","port":443.0,"seen":1704067200000},"tags":null}'
+    ]
+    assert list(record_batch_to_json(batch)) == [
+        '{"time_dt":"2024-01-01T12:00:00.123000+00:00",'
+        '"endpoint":{"ip":"10.0.0.1","port":443.0,"seen":"2024-01-01T00:00:00"},"tags":null}'
+    ]
+
+
+def test_record_batch_to_json_nested_timestamps():
+    seen = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    batch = pyarrow.RecordBatch.from_pylist(
+        [
+            {
+                "observables": [{"name": "ip", "times": [seen]}],
+                "history": [seen, None],
+                "first_seen": [("ip", seen)],
+                "window": [seen, seen],
+            },
+            {"observables": None, "history": None, "first_seen": None, "window": None},
+        ],
+        schema=pyarrow.schema(
+            [
+                (
+                    "observables",
+                    pyarrow.list_(
+                        pyarrow.struct(
+                            [("name", pyarrow.string()), ("times", pyarrow.list_(pyarrow.timestamp("us", tz="UTC")))]
+                        )
+                    ),
+                ),
+                ("history", pyarrow.large_list(pyarrow.timestamp("ns", tz="UTC"))),
+                ("first_seen", pyarrow.map_(pyarrow.string(), pyarrow.timestamp("s", tz="UTC"))),
+                ("window", pyarrow.list_(pyarrow.timestamp("ms", tz="UTC"), 2)),
+            ]
+        ),
+    )
+
+    assert list(record_batch_to_json(batch, epoch_timestamps=True)) == [
+        '{"observables":[{"name":"ip","times":[1704067200000]}],"history":[1704067200000,null],'
+        '"first_seen":[["ip",1704067200000]],"window":[1704067200000,1704067200000]}',
+        '{"observables":null,"history":null,"first_seen":null,"window":null}',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_iter_text_records():
+    content = "# header\r\n\r\nfirst é\r\n# comment\r\nsecond\r\nthird\r\n".encode("utf-8")
+
+    records = iter_text_records(await async_bytesIO(content), "\r\n")
+    assert await async_list(skip_records(skip_comments(records), 1)) == ["second", "third"]
+
+    records = iter_text_records(await async_bytesIO(content), "\r\n")
+    assert await async_list(records) == ["# header", "first é", "# comment", "second", "third"]
+
+
+@pytest.mark.asyncio
+async def test_iter_chunks():
+    content = b"0123456789"
+
+    assert await async_list(iter_chunks(await async_bytesIO(content), chunk_size=4)) == [b"0123", b"4567", b"89"]
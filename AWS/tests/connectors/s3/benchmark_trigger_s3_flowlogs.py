@@ -0,0 +1,59 @@
+"""
+Micro-benchmark of the discarding of the private flow logs records.
+
+Compare the check of every token of the records with the check of the address fields located from the header.
+
+Usage:
+    python -m tests.connectors.s3.benchmark_trigger_s3_flowlogs [records_count]
+"""
+
+import random
+import sys
+import time
+
+from connectors.s3.trigger_s3_flowlogs import BaseAwsS3FlowLogsTrigger
+
+HEADER = "version account-id interface-id srcaddr dstaddr srcport dstport protocol packets bytes start end action log-status"
+
+
+def random_address(rng: random.Random) -> str:
+    if rng.random() < 0.7:
+        return f"172.31.{rng.randrange(256)}.{rng.randrange(256)}"
+
+    return ".".join(str(rng.randrange(1, 224)) for _ in range(4))
+
+
+def generate_records(count: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+
+    return [
+        f"2 111111111111 eni-0a479835a7588c9ca {random_address(rng)} {random_address(rng)} "
+        f"{rng.randrange(65536)} {rng.randrange(65536)} 6 1 40 1645469669 1645469724 ACCEPT OK"
+        for _ in range(count)
+    ]
+
+
+def main(count: int) -> None:
+    trigger = BaseAwsS3FlowLogsTrigger()
+    records = generate_records(count)
+    positions = trigger.get_address_positions(HEADER)
+    fields_count = len(HEADER.split(" "))
+
+    start = time.perf_counter()
+    expected = [trigger.check_all_ips_are_private(record) for record in records]
+    all_tokens_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [trigger.is_private_record(record, positions, fields_count) for record in records]
+    address_fields_duration = time.perf_counter() - start
+
+    assert results == expected, "the classifications differ"
+    print(f"{count} records")
+    print(f"every token:        {all_tokens_duration:.2f} s")
+    print(
+        f"address fields:     {address_fields_duration:.2f} s (x{all_tokens_duration / address_fields_duration:.1f})"
+    )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -1,5 +1,6 @@
 """Contains tests for AbstractAwsS3QueuedConnector."""
 
+import asyncio
 import os
 from collections.abc import AsyncGenerator
 from pathlib import Path
@@ -9,6 +10,7 @@ from unittest.mock import AsyncMock, MagicMock
 import orjson
 import pytest
 from faker import Faker
+from prometheus_client import REGISTRY
 
 from aws_helpers.s3_wrapper import S3Wrapper
 from aws_helpers.sqs_wrapper import SqsWrapper
@@ -294,3 +296,129 @@ async def test_abstract_aws_s3_queued_connector_next_batch_with_empty_data_in_s3
     result = await abstract_queued_connector.next_batch()
 
     assert result == (0, [message[1] for message in valid_messages])
+
+
+async def test_abstract_aws_s3_queued_connector_next_batch_fetches_objects_concurrently(
+    session_faker: Faker, abstract_queued_connector: AbstractAwsS3QueuedConnector, sqs_message: str
+):
+    """
+    Test AbstractAwsS3QueuedConnector next_batch fetches the S3 objects concurrently within the limit.
+
+    Args:
+        session_faker: Faker
+        abstract_queued_connector: AbstractAwsS3QueuedConnector
+        sqs_message: str
+    """
+    amount_of_messages = 8
+    sqs_messages = [(sqs_message, session_faker.pyint(min_value=1, max_value=1000)) for _ in range(amount_of_messages)]
+
+    abstract_queued_connector.s3_fetch_concurrency_sem = asyncio.BoundedSemaphore(3)
+
+    in_flight = 0
+    max_in_flight = 0
+    data_content = session_faker.word()
+
+    async def read_key():
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+
+        return await async_bytesIO(data_content.encode("utf-8"))
+
+    abstract_queued_connector.sqs_wrapper = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages.return_value.__aenter__.return_value = sqs_messages
+
+    abstract_queued_connector.s3_wrapper = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key.return_value.__aenter__.side_effect = read_key
+
+    result = await abstract_queued_connector.next_batch()
+
+    assert result == (amount_of_messages, [message[1] for message in sqs_messages])
+    assert max_in_flight == 3
+
+
+async def test_abstract_aws_s3_queued_connector_next_batch_push_failure(
+    session_faker: Faker, abstract_queued_connector: AbstractAwsS3QueuedConnector, sqs_message: str
+):
+    """
+    Test AbstractAwsS3QueuedConnector next_batch does not acknowledge the messages when the push fails.
+
+    Args:
+        session_faker: Faker
+        abstract_queued_connector: AbstractAwsS3QueuedConnector
+        sqs_message: str
+    """
+    sqs_messages = [(sqs_message, session_faker.pyint(min_value=1, max_value=1000))]
+    data_content = session_faker.word()
+
+    async def read_key():
+        return await async_bytesIO(data_content.encode("utf-8"))
+
+    abstract_queued_connector.sqs_wrapper = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages.return_value.__aenter__.return_value = sqs_messages
+
+    abstract_queued_connector.s3_wrapper = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key.return_value.__aenter__.side_effect = read_key
+
+    abstract_queued_connector.push_data_to_intakes = AsyncMock(side_effect=ConnectionError("Intake unavailable"))
+
+    with pytest.raises(ExceptionGroup):
+        await abstract_queued_connector.next_batch()
+
+    # The error is propagated to the receiving context, so the messages are not deleted
+    exit_call = abstract_queued_connector.sqs_wrapper.receive_messages.return_value.__aexit__.call_args
+    assert ExceptionGroup in exit_call.args
+
+
+@pytest.mark.asyncio
+async def test_abstract_aws_s3_queued_connector_stage_metrics(
+    session_faker: Faker, abstract_queued_connector: AbstractAwsS3QueuedConnector, sqs_message: str
+):
+    """
+    Test AbstractAwsS3QueuedConnector reports the duration of the stages of the collect.
+
+    Args:
+        session_faker: Faker
+        abstract_queued_connector: AbstractAwsS3QueuedConnector
+        sqs_message: str
+    """
+    intake_key = abstract_queued_connector.configuration.intake_key
+
+    def stage_count(stage: str) -> float:
+        labels = {"intake_key": intake_key, "stage": stage}
+        return REGISTRY.get_sample_value("symphony_module_aws_stage_duration_count", labels) or 0
+
+    stages = ("sqs_receive", "process", "s3_wait", "s3_object", "s3_fetch", "s3_download", "parse", "push")
+    counts_before = {stage: stage_count(stage) for stage in stages}
+
+    async def read_key():
+        return await async_bytesIO(session_faker.word().encode("utf-8"))
+
+    abstract_queued_connector.sqs_wrapper = MagicMock()
+    abstract_queued_connector.sqs_wrapper.receive_messages.return_value.__aenter__.side_effect = [
+        [(sqs_message, session_faker.pyint())] * 2,
+        [],
+    ]
+    abstract_queued_connector.s3_wrapper = MagicMock()
+    abstract_queued_connector.s3_wrapper.read_key.return_value.__aenter__.side_effect = read_key
+
+    assert (await abstract_queued_connector.next_batch())[0] == 2
+
+    # With a batch size of 1, the first messages fill the batch and each object pushes its own event
+    counts = {stage: stage_count(stage) - counts_before[stage] for stage in stages}
+    assert counts == {
+        "sqs_receive": 1,
+        "process": 1,
+        "s3_wait": 2,
+        "s3_object": 2,
+        "s3_fetch": 2,
+        "s3_download": 2,
+        "parse": 2,
+        "push": 2,
+    }
@@ -1,12 +1,18 @@
 """Tests related to AwsS3FlowLogsTrigger."""
 
+import ipaddress
 from pathlib import Path
 
 import pytest
 from faker import Faker
 
 from connectors import AwsModule
-from connectors.s3.trigger_s3_flowlogs import AwsS3FlowLogsConfiguration, AwsS3FlowLogsTrigger
+from connectors.s3.trigger_s3_flowlogs import (
+    PRIVATE_IPV4_NETWORKS,
+    AwsS3FlowLogsConfiguration,
+    AwsS3FlowLogsTrigger,
+    PrivateAddressMatcher,
+)
 from tests.helpers import async_list, async_temporary_file
 
 
@@ -96,3 +102,127 @@ async def test_aws_s3_logs_trigger_parse_data(connector: AwsS3FlowLogsTrigger, t
 async def test_aws_s3_logs_trigger_parse_empty_data(connector: AwsS3FlowLogsTrigger):
     async with async_temporary_file(b"") as f:
         assert await async_list(connector._parse_content(f)) == []
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "10.0.0.1",
+        "172.16.0.1",
+        "172.32.0.1",
+        "192.168.255.255",
+        "169.254.169.254",
+        "127.0.0.1",
+        "100.64.0.1",
+        "8.8.8.8",
+        "255.255.255.255",
+        "240.0.0.1",
+        "fd00::1",
+        "2001:4860:4860::8888",
+    ],
+)
+def test_private_address_matcher(value: str):
+    """
+    Test PrivateAddressMatcher classifies the addresses like `ipaddress`.
+
+    Args:
+        value: str
+    """
+    assert PrivateAddressMatcher().is_private_or_not_ip(value) is ipaddress.ip_address(value).is_private
+
+
+def test_private_address_matcher_parity_with_ipaddress(faker: Faker):
+    """
+    Test PrivateAddressMatcher classifies the IPv4 addresses like `ipaddress` of the running Python.
+
+    Args:
+        faker: Faker
+    """
+    assert PRIVATE_IPV4_NETWORKS
+
+    matcher = PrivateAddressMatcher()
+    addresses = [faker.ipv4() for _ in range(1000)]
+    # the bounds of the private networks and their neighbours
+    for network in PRIVATE_IPV4_NETWORKS:
+        for bound in (int(network.network_address), int(network.broadcast_address)):
+            for address in range(max(bound - 1, 0), min(bound + 2, 2**32)):
+                addresses.append(str(ipaddress.IPv4Address(address)))
+
+    for address in addresses:
+        assert matcher.is_private_or_not_ip(address) is ipaddress.ip_address(address).is_private, address
+
+
+def test_private_address_matcher_without_networks():
+    """
+    Test PrivateAddressMatcher falls back on `ipaddress` when no private network is known.
+    """
+    matcher = PrivateAddressMatcher(networks=())
+
+    assert matcher.is_private_or_not_ip("10.0.0.1") is True
+    assert matcher.is_private_or_not_ip("8.8.8.8") is False
+    assert matcher.is_private_or_not_ip("1.2.3.256") is True
+
+
+@pytest.mark.parametrize(
+    "value", ["-", "", "1.2.3", "1.2.3.256", "01.2.3.4", "1.2.3.4.5", "eni-0a479835a7588c9ca", "::g"]
+)
+def test_private_address_matcher_not_ip(value: str):
+    """
+    Test PrivateAddressMatcher omits the values that are not IP addresses.
+
+    Args:
+        value: str
+    """
+    assert PrivateAddressMatcher().is_private_or_not_ip(value) is True
+
+
+def test_aws_s3_flowlogs_trigger_is_private_record(connector: AwsS3FlowLogsTrigger):
+    """
+    Test AwsS3FlowLogsTrigger `is_private_record` with the positions of the address fields.
+
+    Args:
+        connector: AwsS3FlowLogsTrigger
+    """
+    header = "version account-id interface-id srcaddr dstaddr srcport dstport protocol packets bytes start end action"
+    positions = connector.get_address_positions(header)
+    fields_count = len(header.split(" "))
+
+    assert positions == [3, 4]
+    assert connector.get_address_positions("2 111111111111 eni-0a479835a7588c9ca 10.0.0.1 8.8.8.8") is None
+
+    private_record = "2 111111111111 eni-0a479835a7588c9ca 10.0.0.1 172.31.39.167 58757 39045 6 1 40 1 2 ACCEPT"
+    public_record = "2 111111111111 eni-0a479835a7588c9ca 10.0.0.1 8.8.8.8 58757 39045 6 1 40 1 2 ACCEPT"
+    no_data_record = "2 111111111111 eni-0a479835a7588c9ca - - - - - - - 1 2 NODATA"
+    # The fields don't match the header: all the IPs of the record are checked
+    shifted_record = "# 2 111111111111 eni-0a479835a7588c9ca 10.0.0.1 8.8.8.8 58757 39045 6 1 40 1 2 ACCEPT"
+
+    assert connector.is_private_record(private_record, positions, fields_count) is True
+    assert connector.is_private_record(public_record, positions, fields_count) is False
+    assert connector.is_private_record(no_data_record, positions, fields_count) is True
+    assert connector.is_private_record(shifted_record, positions, fields_count) is False
+
+
+@pytest.mark.asyncio
+async def test_aws_s3_logs_trigger_parse_data_with_comment_before_header(connector: AwsS3FlowLogsTrigger):
+    """
+    Test AwsS3FlowLogsTrigger `_parse_content` doesn't take a comment as the header.
+
+    Args:
+        connector: AwsS3FlowLogsTrigger
+    """
+    connector.configuration.skip_first = 0
+    public_record = "2 111111111111 eni-0a479835a7588c9ca 10.0.0.1 8.8.8.8 58757 39045 6 1 40 1 2 ACCEPT OK"
+    # only the address fields are checked when the header is known, not the address in the interface-id field
+    private_record = "2 111111111111 1.1.1.1 10.0.0.1 172.31.39.167 58757 39045 6 1 40 1 2 ACCEPT OK"
+    content = "\n".join(
+        [
+            "# srcaddr dstaddr",
+            "version account-id interface-id srcaddr dstaddr srcport dstport protocol packets bytes start end action "
+            "log-status",
+            public_record,
+            private_record,
+        ]
+    )
+
+    async with async_temporary_file(content.encode("utf-8")) as f:
+        assert await async_list(connector._parse_content(f)) == [public_record]
@@ -5,6 +5,7 @@ from pathlib import Path
 
 import aiofiles
 import orjson
+import pyarrow
 import pytest
 
 from connectors import AwsModule
@@ -57,3 +58,32 @@ async def test_aws_s3_flowlogs_records_trigger_parse_content(connector: AwsS3Flo
 async def test_aws_s3_flowlogs_records_trigger_parse_empty_data(connector: AwsS3FlowLogsParquetRecordsTrigger):
     async with async_temporary_file(b"") as f:
         assert await async_list(connector._parse_content(f)) == []
+
+
+def test_aws_s3_flowlogs_records_trigger_filter_private_records(connector: AwsS3FlowLogsParquetRecordsTrigger):
+    """
+    Test AwsS3ParquetRecordsTrigger `filter_private_records` keeps the records with at least one public IP.
+
+    Args:
+        connector: AwsS3FlowLogsParquetRecordsTrigger
+    """
+    batch = pyarrow.RecordBatch.from_pylist(
+        [
+            {"srcaddr": "10.0.0.1", "dstaddr": "192.168.1.1", "action": "ACCEPT"},
+            {"srcaddr": "10.0.0.1", "dstaddr": "8.8.8.8", "action": "ACCEPT"},
+            {"srcaddr": "2001:4860:4860::8888", "dstaddr": "fd00::1", "action": "ACCEPT"},
+            {"srcaddr": "-", "dstaddr": "-", "action": "NODATA"},
+            {"srcaddr": None, "dstaddr": "1.1.1.1", "action": "REJECT"},
+        ]
+    )
+
+    records = connector.filter_private_records(batch, ("srcaddr", "dstaddr", "pkt_srcaddr"))
+
+    assert records.column("dstaddr").to_pylist() == ["8.8.8.8", "fd00::1", "1.1.1.1"]
+    assert [connector.check_all_ips_are_private(record, ("srcaddr", "dstaddr")) for record in batch.to_pylist()] == [
+        True,
+        False,
+        False,
+        True,
+        False,
+    ]
@@ -1,13 +1,15 @@
 """Tests related to AwsS3LogsTrigger."""
 
+import gzip
 from pathlib import Path
 
 import pytest
 from faker import Faker
 
+from aws_helpers.utils import AsyncStreamReader
 from connectors import AwsModule
 from connectors.s3.trigger_s3_logs import AwsS3LogsConfiguration, AwsS3LogsTrigger
-from tests.helpers import async_list, async_temporary_file
+from tests.helpers import async_bytesIO, async_list, async_temporary_file
 
 
 @pytest.fixture
@@ -94,3 +96,27 @@ async def test_aws_s3_logs_trigger_parse_data(connector: AwsS3LogsTrigger, test_
 async def test_aws_s3_logs_trigger_parse_emptydata(connector: AwsS3LogsTrigger, test_data: bytes):
     async with async_temporary_file(b"") as f:
         assert await async_list(connector._parse_content(f)) == []
+
+
+@pytest.mark.asyncio
+async def test_aws_s3_logs_trigger_parse_stream_with_multi_characters_separator(
+    connector: AwsS3LogsTrigger, test_data: bytes
+):
+    """
+    Test AwsS3LogsTrigger `_parse_data` on a gzip stream read by small chunks, with a separator of several characters.
+
+    Args:
+        connector: AwsS3LogsTrigger
+        test_data: bytes
+    """
+    connector.configuration.separator = "<EOL>"
+    content = gzip.compress(test_data.replace(b"\n", b"<EOL>"))
+
+    stream = AsyncStreamReader(await async_bytesIO(content), buffer_size=7, compressed=True)
+
+    assert (
+        await async_list(connector._parse_content(stream))
+        == [line for line in test_data.decode("utf-8").split("\n") if line != "" and not line.startswith("#")][
+            connector.configuration.skip_first :
+        ]
+    )
@@ -179,3 +179,37 @@ def test_check_if_payload_is_valid_2(connector: AwsS3RecordsTrigger, session_fak
         )
 
         assert connector.is_valid_payload({"eventSource": "random.amazonaws.com", "eventName": event}) is False
+
+
+def test_check_if_payload_is_valid_matches_prefixes(connector: AwsS3RecordsTrigger, session_faker: Faker):
+    """
+    Test AwsS3RecordsTrigger `is_valid_payload` agrees with a plain lookup of the events prefixes.
+
+    Args:
+        connector: AwsS3RecordsTrigger
+        session_faker: Faker
+    """
+
+    def is_valid(event_source: str, event_name: str) -> bool:
+        prefixes = connector._events_prefixes.get(event_source) or connector._events_prefixes["default"]
+        supported, unsupported = prefixes.get("supported", []), prefixes.get("unsupported", [])
+        if any(event_name.startswith(prefix) for prefix in unsupported):
+            return False
+
+        if any(event_name.startswith(prefix) for prefix in supported):
+            return True
+
+        return len(supported) == 0 and len(unsupported) != 0
+
+    event_names = {
+        prefix + suffix
+        for prefixes in connector._events_prefixes.values()
+        for values in prefixes.values()
+        for prefix in values
+        for suffix in ("", session_faker.word().capitalize())
+    } | {session_faker.word().capitalize() for _ in range(20)}
+
+    for event_source in list(connector._events_prefixes) + [session_faker.domain_name()]:
+        for event_name in event_names:
+            payload = {"eventSource": event_source, "eventName": event_name}
+            assert connector.is_valid_payload(payload) is is_valid(event_source, event_name)
@@ -1,11 +1,15 @@
 """Test abstract AWS connector."""
 
+import asyncio
+import os
 from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
+import pytest
 from sekoia_automation.aio.helpers.aws.client import AwsClient
 from sekoia_automation.connector import DefaultConnectorConfiguration
 
-from connectors import AbstractAwsConnector, AwsModule
+from connectors import AbstractAwsConnector, AbstractAwsSqsConnector, AwsModule
 
 
 def test_abstract_aws_connector(aws_module: AwsModule, symphony_storage: Path, intake_key: str):
@@ -19,3 +23,84 @@ def test_abstract_aws_connector(aws_module: AwsModule, symphony_storage: Path, i
     connector.configuration = DefaultConnectorConfiguration(intake_key=intake_key)
 
     assert isinstance(connector.aws_client, AwsClient)
+
+
+class SqsConnector(AbstractAwsSqsConnector):
+    """SQS connector that forwards the messages as is."""
+
+    async def _process_messages(self, messages: list[tuple[str, int]]) -> tuple[list[str], int]:
+        await asyncio.sleep(0.01)
+
+        return [message for message, _ in messages], 0
+
+
+def sqs_wrapper_mock(batches: list[list[tuple[str, int]]]) -> MagicMock:
+    """
+    Create a SQS wrapper that receives the batches of messages, then nothing.
+
+    Args:
+        batches: list[list[tuple[str, int]]]
+
+    Returns:
+        MagicMock:
+    """
+    sqs_wrapper = MagicMock()
+    sqs_wrapper.receive_messages.return_value.__aenter__.side_effect = batches + [[]] * 10
+
+    return sqs_wrapper
+
+
+@pytest.mark.asyncio
+async def test_abstract_aws_sqs_connector_parallel_receivers(
+    aws_module: AwsModule, symphony_storage: Path, intake_key: str
+):
+    """
+    Test the receivers of the AbstractAwsSqsConnector share the same push stage.
+
+    Args:
+        aws_module: AwsModule
+        symphony_storage: Path
+        intake_key: str
+    """
+    batches = [[(f"message {i}-{j}", i * 10 + j) for j in range(3)] for i in range(6)]
+
+    with patch.dict(os.environ, {"AWS_SQS_RECEIVERS": "3", "AWS_BATCH_SIZE": "1000"}):
+        connector = SqsConnector(module=aws_module, data_path=symphony_storage)
+
+    connector.configuration = DefaultConnectorConfiguration(intake_key=intake_key)
+    connector.sqs_wrapper = sqs_wrapper_mock(batches)
+    connector.push_data_to_intakes = AsyncMock(side_effect=lambda events: events)
+
+    pushed_count, timestamps = await connector.next_batch()
+
+    assert pushed_count == 18
+    assert sorted(timestamps) == sorted(timestamp for batch in batches for _, timestamp in batch)
+    # All the events are pushed at once, when the receivers are done
+    connector.push_data_to_intakes.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_abstract_aws_sqs_connector_push_by_size(aws_module: AwsModule, symphony_storage: Path, intake_key: str):
+    """
+    Test the push stage of the AbstractAwsSqsConnector flushes the events when the buffer is full.
+
+    Args:
+        aws_module: AwsModule
+        symphony_storage: Path
+        intake_key: str
+    """
+    batches = [[(f"message {i}-{j}", i * 10 + j) for j in range(5)] for i in range(4)]
+
+    with patch.dict(os.environ, {"AWS_SQS_RECEIVERS": "1", "AWS_BATCH_SIZE": "10"}):
+        connector = SqsConnector(module=aws_module, data_path=symphony_storage)
+
+    connector.configuration = DefaultConnectorConfiguration(intake_key=intake_key)
+    connector.sqs_wrapper = sqs_wrapper_mock(batches)
+    connector.push_data_to_intakes = AsyncMock(side_effect=lambda events: events)
+
+    pushed_count, timestamps = await connector.next_batch()
+
+    # The batch stops once 10 events are received
+    assert pushed_count == 10
+    assert len(timestamps) == 10
+    connector.push_data_to_intakes.assert_called_once()
@@ -1,3 +1,10 @@
+import re
+import zlib
+from typing import Any, AsyncGenerator, AsyncIterable
+
+import orjson
+
+
 def is_gzip_compressed(content: bytes) -> bool:
     """
     Check if the current object is compressed with gzip.
@@ -10,3 +17,354 @@ def is_gzip_compressed(content: bytes) -> bool:
     """
     # check the magic number
     return content[0:2] == b"\x1f\x8b"
+
+
+# Maximum size of the chunks inflated at once, to bound the memory of highly compressed blobs
+INFLATE_CHUNK_SIZE = 1024 * 1024
+
+
+async def inflate_chunks(chunks: AsyncIterable[bytes]) -> AsyncGenerator[bytes, None]:
+    """
+    Inflate, chunk by chunk, a stream that may be compressed with gzip.
+
+    The compression is detected from the magic number of the stream. Concatenated gzip members,
+    optionally padded with zeroes, are supported.
+
+    Args:
+        chunks: AsyncIterable[bytes]
+
+    Yields:
+        bytes:
+
+    Raises:
+        EOFError: if the stream ends in the middle of a gzip member
+    """
+    head = b""
+    decompressor = None
+    is_compressed: bool | None = None
+
+    async for chunk in chunks:
+        if is_compressed is None:
+            # Wait for enough bytes to check the magic number
+            head += chunk
+            if len(head) < 2:
+                continue
+
+            chunk, head = head, b""
+            is_compressed = is_gzip_compressed(chunk)
+
+        if not is_compressed:
+            yield chunk
+            continue
+
+        while chunk:
+            if decompressor is None:
+                # Skip the padding between the gzip members
+                chunk = chunk.lstrip(b"\x00")
+                if not chunk:
+                    break
+
+                decompressor = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+            inflated = decompressor.decompress(chunk, INFLATE_CHUNK_SIZE)
+            if inflated:
+                yield inflated
+
+            if decompressor.eof:
+                # Start a new decompressor on the next gzip member
+                chunk = decompressor.unused_data
+                decompressor = None
+            else:
+                chunk = decompressor.unconsumed_tail
+
+    # The stream was too short to be checked
+    if head:
+        yield head
+
+    if decompressor is not None:
+        raise EOFError("Compressed stream ended before the end-of-stream marker was reached")
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncGenerator[bytes, None]:
+    """
+    Split a stream in lines, as its chunks are received.
+
+    The line feeds are only searched in the new chunks, and the parts of a line are joined once complete.
+
+    Args:
+        chunks: AsyncIterable[bytes]
+
+    Yields:
+        bytes: the lines, without their line feed
+    """
+    parts: list[bytes] = []
+
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) >= 0:
+            parts.append(chunk[start:end])
+            yield b"".join(parts)
+            parts = []
+            start = end + 1
+
+        if start < len(chunk):
+            parts.append(chunk[start:])
+
+    if parts:
+        yield b"".join(parts)
+
+
+# The tokens of JSON delimiting the values: the strings, as a whole, and the braces and brackets.
+# A lone quote is the start of a string not received entirely.
+_JSON_TOKENS = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|["{}\[\]]', re.DOTALL)
+
+# Maximum size of the blobs parsed at once. The larger ones are parsed as they are received
+JSON_DOCUMENT_MAX_SIZE = 16 * 1024 * 1024
+
+
+def parse_json_records(content: bytes) -> list[Any]:
+    """
+    Parse the records of a JSON document (`{"records": [...]}`) or of JSON lines.
+
+    The records are the elements of the `records` array of the document, if any.
+    If the content is not a single JSON document, each of its lines is a record.
+
+    Args:
+        content: bytes
+
+    Returns:
+        list[Any]:
+
+    Raises:
+        ValueError: if the document is not a JSON object
+    """
+    try:
+        document = orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return [orjson.loads(line) for line in content.split(b"\n") if line.strip()]
+
+    if not isinstance(document, dict):
+        raise ValueError("The JSON document is not an object")
+
+    return document.get("records", [])
+
+
+class JSONRecordsParser:
+    """
+    Incremental parser of the records of a JSON document (`{"records": [...]}`) or of JSON lines.
+
+    The records are the same as the ones of `parse_json_records`:
+    - the elements of the `records` array of the first top-level object, parsed as soon as they are complete,
+      so the document is never loaded at once;
+    - else, if there are several top-level values (JSON lines), each of them;
+    - else, a single top-level object has no record.
+
+    Only the strings, braces and brackets of the new bytes are scanned, the values being parsed by orjson.
+    The scalars are read from the bytes between the tokens of the records.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        # The next byte to scan
+        self._position = 0
+        self._depth = 0
+        # The last string closed in a top-level object, i.e. the key of its next value
+        self._last_key: bytes | None = None
+        # The depth of the elements of the `records` array being parsed, if any
+        self._records_depth: int | None = None
+        # The start of the object or array being parsed as a record, if any
+        self._value_start: int | None = None
+        # The start of the bytes following the last record, which may contain scalar records
+        self._gap_start: int | None = 0
+        self._is_envelope = False
+        # The number of top-level values, and the first one until it is known to be a record
+        self._top_level_count = 0
+        self._first_value: Any = None
+
+    def _emit(self, value: Any, records: list[Any]) -> None:
+        if self._records_depth is not None:
+            records.append(value)
+            return
+
+        # A single top-level value is a document, not a record
+        self._top_level_count += 1
+        if self._top_level_count == 1:
+            self._first_value = value
+            return
+
+        if self._top_level_count == 2 and not self._is_envelope:
+            records.append(self._first_value)
+            self._first_value = None
+
+        records.append(value)
+
+    def _parse_gap(self, end: int, records: list[Any]) -> None:
+        # The scalar records between the last record and `end`
+        if self._gap_start is None:
+            return
+
+        gap = bytes(self._buffer[self._gap_start : end])
+        for value in gap.split(b",") if self._records_depth is not None else gap.split():
+            value = value.strip()
+            if value:
+                self._emit(orjson.loads(value), records)
+
+        self._gap_start = None
+
+    def feed(self, data: bytes) -> list[Any]:
+        """
+        Parse the next bytes of the stream.
+
+        Args:
+            data: bytes
+
+        Returns:
+            list[Any]: the records completed by the bytes
+        """
+        buffer = self._buffer
+        buffer += data
+        records: list[Any] = []
+
+        position = len(buffer)
+        depth = self._depth
+        # The depth of the records
+        level = self._records_depth or 0
+        for match in _JSON_TOKENS.finditer(buffer, self._position):
+            start, end = match.span()
+            token = buffer[start]
+
+            if token == 0x22:  # quote
+                if end - start == 1:
+                    # wait for the end of the string
+                    position = start
+                    break
+
+                if depth > level:
+                    if depth == 1:
+                        self._last_key = bytes(buffer[start + 1 : end - 1])
+                    continue
+
+                self._parse_gap(start, records)
+                self._emit(orjson.loads(bytes(buffer[start:end])), records)
+                self._gap_start = end
+
+            elif token in (0x7B, 0x5B):  # opening brace or bracket
+                if depth == level:
+                    self._parse_gap(start, records)
+                    self._value_start = start
+
+                depth += 1
+                if (
+                    token == 0x5B
+                    and depth == 2
+                    and self._last_key == b"records"
+                    and self._top_level_count == 0
+                    and not self._is_envelope
+                ):
+                    # The first top-level value is an envelope: its records are parsed one by one
+                    self._records_depth = level = 2
+                    self._value_start = None
+                    self._gap_start = end
+                    self._is_envelope = True
+
+            elif depth == self._records_depth:  # end of the records array
+                self._parse_gap(start, records)
+                self._records_depth = None
+                level = 0
+                depth -= 1
+
+            else:  # closing brace or bracket
+                depth -= 1
+                if depth == level and self._value_start is not None:
+                    self._emit(orjson.loads(bytes(buffer[self._value_start : end])), records)
+                    self._value_start = None
+                    self._gap_start = end
+                elif depth == 0 and self._is_envelope and self._top_level_count == 0:
+                    # End of the envelope
+                    self._top_level_count = 1
+                    self._gap_start = end
+
+                if depth == 0:
+                    self._last_key = None
+
+        self._depth = depth
+
+        # Drop the bytes already parsed
+        offset = min(start for start in (position, self._value_start, self._gap_start) if start is not None)
+        del buffer[:offset]
+        self._position = position - offset
+        if self._value_start is not None:
+            self._value_start -= offset
+        if self._gap_start is not None:
+            self._gap_start -= offset
+
+        return records
+
+    def close(self) -> list[Any]:
+        """
+        Check the end of the stream and get its last records
+
+        Returns:
+            list[Any]: the last records
+
+        Raises:
+            ValueError: if the stream ends in the middle of a value, or is a single value other than an object
+        """
+        records: list[Any] = []
+        if self._depth == 0 and self._position == len(self._buffer):
+            self._parse_gap(len(self._buffer), records)
+
+        if self._depth != 0 or self._position != len(self._buffer):
+            raise ValueError("JSON stream ended in the middle of a value")
+
+        if self._top_level_count == 1 and not self._is_envelope:
+            if not isinstance(self._first_value, dict):
+                raise ValueError("The JSON document is not an object")
+
+            records.extend(self._first_value.get("records", []))
+
+        return records
+
+
+async def iter_json_records(
+    chunks: AsyncIterable[bytes], max_document_size: int = JSON_DOCUMENT_MAX_SIZE
+) -> AsyncGenerator[Any, None]:
+    """
+    Parse the records of a JSON document (`{"records": [...]}`) or of JSON lines.
+
+    The content is parsed at once if not larger than `max_document_size`, else as the chunks are received.
+
+    Args:
+        chunks: AsyncIterable[bytes]
+        max_document_size: int
+
+    Yields:
+        Any: the parsed records
+    """
+    iterator = aiter(chunks)
+    parts: list[bytes] = []
+    size = 0
+    async for chunk in iterator:
+        parts.append(chunk)
+        size += len(chunk)
+        if size > max_document_size:
+            break
+    else:
+        for record in parse_json_records(b"".join(parts)):
+            yield record
+
+        return
+
+    parser = JSONRecordsParser()
+    content = b"".join(parts)
+    parts.clear()
+    for record in parser.feed(content):
+        yield record
+
+    del content
+    async for chunk in iterator:
+        for record in parser.feed(chunk):
+            yield record
+
+    for record in parser.close():
+        yield record
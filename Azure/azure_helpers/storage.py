@@ -1,8 +1,7 @@
 """Configs and wrapper to work with Azure Blob Storage."""
 
-from typing import Tuple
+from typing import AsyncGenerator
 
-import aiofiles
 from azure.core.async_paging import AsyncItemPaged
 from azure.storage.blob import BlobProperties
 from azure.storage.blob.aio import ContainerClient
@@ -58,41 +57,33 @@ class AzureBlobStorageWrapper(object):
 
         return self._client
 
-    def list_blobs(self) -> AsyncItemPaged[BlobProperties]:
+    def list_blobs(self, name_starts_with: str | None = None) -> AsyncItemPaged[BlobProperties]:
         """
-        List all blobs in container.
+        List the blobs in container, optionally restricted to the ones under a prefix.
+
+        Args:
+            name_starts_with: str | None
 
         Returns:
             AsyncItemPaged[BlobProperties]:
         """
+        if name_starts_with:
+            return self.client().list_blobs(name_starts_with=name_starts_with)
+
         return self.client().list_blobs()
 
-    async def download_blob(
-        self, blob_name: str, download: bool = True, tmp_dir: str = "/tmp"
-    ) -> Tuple[str | None, bytes | None]:
+    async def stream_blob(self, blob_name: str) -> AsyncGenerator[bytes, None]:
         """
-        Download blob content from Azure Blob Storage.
+        Stream the content of a blob from Azure Blob Storage, chunk by chunk.
 
         Args:
             blob_name: str
-            download: bool
-            tmp_dir: str
 
-        Returns:
-            Union[str, bytes]:
+        Yields:
+            bytes:
         """
         blob = self.client().get_blob_client(blob_name)
         stream = await blob.download_blob()
 
-        if download:
-            async with aiofiles.tempfile.NamedTemporaryFile("wb", delete=False, dir=tmp_dir) as file:
-                file_name = str(file.name)
-                async for chunk in stream.chunks():
-                    await file.write(chunk)
-
-                return file_name, None
-
-        # This operation is blocking
-        result = await stream.readall()
-
-        return None, result
+        async for chunk in stream.chunks():
+            yield chunk
@@ -1,14 +1,17 @@
 import asyncio
 import os
 import time
+from collections.abc import Iterable
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from functools import cached_property
 from typing import Any, Optional, Union, cast
 
 import orjson
 from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
-from azure.eventhub import EventData
+from azure.eventhub import CloseReason, EventData
 from azure.eventhub.aio import EventHubConsumerClient, PartitionContext
+from azure.eventhub.amqp import AmqpMessageBodyType
 from azure.eventhub.extensions.checkpointstoreblobaio import BlobCheckpointStore
 from azure.storage.blob.aio import BlobServiceClient
 from sekoia_automation.aio.connector import AsyncConnector
@@ -26,6 +29,24 @@ class AzureEventsHubConfiguration(DefaultConnectorConfiguration):
     categories: list[str] = []
 
 
+@dataclass
+class PartitionState:
+    """
+    The consumption state of a partition
+    """
+
+    events_since_checkpoint: int = 0
+    # The partition was never checkpointed, so its first batch is checkpointed
+    last_checkpoint: float = float("-inf")
+    # The last event pushed to the intakes
+    last_event: EventData | None = None
+    # The push pipeline of the partition, when enabled.
+    # An empty batch requests a checkpoint, so the checkpoints of the partition are serialized by its worker
+    queue: asyncio.Queue[list[EventData] | None] | None = None
+    worker: asyncio.Task[None] | None = None
+    error: Exception | None = None
+
+
 class Client(object):
     _client: EventHubConsumerClient | None = None
 
@@ -76,6 +97,14 @@ class AzureEventsHubTrigger(AsyncConnector):
         super().__init__(*args, **kwargs)
         self._consumption_max_wait_time = int(os.environ.get("CONSUMER_MAX_WAIT_TIME", "10"), 10)  # 10 seconds default
         self._frequency = int(os.environ.get("FREQUENCY_MAX_TIME", "10"), 10)
+        self._max_batch_size = int(os.environ.get("CONSUMER_MAX_BATCH_SIZE", "300"), 10)
+        self._prefetch = int(os.environ.get("CONSUMER_PREFETCH", "300"), 10)
+        # Checkpoint each partition every N events or T seconds, instead of after every batch
+        self._checkpoint_events = int(os.environ.get("CHECKPOINT_EVENTS_INTERVAL", "1000"), 10)
+        self._checkpoint_interval = float(os.environ.get("CHECKPOINT_TIME_INTERVAL", "10"))
+        # Number of batches received ahead while the previous ones are pushed. 0 to push the batches as received
+        self._pipeline_depth = int(os.environ.get("PARTITION_PIPELINE_DEPTH", "0"), 10)
+        self._partitions: dict[str, PartitionState] = {}
         self._has_more_events = True
 
     @cached_property
@@ -105,17 +134,109 @@ class AzureEventsHubTrigger(AsyncConnector):
             # Wrong permissions / invalid conn string / DNS / etc.
             self.log_exception(e, message="Failed to initialize checkpoint store")
 
+    async def checkpoint(
+        self, partition_context: PartitionContext, state: PartitionState, force: bool = False
+    ) -> None:
+        """
+        Checkpoint the events pushed from the partition, every N events or T seconds
+        """
+        if state.last_event is None or state.events_since_checkpoint == 0:
+            return
+
+        now = time.monotonic()
+        if (
+            force
+            or state.events_since_checkpoint >= self._checkpoint_events
+            or now - state.last_checkpoint >= self._checkpoint_interval
+        ):
+            await partition_context.update_checkpoint(state.last_event)
+            state.events_since_checkpoint = 0
+            state.last_checkpoint = now
+
+    async def process_batch(
+        self, partition_context: PartitionContext, state: PartitionState, messages: list[EventData]
+    ) -> None:
+        """
+        Forward a batch of messages of the partition and checkpoint them
+        """
+        await self.forward_events(messages)
+
+        state.events_since_checkpoint += len(messages)
+        state.last_event = messages[-1]
+        await self.checkpoint(partition_context, state)
+
+    async def run_partition_pipeline(self, partition_context: PartitionContext, state: PartitionState) -> None:
+        """
+        Push the batches of the partition while the next ones are received.
+
+        On failure, the following batches are discarded without being checkpointed:
+        they will be received again from the last checkpoint.
+        """
+        assert state.queue is not None
+
+        while (messages := await state.queue.get()) is not None:
+            if state.error is not None:
+                continue
+
+            try:
+                if len(messages) > 0:
+                    await self.process_batch(partition_context, state, messages)
+                else:
+                    # The partition is idle: checkpoint the events already pushed
+                    await self.checkpoint(partition_context, state, force=True)
+            except Exception as error:
+                state.error = error
+
+    async def raise_pipeline_error(self, state: PartitionState) -> None:
+        """
+        Raise the error of the pipeline of the partition, if failed, so the partition restarts from its last checkpoint
+        """
+        if state.error is not None:
+            await self.stop_partition_pipeline(state)
+            error, state.error = state.error, None
+            raise error
+
+    async def stop_partition_pipeline(self, state: PartitionState) -> None:
+        """
+        Push the batches waiting in the pipeline of the partition and stop it
+        """
+        if state.queue is not None and state.worker is not None:
+            await state.queue.put(None)
+            await state.worker
+
+        state.queue = None
+        state.worker = None
+
     async def handle_messages(self, partition_context: PartitionContext, messages: list[EventData]) -> None:
         """
         Handle new messages
         """
+        state = self._partitions.setdefault(partition_context.partition_id, PartitionState())
+
         if len(messages) > 0:
-            # got messages, we forward them
-            await self.forward_events(messages)
+            if self._pipeline_depth <= 0:
+                # got messages, we forward them and acknowledge them
+                await self.process_batch(partition_context, state, messages)
+                return
+
+            await self.raise_pipeline_error(state)
+
+            if state.queue is None:
+                state.queue = asyncio.Queue(maxsize=self._pipeline_depth)
+                state.worker = asyncio.create_task(self.run_partition_pipeline(partition_context, state))
+
+            # wait for a slot in the pipeline
+            await state.queue.put(messages)
+        else:
+            await self.raise_pipeline_error(state)
+
+            # The partition is idle: checkpoint the events already pushed
+            if state.queue is None:
+                await self.checkpoint(partition_context, state, force=True)
+            elif state.queue.empty():
+                # the worker may be pushing a batch: let it checkpoint once done
+                await state.queue.put([])
 
-            # acknowledge the messages
-            await partition_context.update_checkpoint()
-        else:  # pragma: no cover
             # We reached the max_wait_time, close the current client
             self.log(
                 message=(f"No new messages received from the last {self._frequency} seconds."),
@@ -126,14 +247,30 @@ class AzureEventsHubTrigger(AsyncConnector):
             MESSAGES_AGE.labels(intake_key=self.configuration.intake_key).set(0)
 
     @staticmethod
-    def get_records_from_message(message: EventData) -> tuple[list[Any], str]:
+    def load_message_body(message: EventData) -> Any:
+        """
+        Parse the JSON body of the message.
+
+        The data sections of the message are parsed at once with orjson, without decoding them first.
+        Other bodies, or JSON not supported by orjson (NaN, integers over 64 bits), go through the SDK parser.
+        """
+        if message.body_type == AmqpMessageBodyType.DATA:
+            try:
+                return orjson.loads(b"".join(cast(Iterable[bytes], message.body)))
+            except (orjson.JSONDecodeError, TypeError):
+                pass
+
+        return message.body_as_json()
+
+    @classmethod
+    def get_records_from_message(cls, message: EventData) -> tuple[list[Any], str]:
         """
         Return the records according to the body of the message
         """
         body: Union[str, dict[str, Any]]
 
         try:
-            body = message.body_as_json()
+            body = cls.load_message_body(message)
             if isinstance(body, list):  # handle list of events
                 return body, "json"
             elif isinstance(body, dict) and "records" in body:  # handle wrapped events
@@ -150,27 +287,34 @@ class AzureEventsHubTrigger(AsyncConnector):
         INCOMING_MESSAGES.labels(intake_key=self.configuration.intake_key).inc(len(messages))
         start = time.time()
 
+        categories = self.configuration.categories
+        skipped_records = 0
+
         records = []
         for message in messages:
             body, body_type = self.get_records_from_message(message)
+
+            if body_type != "json":
+                records.extend(record for record in body if record is not None)
+                continue
+
             for record in body:
-                if record is not None:
-                    if body_type == "json":
-                        # Check if the record is a dict and has a category that is in the configured list
-                        if (
-                            len(self.configuration.categories) > 0
-                            and isinstance(record, dict)
-                            and record.get("category") not in self.configuration.categories
-                        ):
-                            self.log(
-                                message=f"Skip record as its category {record.get('category')} not in allowed categories {self.configuration.categories}",
-                                level="debug",
-                            )
-                            continue
-
-                        records.append(orjson.dumps(record).decode("utf-8"))
-                    else:
-                        records.append(record)
+                if record is None:
+                    continue
+
+                # Check if the record is a dict and has a category that is in the configured list
+                if categories and isinstance(record, dict) and record.get("category") not in categories:
+                    skipped_records += 1
+                    continue
+
+                # The records are serialized once, from the parsed body
+                records.append(orjson.dumps(record).decode("utf-8"))
+
+        if skipped_records > 0:
+            self.log(
+                message=f"Skip {skipped_records} records as their category is not in allowed categories {categories}",
+                level="debug",
+            )
 
         if len(records) > 0:
             self.log(f"Forward {len(records)} events")
@@ -196,6 +340,18 @@ class AzureEventsHubTrigger(AsyncConnector):
             for age in messages_age:
                 MESSAGES_AGE.labels(intake_key=self.configuration.intake_key).set(age)
 
+    async def handle_partition_close(self, partition_context: PartitionContext, reason: CloseReason) -> None:
+        """
+        Push the pending batches of the partition and checkpoint them before releasing the partition
+        """
+        state = self._partitions.pop(partition_context.partition_id, None)
+        if state is None:
+            return
+
+        await self.stop_partition_pipeline(state)
+        if state.error is None:
+            await self.checkpoint(partition_context, state, force=True)
+
     async def handle_exception(self, partition_context: PartitionContext, exception: Exception) -> None:
         self.log_exception(
             exception,
@@ -208,7 +364,10 @@ class AzureEventsHubTrigger(AsyncConnector):
             await self.client.receive_batch(
                 on_event_batch=self.handle_messages,
                 on_error=self.handle_exception,
+                on_partition_close=self.handle_partition_close,
                 max_wait_time=self._consumption_max_wait_time,
+                max_batch_size=self._max_batch_size,
+                prefetch=self._prefetch,
             )
 
         except ResourceNotFoundError as e:  # pragma: no cover
@@ -220,9 +379,21 @@ class AzureEventsHubTrigger(AsyncConnector):
         """
         super(Connector, self).stop(*args, **kwargs)
 
+    async def close_on_stop(self) -> None:  # pragma: no cover
+        """
+        Close the client once the connector is stopped, so the partitions are released and checkpointed
+        """
+        while self.running:
+            await asyncio.sleep(1)
+
+        await self.client.close()
+
     async def async_run(self) -> None:  # pragma: no cover
         await self._initialize_checkpoint_store()
 
+        # The client stays open while consuming: receiving returns only when the client is closed or fails
+        stop_watcher = asyncio.create_task(self.close_on_stop())
+
         while self.running:
             try:
                 await self.receive_events()
@@ -236,6 +407,7 @@ class AzureEventsHubTrigger(AsyncConnector):
             if not self._has_more_events:
                 await asyncio.sleep(self._frequency)
 
+        stop_watcher.cancel()
         await self._session.close()
 
     def run(self) -> None:  # pragma: no cover
@@ -5,21 +5,18 @@ import os
 import time
 from abc import ABCMeta
 from datetime import datetime, timedelta, timezone
-from gzip import decompress
-from typing import Any, AsyncGenerator, Optional
+from typing import Any, AsyncGenerator, AsyncIterable, AsyncIterator, Optional
 
-import aiofiles
 from azure.storage.blob import BlobProperties
 from dateutil.parser import isoparse
 from loguru import logger
 from pydantic import Field
 from sekoia_automation.aio.connector import AsyncConnector
-from sekoia_automation.aio.helpers.files.utils import delete_file
 from sekoia_automation.connector import DefaultConnectorConfiguration
 from sekoia_automation.module import Module
 from sekoia_automation.storage import PersistentJSON
 
-from azure_helpers.io import is_gzip_compressed
+from azure_helpers.io import inflate_chunks, iter_json_records
 from azure_helpers.storage import AzureBlobStorageConfig, AzureBlobStorageWrapper
 from connectors.metrics import EVENTS_LAG, FORWARD_EVENTS_DURATION, OUTCOMING_EVENTS
 
@@ -47,6 +44,46 @@ class AbstractAzureBlobConnector(AsyncConnector, metaclass=ABCMeta):
         super().__init__(*args, **kwargs)
         self.context = PersistentJSON("context.json", self._data_path)
         self.limit_of_events_to_push = int(os.getenv("AZURE_BATCH_SIZE", 1000))
+        self.max_concurrent_blobs = max(1, int(os.getenv("AZURE_BLOB_MAX_CONCURRENCY", 4)))
+
+        # Comma-separated strftime templates of the hourly prefixes of the blobs.
+        # When undefined, the whole container is listed on each cycle.
+        self.blob_prefix_templates = self.parse_blob_prefix_templates(os.getenv("AZURE_BLOB_PREFIX_TEMPLATES", ""))
+        self._prefix_markers: dict[str, datetime] = {}
+
+        # Lower bound of the records of each blob listed in the current cycle
+        self._blob_lower_bounds: dict[str, datetime] = {}
+
+    @staticmethod
+    def parse_blob_prefix_templates(value: str) -> list[str]:
+        """
+        Parse the templates of the hourly prefixes of the blobs.
+
+        The blobs are listed by name prefix: each template must render, from the root of the container, the beginning
+        of the full names of the blobs written in an hour, e.g.
+        `resourceId=/SUBSCRIPTIONS/<id>/RESOURCEGROUPS/<group>/PROVIDERS/MICROSOFT.NETWORK/NETWORKSECURITYGROUPS/<nsg>/y=%Y/m=%m/d=%d/h=%H/`
+        for the NSG flow logs. The records of a blob are filtered with the marker of its prefix.
+
+        Args:
+            value: str: the comma-separated templates
+
+        Returns:
+            list[str]:
+
+        Raises:
+            ValueError: if a template doesn't render the hour or starts with a slash
+        """
+        templates = [template.strip() for template in value.split(",") if template.strip()]
+        for template in templates:
+            if "%H" not in template:
+                raise ValueError(f"The blob prefix template {template!r} must render the hour (%H)")
+
+            if template.startswith("/"):
+                raise ValueError(
+                    f"The blob prefix template {template!r} must render the blob names from the root of the container"
+                )
+
+        return templates
 
     def azure_blob_wrapper(self) -> AzureBlobStorageWrapper:
         """
@@ -73,6 +110,33 @@ class AbstractAzureBlobConnector(AsyncConnector, metaclass=ABCMeta):
         """
         raise NotImplementedError
 
+    def filter_blob_records(self, records: list[Any], lower_bound: datetime | None = None) -> list[str]:
+        """
+        Abstract method to filter or format the records parsed from a blob.
+
+        Args:
+            records: list[Any]
+            lower_bound: datetime | None: the date of the records already read from the blob, if any
+
+        Returns:
+            list[str]:
+        """
+        raise NotImplementedError
+
+    def iter_blob_records(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+        """
+        Parse the records of a blob, as its inflated chunks are received.
+
+        By default, the records of JSON documents (`{"records": [...]}`) or of JSON lines.
+
+        Args:
+            chunks: AsyncIterable[bytes]
+
+        Returns:
+            AsyncIterator[Any]:
+        """
+        return iter_json_records(chunks)
+
     @property
     def last_event_date(self) -> datetime:
         """
@@ -100,19 +164,93 @@ class AbstractAzureBlobConnector(AsyncConnector, metaclass=ABCMeta):
 
             return last_event_date
 
+    def get_hourly_prefixes(self, lower_bound: datetime, upper_bound: datetime) -> list[str]:
+        """
+        Get the prefixes of the blobs written in the hours between the two bounds.
+
+        Args:
+            lower_bound: datetime
+            upper_bound: datetime
+
+        Returns:
+            list[str]:
+        """
+        prefixes: list[str] = []
+
+        current_hour = lower_bound.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        while current_hour <= upper_bound:
+            for template in self.blob_prefix_templates:
+                prefix = current_hour.strftime(template)
+                if prefix not in prefixes:
+                    prefixes.append(prefix)
+
+            current_hour += timedelta(hours=1)
+
+        return prefixes
+
     async def get_most_recent_blobs(self, lower_bound: datetime) -> AsyncGenerator[BlobProperties, None]:
         """
         Return the list of blobs, more recent than lower_bound.
 
+        When prefix templates are defined, only the prefixes of the hours between lower_bound and now are listed
+        and, for each prefix, only the blobs modified after the last one seen under it are returned.
+
         Args:
             lower_bound: datetime
 
         Returns:
             AsyncGenerator[BlobProperties, None]
         """
-        async for blob in self.azure_blob_wrapper().list_blobs():
-            if blob.last_modified > lower_bound:
-                yield blob
+        if not self.blob_prefix_templates:
+            async for blob in self.azure_blob_wrapper().list_blobs():
+                if blob.last_modified > lower_bound:
+                    self._blob_lower_bounds[blob.name] = lower_bound
+                    yield blob
+
+            return
+
+        with self.context as cache:
+            previous_markers: dict[str, str] = cache.get("prefix_markers") or {}
+
+        # Only keep the markers of the prefixes in the current window
+        self._prefix_markers = {}
+        for prefix in self.get_hourly_prefixes(lower_bound, datetime.now(timezone.utc)):
+            marker = previous_markers.get(prefix)
+            prefix_lower_bound = isoparse(marker) if marker else lower_bound
+            self._prefix_markers[prefix] = prefix_lower_bound
+
+            async for blob in self.azure_blob_wrapper().list_blobs(name_starts_with=prefix):
+                if blob.last_modified > prefix_lower_bound:
+                    if blob.last_modified > self._prefix_markers[prefix]:
+                        self._prefix_markers[prefix] = blob.last_modified
+
+                    # The records of the blob are filtered with the marker of its prefix, not the one of the cycle
+                    self._blob_lower_bounds[blob.name] = prefix_lower_bound
+                    yield blob
+
+    async def get_blob_records(
+        self, blob_name: str, lower_bound: datetime | None = None
+    ) -> AsyncGenerator[list[str], None]:
+        """
+        Stream the content of a blob, inflate it on the fly if compressed, and extract its records by batches.
+
+        Args:
+            blob_name: str
+            lower_bound: datetime | None: the date of the records already read from the blob, if any
+
+        Yields:
+            list[str]:
+        """
+        batch: list[Any] = []
+        chunks = inflate_chunks(self.azure_blob_wrapper().stream_blob(blob_name))
+        async for record in self.iter_blob_records(chunks):
+            batch.append(record)
+            if len(batch) >= self.limit_of_events_to_push:
+                yield self.filter_blob_records(batch, lower_bound)
+                batch = []
+
+        if batch:
+            yield self.filter_blob_records(batch, lower_bound)
 
     async def get_azure_blob_data(self) -> list[str]:
         """
@@ -122,6 +260,7 @@ class AbstractAzureBlobConnector(AsyncConnector, metaclass=ABCMeta):
             list[str]:
         """
         _last_modified_date = self.last_event_date
+        self._blob_lower_bounds = {}
 
         # Get the blobs more recent than _last_modified_date
         logger.info(
@@ -131,41 +270,48 @@ class AbstractAzureBlobConnector(AsyncConnector, metaclass=ABCMeta):
 
         records: list[str] = []
         result: list[str] = []
-
-        # For each blob
-        async for blob in self.get_most_recent_blobs(_last_modified_date):
-            logger.info(
-                "Process blob {name} modified at {modified_at}",
-                name=blob.name,
-                modified_at=blob.last_modified.isoformat(),
-            )
-            # Save the most recent date seen
-            if _last_modified_date is None or blob.last_modified > _last_modified_date:
-                _last_modified_date = blob.last_modified
-
-            # Get the content of the current blob
-            file, content = await self.azure_blob_wrapper().download_blob(blob.name, download=True)
-
-            # process the downloaded blob
-            if file:
-                async with aiofiles.open(file, "rb") as file_data:
-                    file_content = await file_data.read()
-
-                    if is_gzip_compressed(file_content):
-                        file_content = decompress(file_content)
-
-                    records.extend(self.filter_blob_data(file_content.decode("utf-8")))
-
-                await delete_file(file)
-
-            # process the content of the blob
-            if content:
-                records.extend(self.filter_blob_data(content.decode("utf-8")))
-
-            # Push the events if exceed the defined threshold
-            if len(records) >= self.limit_of_events_to_push:
-                result.extend(await self.push_data_to_intakes(events=records))
-                records = []
+        pending: set[asyncio.Task[None]] = set()
+
+        async def forward_blob(blob_name: str) -> None:
+            nonlocal records
+
+            async for batch in self.get_blob_records(blob_name, self._blob_lower_bounds.get(blob_name)):
+                records.extend(batch)
+
+                # Push the events if exceed the defined threshold
+                if len(records) >= self.limit_of_events_to_push:
+                    events, records = records, []
+                    result.extend(await self.push_data_to_intakes(events=events))
+
+        async def collect(done: set[asyncio.Task[None]]) -> None:
+            for task in done:
+                task.result()
+
+        try:
+            # For each blob
+            async for blob in self.get_most_recent_blobs(_last_modified_date):
+                logger.info(
+                    "Process blob {name} modified at {modified_at}",
+                    name=blob.name,
+                    modified_at=blob.last_modified.isoformat(),
+                )
+                # Save the most recent date seen
+                if _last_modified_date is None or blob.last_modified > _last_modified_date:
+                    _last_modified_date = blob.last_modified
+
+                # Read the blobs concurrently, up to the defined limit
+                pending.add(asyncio.create_task(forward_blob(blob.name)))
+                if len(pending) >= self.max_concurrent_blobs:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    await collect(done)
+
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                await collect(done)
+        finally:
+            self._blob_lower_bounds = {}
+            for task in pending:
+                task.cancel()
 
         # Push the remaining events
         if records:
@@ -178,6 +324,10 @@ class AbstractAzureBlobConnector(AsyncConnector, metaclass=ABCMeta):
             )
 
             cache["last_event_date"] = _last_modified_date.isoformat()
+            if self.blob_prefix_templates:
+                cache["prefix_markers"] = {
+                    prefix: marker.isoformat() for prefix, marker in self._prefix_markers.items()
+                }
 
         return result
 
@@ -1,5 +1,9 @@
 """Default Azure Blob Storage connector."""
 
+from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator
+
+from azure_helpers.io import iter_lines
 from connectors.blob import AbstractAzureBlobConnector
 
 
@@ -18,4 +22,30 @@ class AzureBlobConnector(AbstractAzureBlobConnector):
         Returns:
             list[dict[str, Any]]:
         """
-        return [line for line in data.split("\n") if line != ""]
+        return self.filter_blob_records(data.split("\n"))
+
+    def filter_blob_records(self, records: list[Any], lower_bound: datetime | None = None) -> list[str]:
+        """
+        Exclude empty lines.
+
+        Args:
+            records: list[Any]
+            lower_bound: datetime | None
+
+        Returns:
+            list[str]:
+        """
+        return [line for line in records if line != ""]
+
+    async def iter_blob_records(self, chunks: AsyncIterable[bytes]) -> AsyncIterator[Any]:
+        """
+        Split the blob in lines.
+
+        Args:
+            chunks: AsyncIterable[bytes]
+
+        Yields:
+            str:
+        """
+        async for line in iter_lines(chunks):
+            yield line.decode("utf-8")
@@ -1,55 +1,261 @@
 """Default Azure Key Vault connector."""
 
-from datetime import timezone
+import os
+import re
+from datetime import datetime, timezone
+from typing import Any
 
 import orjson
 from dateutil.parser import isoparse
 
 from connectors.blob import AbstractAzureBlobConnector
 
+# Fields of the flow tuples, and their types, by version of the flow logs
+# https://learn.microsoft.com/en-us/azure/network-watcher/nsg-flow-logs-overview#log-format
+FLOW_TUPLE_FIELDS_V1: tuple[tuple[str, type], ...] = (
+    ("timestamp", int),
+    ("source_ip", str),
+    ("destination_ip", str),
+    ("source_port", int),
+    ("destination_port", int),
+    ("protocol", str),
+    ("direction", str),
+    ("decision", str),
+)
+# Version 2 adds the state of the flow and its volumes
+FLOW_TUPLE_FIELDS_V2: tuple[tuple[str, type], ...] = FLOW_TUPLE_FIELDS_V1 + (
+    ("state", str),
+    ("packets_sent", int),
+    ("bytes_sent", int),
+    ("packets_received", int),
+    ("bytes_received", int),
+)
+# VNet flow logs (version 4)
+# https://learn.microsoft.com/en-us/azure/network-watcher/vnet-flow-logs-overview#log-format
+FLOW_TUPLE_FIELDS: tuple[tuple[str, type], ...] = (
+    ("timestamp", int),
+    ("source_ip", str),
+    ("destination_ip", str),
+    ("source_port", int),
+    ("destination_port", int),
+    ("protocol", int),
+    ("direction", str),
+    ("state", str),
+    ("encryption", str),
+    ("packets_sent", int),
+    ("bytes_sent", int),
+    ("packets_received", int),
+    ("bytes_received", int),
+)
+
+
+class FlowTupleLayout:
+    """
+    Split and serialize the flow tuples of a version of the flow logs.
+
+    The tuples made of plain values (digits for the numbers, letters, digits, dots and colons for the others)
+    are matched by a single regular expression and serialized with a template, without intermediate objects.
+    """
+
+    def __init__(self, fields: tuple[tuple[str, type], ...]) -> None:
+        """
+        Initialize FlowTupleLayout.
+
+        Args:
+            fields: tuple[tuple[str, type], ...]: the fields of the tuples and their types
+        """
+        self.fields = fields
+        self._pattern = re.compile(
+            ",".join("(0|[1-9][0-9]*)" if field_type is int else "([0-9A-Za-z.:]+)" for _, field_type in fields)
+        )
+        self._template = ",".join(
+            f'"{name}":%s' if field_type is int else f'"{name}":"%s"' for name, field_type in fields
+        )
+
+    def split(self, flow_tuple: str) -> dict[str, Any]:
+        """
+        Split a flow tuple into typed fields.
+
+        The empty values are skipped and the ones that cannot be typed are kept as strings.
+
+        Args:
+            flow_tuple: str
+
+        Returns:
+            dict[str, Any]:
+        """
+        result: dict[str, Any] = {}
+        for (name, field_type), value in zip(self.fields, flow_tuple.split(",")):
+            if not value:
+                continue
+
+            try:
+                result[name] = field_type(value)
+            except ValueError:
+                result[name] = value
+
+        return result
+
+    def serialize(self, flow_tuple: str) -> str:
+        """
+        Serialize a flow tuple and its typed fields as the members `flow.0` and `flow` of a JSON object.
+
+        Args:
+            flow_tuple: str
+
+        Returns:
+            str: e.g. `"flow.0":"...","flow":{...}`
+        """
+        match = self._pattern.fullmatch(flow_tuple)
+        if match is not None:
+            return f'"flow.0":"{flow_tuple}","flow":{{{self._template % match.groups()}}}'
+
+        return "{0},{1}".format(
+            orjson.dumps({"flow.0": flow_tuple}).decode("utf-8")[1:-1],
+            orjson.dumps({"flow": self.split(flow_tuple)}).decode("utf-8")[1:-1],
+        )
+
+
+FLOW_TUPLE_LAYOUTS: dict[int, FlowTupleLayout] = {
+    1: FlowTupleLayout(FLOW_TUPLE_FIELDS_V1),
+    2: FlowTupleLayout(FLOW_TUPLE_FIELDS_V2),
+}
+DEFAULT_FLOW_TUPLE_LAYOUT = FlowTupleLayout(FLOW_TUPLE_FIELDS)
+
+
+def get_flow_tuple_layout(version: Any) -> FlowTupleLayout:
+    """
+    Get the layout of the flow tuples of a version of the flow logs.
+
+    Args:
+        version: Any: the version of the flow logs, e.g. 2
+
+    Returns:
+        FlowTupleLayout: the layout of the VNet flow logs for the other versions
+    """
+    return FLOW_TUPLE_LAYOUTS.get(version, DEFAULT_FLOW_TUPLE_LAYOUT)
+
+
+def parse_record_time(value: str) -> datetime:
+    """
+    Parse the time of a record.
+
+    Azure writes the times with a fixed format (e.g. `2022-09-14T09:00:52.5625085Z`), parsed here without isoparse.
+    As isoparse, the fraction of seconds is truncated to the microseconds.
+
+    Args:
+        value: str
+
+    Returns:
+        datetime:
+    """
+    if len(value) >= 20 and value[10] == "T" and value[-1] == "Z" and value[19] in ".Z":
+        fraction = value[20:-1]
+        if not fraction or fraction.isdigit():
+            try:
+                return datetime(
+                    int(value[0:4]),
+                    int(value[5:7]),
+                    int(value[8:10]),
+                    int(value[11:13]),
+                    int(value[14:16]),
+                    int(value[17:19]),
+                    int(fraction[:6].ljust(6, "0")) if fraction else 0,
+                    tzinfo=timezone.utc,
+                )
+            except ValueError:
+                pass
+
+    return isoparse(value).astimezone(timezone.utc)
+
+
+def split_flow_tuple(flow_tuple: str, version: Any = 4) -> dict[str, Any]:
+    """
+    Split a flow tuple into typed fields.
+
+    Args:
+        flow_tuple: str
+        version: Any: the version of the flow logs
+
+    Returns:
+        dict[str, Any]:
+    """
+    return get_flow_tuple_layout(version).split(flow_tuple)
+
 
 class AzureFlowLogsConnector(AbstractAzureBlobConnector):
     """Azure Network Watcher connector."""
 
     name = "AzureFlowLogsConnector"
 
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        """Init AzureFlowLogsConnector."""
+        super().__init__(*args, **kwargs)
+        # Off by default: the typed fields about double the size of the events and the serialization time
+        self.split_flow_tuples = os.getenv("AZURE_FLOW_LOGS_SPLIT_TUPLES", "false").lower() in ("1", "true", "yes")
+
     def filter_blob_data(self, data: str) -> list[str]:
         """
         Format blob data.
 
+        Args:
+            data: str
+
+        Returns:
+            list[str]:
+        """
+        return self.filter_blob_records(orjson.loads(data).get("records", []))
+
+    def filter_blob_records(self, records: list[Any], lower_bound: datetime | None = None) -> list[str]:
+        """
+        Format the records of a blob.
+
         Main purpose of this function is to format input data to supported intake format:
             https://learn.microsoft.com/en-us/azure/network-watcher/vnet-flow-logs-overview
 
+        Each flow tuple is serialized as a record. The fields shared by the tuples of a record, a flow and a flow group
+        are serialized once and the tuples are appended to them.
+
         Args:
-            data: dict[Any, Any]
-            time_filter: datetime | None
+            records: list[Any]
+            lower_bound: datetime | None: the date of the records already read from the blob, if any
 
         Returns:
-            list[dict[Any, Any]]:
+            list[str]:
         """
-        modified_result = []
-        time_filter = self.last_event_date
+        modified_result: list[str] = []
+        time_filter = lower_bound or self.last_event_date
 
-        for record in orjson.loads(data).get("records", []):
-            record_time = isoparse(record["time"]).astimezone(timezone.utc)
+        for record in records:
+            record_time = parse_record_time(record["time"])
 
             # If the record is too old, ignore it.
             if time_filter and record_time < time_filter:
                 continue
 
-            result = {
-                "time": record_time,
-                "flowLogVersion": record["flowLogVersion"],
-                "flowLogGUID": record["flowLogGUID"],
-                "macAddress": record["macAddress"],
-                "operationName": record["operationName"],
-            }
+            # Serialize the common fields, without the closing brace
+            record_prefix = orjson.dumps(
+                {
+                    "time": record_time,
+                    "flowLogVersion": record["flowLogVersion"],
+                    "flowLogGUID": record["flowLogGUID"],
+                    "macAddress": record["macAddress"],
+                    "operationName": record["operationName"],
+                }
+            )[:-1].decode("utf-8")
+
+            layout = get_flow_tuple_layout(record["flowLogVersion"])
 
             for flow in record.get("flowRecords", {}).get("flows", []):
+                flow_prefix = f'{record_prefix},"aclID":{orjson.dumps(flow["aclID"]).decode("utf-8")}'
+
                 for group in flow.get("flowGroups", []):
+                    group_prefix = f'{flow_prefix},"rule":{orjson.dumps(group["rule"]).decode("utf-8")},'
+
                     for entry in group.get("flowTuples", []):
-                        modified_result.append(
-                            {**result, "aclID": flow["aclID"], "rule": group["rule"], "flow.0": entry}
-                        )
+                        if self.split_flow_tuples:
+                            modified_result.append(f"{group_prefix}{layout.serialize(entry)}}}")
+                        else:
+                            modified_result.append(f'{group_prefix}"flow.0":{orjson.dumps(entry).decode("utf-8")}}}')
 
-        return [orjson.dumps(value).decode("utf-8") for value in modified_result]
+        return modified_result
@@ -1,5 +1,8 @@
 """Default Azure Key Vault connector."""
 
+from datetime import datetime
+from typing import Any
+
 import orjson
 
 from connectors.blob import AbstractAzureBlobConnector
@@ -25,4 +28,17 @@ class AzureKeyVaultConnector(AbstractAzureBlobConnector):
         except orjson.JSONDecodeError:
             result = [orjson.loads(value) for value in data.split("\n") if value != ""]
 
-        return [orjson.dumps(value).decode("utf-8") for value in result]
+        return self.filter_blob_records(result)
+
+    def filter_blob_records(self, records: list[Any], lower_bound: datetime | None = None) -> list[str]:
+        """
+        Serialize key vault events.
+
+        Args:
+            records: list[Any]
+            lower_bound: datetime | None
+
+        Returns:
+            list[str]:
+        """
+        return [orjson.dumps(value).decode("utf-8") for value in records]
@@ -1,6 +1,7 @@
 """Default Azure Key Vault connector."""
 
-from datetime import timezone
+from datetime import datetime, timezone
+from typing import Any
 
 import orjson
 from dateutil.parser import isoparse
@@ -17,19 +18,31 @@ class AzureNetworkWatcherConnector(AbstractAzureBlobConnector):
         """
         Format blob data.
 
+        Args:
+            data: str
+
+        Returns:
+            list[str]:
+        """
+        return self.filter_blob_records(orjson.loads(data).get("records", []))
+
+    def filter_blob_records(self, records: list[Any], lower_bound: datetime | None = None) -> list[str]:
+        """
+        Format the records of a blob.
+
         Main purpose of this function is to format input data to supported intake format:
             https://learn.microsoft.com/en-us/azure/network-watcher/vnet-flow-logs-overview
 
         Args:
-            data: dict[Any, Any]
-            time_filter: datetime | None
+            records: list[Any]
+            lower_bound: datetime | None: the date of the records already read from the blob, if any
 
         Returns:
-            list[dict[Any, Any]]:
+            list[str]:
         """
         modified_result = []
-        time_filter = self.last_event_date
-        for line in orjson.loads(data).get("records", []):
+        time_filter = lower_bound or self.last_event_date
+        for line in records:
             line_time = isoparse(line["time"]).astimezone(timezone.utc)
 
             # If the record is too old, ignore it.
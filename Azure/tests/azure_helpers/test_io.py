@@ -0,0 +1,178 @@
+"""Tests related to io helpers."""
+
+import gzip
+
+import orjson
+import pytest
+
+from azure_helpers.io import (
+    JSON_DOCUMENT_MAX_SIZE,
+    JSONRecordsParser,
+    inflate_chunks,
+    is_gzip_compressed,
+    iter_json_records,
+    iter_lines,
+    parse_json_records,
+)
+
+
+async def iterate(chunks: list[bytes]):
+    for chunk in chunks:
+        yield chunk
+
+
+def split(content: bytes, size: int) -> list[bytes]:
+    return [content[index : index + size] for index in range(0, len(content), size)]
+
+
+def test_is_gzip_compressed():
+    assert is_gzip_compressed(gzip.compress(b"hello")) is True
+    assert is_gzip_compressed(b"hello") is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 3, 1024])
+async def test_inflate_chunks_plain(size):
+    content = b'{"records": []}\n' * 100
+
+    assert b"".join([chunk async for chunk in inflate_chunks(iterate(split(content, size)))]) == content
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 3, 1024])
+async def test_inflate_chunks_gzip(size):
+    content = b'{"records": []}\n' * 100
+    # Two concatenated gzip members
+    compressed = gzip.compress(content) + gzip.compress(content)
+
+    inflated = b"".join([chunk async for chunk in inflate_chunks(iterate(split(compressed, size)))])
+
+    assert inflated == content + content
+
+
+@pytest.mark.asyncio
+async def test_inflate_chunks_short():
+    assert [chunk async for chunk in inflate_chunks(iterate([b"a"]))] == [b"a"]
+    assert [chunk async for chunk in inflate_chunks(iterate([]))] == []
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 7, 1024])
+async def test_inflate_chunks_gzip_with_padding(size):
+    content = b'{"records": []}\n' * 100
+    compressed = gzip.compress(content) + b"\x00" * 10 + gzip.compress(content) + b"\x00" * 3
+
+    inflated = b"".join([chunk async for chunk in inflate_chunks(iterate(split(compressed, size)))])
+
+    assert inflated == content + content
+
+
+@pytest.mark.asyncio
+async def test_inflate_chunks_truncated():
+    compressed = gzip.compress(b'{"records": []}\n' * 100)
+
+    with pytest.raises(EOFError):
+        [chunk async for chunk in inflate_chunks(iterate(split(compressed[:-10], 16)))]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("size", [1, 3, 1024])
+async def test_iter_lines(size):
+    content = b"first\n\n" + b"a" * 5000 + b"\nlast"
+
+    lines = [line async for line in iter_lines(iterate(split(content, size)))]
+
+    assert lines == [b"first", b"", b"a" * 5000, b"last"]
+
+
+async def json_records(content: bytes, size: int, max_document_size: int) -> list:
+    return [
+        record
+        async for record in iter_json_records(iterate(split(content, size)), max_document_size=max_document_size)
+    ]
+
+
+# The blobs are parsed at once, or streamed
+MAX_DOCUMENT_SIZES = [JSON_DOCUMENT_MAX_SIZE, 0]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_document_size", MAX_DOCUMENT_SIZES)
+@pytest.mark.parametrize("size", [1, 5, 1024])
+async def test_iter_json_records_envelope(size, max_document_size):
+    records = [
+        {"time": "2024-01-01T00:00:00Z", "nested": {"list": [1, {"a": "}]"}]}, "text": 'quote \\" and \\\\'},
+        {"time": "2024-01-01T00:01:00Z", "records": [{"not": "split"}]},
+    ]
+    content = orjson.dumps({"other": "records", "records": records, "after": [{"ignored": True}]})
+
+    assert await json_records(content, size, max_document_size) == records
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_document_size", MAX_DOCUMENT_SIZES)
+@pytest.mark.parametrize("size", [1, 5, 1024])
+async def test_iter_json_records_lines(size, max_document_size):
+    records = [{"id": index, "values": [index, {"key": "value"}]} for index in range(10)]
+    content = b"\n".join(orjson.dumps(record) for record in records) + b"\n"
+
+    assert await json_records(content, size, max_document_size) == records
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_document_size", MAX_DOCUMENT_SIZES)
+@pytest.mark.parametrize("size", [1, 3, 1024])
+@pytest.mark.parametrize(
+    "content,records",
+    [
+        # every element of the records array is a record
+        (
+            b'{"records": [1, "a", null, [1, [2]], {"x": 1}, true, -1.5e3, ""]}',
+            [1, "a", None, [1, [2]], {"x": 1}, True, -1500.0, ""],
+        ),
+        (b'{"records": []}', []),
+        # every line is a record, including the scalars and the objects without records
+        (b'1\n"a"\n{"x": 1}\n[1]\nnull\n12345\n', [1, "a", {"x": 1}, [1], None, 12345]),
+        (b'{"x": 1}\n{"y": 2}\n', [{"x": 1}, {"y": 2}]),
+        # a single object without records has no record
+        (b'{"x": 1}', []),
+        (b'{"x": 1}\n', []),
+        (b"", []),
+    ],
+)
+async def test_iter_json_records_emission_rules(content, records, size, max_document_size):
+    assert parse_json_records(content) == records
+    assert await json_records(content, size, max_document_size) == records
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("max_document_size", MAX_DOCUMENT_SIZES)
+@pytest.mark.parametrize("content", [b"[1, 2]", b"12", b'"text"'])
+async def test_iter_json_records_not_an_object(content, max_document_size):
+    with pytest.raises(ValueError):
+        parse_json_records(content)
+
+    with pytest.raises(ValueError):
+        await json_records(content, 1, max_document_size)
+
+
+def test_json_records_parser_keeps_only_the_pending_record():
+    parser = JSONRecordsParser()
+    assert parser.feed(b'{"records": [') == []
+
+    for index in range(100):
+        assert parser.feed(b'{"id": %d},' % index) == [{"id": index}]
+        # the parsed records are dropped from the buffer
+        assert len(parser._buffer) <= 1
+
+    assert parser.feed(b'{"id": "last"') == []
+    assert parser.feed(b"}]}") == [{"id": "last"}]
+    parser.close()
+
+
+def test_json_records_parser_truncated():
+    parser = JSONRecordsParser()
+    assert parser.feed(b'{"records": [{"id": 1}, {"id"') == [{"id": 1}]
+
+    with pytest.raises(ValueError):
+        parser.close()
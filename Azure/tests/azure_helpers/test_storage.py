@@ -1,7 +1,6 @@
 """Tests related to storage wrapper."""
 
 import datetime
-import os
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -89,36 +88,28 @@ async def test_list_blobs(wrapper, session_faker):
 
 
 @pytest.mark.asyncio
-async def test_download_blob_without_file(wrapper, blob_content, session_faker):
+async def test_list_blobs_with_prefix(wrapper):
     """
-    Test get blob content.
+    Test list blobs restricted to a prefix.
 
     Args:
         wrapper: AzureBlobStorageWrapper
-        blob_content: bytes
-        session_faker: Faker
     """
     client_mock = MagicMock()
-
-    blob_client = AsyncMock()
-    mocked_stream = AsyncMock()
-    mocked_stream.readall.return_value = blob_content
-
-    blob_client.download_blob.return_value = mocked_stream
-
-    client_mock.get_blob_client.return_value = blob_client
-
     wrapper._client = client_mock
 
-    result = await wrapper.download_blob(session_faker.word(), False)
+    wrapper.list_blobs(name_starts_with="y=2024/m=01/d=01/h=10/")
+    client_mock.list_blobs.assert_called_once_with(name_starts_with="y=2024/m=01/d=01/h=10/")
 
-    assert result == (None, blob_content)
+    client_mock.list_blobs.reset_mock()
+    wrapper.list_blobs()
+    client_mock.list_blobs.assert_called_once_with()
 
 
 @pytest.mark.asyncio
-async def test_download_blob_with_file(wrapper, blob_content, session_faker):
+async def test_stream_blob(wrapper, blob_content, session_faker):
     """
-    Test get blob content.
+    Test stream blob content.
 
     Args:
         wrapper: AzureBlobStorageWrapper
@@ -130,7 +121,7 @@ async def test_download_blob_with_file(wrapper, blob_content, session_faker):
     blob_client = AsyncMock()
     mocked_stream = AsyncMock()
     mocked_stream.chunks = MagicMock()
-    mocked_stream.chunks.__aiter__.return_value = [blob_content]
+    mocked_stream.chunks.return_value.__aiter__.return_value = [blob_content[:5], blob_content[5:]]
 
     blob_client.download_blob.return_value = mocked_stream
 
@@ -138,8 +129,6 @@ async def test_download_blob_with_file(wrapper, blob_content, session_faker):
 
     wrapper._client = client_mock
 
-    result, _ = await wrapper.download_blob(session_faker.word(), True)
-
-    assert result is not None
+    result = [chunk async for chunk in wrapper.stream_blob(session_faker.word())]
 
-    os.remove(result)
+    assert b"".join(result) == blob_content
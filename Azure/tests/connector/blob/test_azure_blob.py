@@ -1,11 +1,12 @@
 """Tests related to connector."""
 
+import asyncio
+import gzip
 from datetime import datetime, timedelta, timezone
 from gzip import GzipFile
-from tempfile import NamedTemporaryFile
-from unittest.mock import AsyncMock, MagicMock
+from io import BytesIO
+from unittest.mock import MagicMock
 
-import aiofiles
 import pytest
 from azure.storage.blob import BlobProperties
 from sekoia_automation.module import Module
@@ -121,10 +122,10 @@ async def test_azure_blob_get_azure_blob_data_1(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (None, blob_content)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [blob_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -153,9 +154,7 @@ async def test_azure_blob_get_azure_blob_data_2(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    async with aiofiles.tempfile.NamedTemporaryFile("wb", delete=False, dir="") as file:
-        file_name = str(file.name)
-        await file.write(blob_content)
+    file_content = blob_content
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -170,10 +169,10 @@ async def test_azure_blob_get_azure_blob_data_2(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -202,9 +201,10 @@ async def test_azure_blob_get_azure_blob_data_3(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    with NamedTemporaryFile("wb", delete=False, dir="") as file, GzipFile(fileobj=file, mode="w+") as gfile:
-        file_name = str(file.name)
+    buffer = BytesIO()
+    with GzipFile(fileobj=buffer, mode="wb") as gfile:
         gfile.write(blob_content)
+    file_content = buffer.getvalue()
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -219,10 +219,10 @@ async def test_azure_blob_get_azure_blob_data_3(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -251,8 +251,8 @@ async def test_azure_blob_get_azure_blob_data_4(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    with NamedTemporaryFile("wb", delete=False, dir="") as file, GzipFile(fileobj=file, mode="w+") as gfile:
-        file_name = str(file.name)
+    buffer = BytesIO()
+    with GzipFile(fileobj=buffer, mode="wb") as gfile:
         gfile.write(blob_content)
         gfile.write(b"\n")
         gfile.write(b"\n")
@@ -263,6 +263,7 @@ async def test_azure_blob_get_azure_blob_data_4(
         gfile.write(b"\n")
         gfile.write(blob_content)
         gfile.write(b"\n")
+    file_content = buffer.getvalue()
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -277,10 +278,10 @@ async def test_azure_blob_get_azure_blob_data_4(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -335,3 +336,224 @@ async def test_azure_blob_get_most_recent_blob(
     blobs_list = [n async for n in connector.get_most_recent_blobs(lower_bound=current_date + timedelta(minutes=2))]
 
     assert blobs_list == [properties2, properties3]
+
+
+def test_azure_blob_get_hourly_prefixes(connector: AzureBlobConnector):
+    """
+    Test the prefixes of the hours between two dates.
+
+    Args:
+        connector: AzureBlobConnector
+    """
+    connector.blob_prefix_templates = ["y=%Y/m=%m/d=%d/h=%H/"]
+
+    prefixes = connector.get_hourly_prefixes(
+        datetime(2024, 1, 1, 22, 45, tzinfo=timezone.utc), datetime(2024, 1, 2, 0, 10, tzinfo=timezone.utc)
+    )
+
+    assert prefixes == ["y=2024/m=01/d=01/h=22/", "y=2024/m=01/d=01/h=23/", "y=2024/m=01/d=02/h=00/"]
+
+
+@pytest.mark.asyncio
+async def test_azure_blob_get_azure_blob_data_with_prefixes(
+    connector: AzureBlobConnector, session_faker, blob_content, pushed_events_ids
+):
+    """
+    Test AzureBlobConnector only lists the hourly prefixes and keeps a marker per prefix.
+
+    Args:
+        connector: AzureBlobConnector
+        session_faker: Faker
+        blob_content: bytes
+        pushed_events_ids: list[str]
+    """
+    connector.blob_prefix_templates = ["y=%Y/m=%m/d=%d/h=%H/"]
+
+    current_date = datetime.now(timezone.utc).replace(microsecond=0)
+    lower_bound = current_date - timedelta(minutes=30)
+    current_prefix = current_date.strftime("y=%Y/m=%m/d=%d/h=%H/")
+    previous_prefix = (current_date - timedelta(hours=1)).strftime("y=%Y/m=%m/d=%d/h=%H/")
+
+    with connector.context as cache:
+        cache["last_event_date"] = lower_bound.isoformat()
+        cache["prefix_markers"] = {
+            current_prefix: (current_date - timedelta(minutes=10)).isoformat(),
+            "y=2000/m=01/d=01/h=00/": current_date.isoformat(),
+        }
+
+    old_blob = BlobProperties()
+    old_blob.last_modified = current_date - timedelta(minutes=20)
+    old_blob.name = current_prefix + "old.json"
+
+    new_blob = BlobProperties()
+    new_blob.last_modified = current_date - timedelta(minutes=5)
+    new_blob.name = current_prefix + "new.json"
+
+    blobs_by_prefix = {current_prefix: [old_blob, new_blob]}
+
+    def list_blobs(name_starts_with=None):
+        mock_list_blobs = MagicMock()
+        mock_list_blobs.__aiter__.return_value = blobs_by_prefix.get(name_starts_with, [])
+        return mock_list_blobs
+
+    azure_blob_storage_wrapper = MagicMock()
+    azure_blob_storage_wrapper.list_blobs.side_effect = list_blobs
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [blob_content]
+
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
+    connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
+
+    result = await connector.get_azure_blob_data()
+
+    assert result == [blob_content.decode("utf-8")]
+    listed_prefixes = [
+        call.kwargs["name_starts_with"] for call in azure_blob_storage_wrapper.list_blobs.call_args_list
+    ]
+    assert current_prefix in listed_prefixes
+    assert set(listed_prefixes) <= {previous_prefix, current_prefix}
+    azure_blob_storage_wrapper.stream_blob.assert_called_once_with(new_blob.name)
+
+    with connector.context as cache:
+        assert cache["prefix_markers"][current_prefix] == new_blob.last_modified.isoformat()
+        assert "y=2000/m=01/d=01/h=00/" not in cache["prefix_markers"]
+
+
+@pytest.mark.asyncio
+async def test_azure_blob_get_azure_blob_data_concurrently(
+    connector: AzureBlobConnector, session_faker, blob_content, pushed_events_ids
+):
+    """
+    Test AzureBlobConnector reads several blobs concurrently, streaming and inflating their chunks.
+
+    Args:
+        connector: AzureBlobConnector
+        session_faker: Faker
+        blob_content: bytes
+        pushed_events_ids: list[str]
+    """
+    connector.max_concurrent_blobs = 2
+    connector.limit_of_events_to_push = 2
+
+    current_date = datetime.now(timezone.utc).replace(microsecond=0)
+
+    with connector.context as cache:
+        cache["last_event_date"] = (current_date - timedelta(minutes=30)).isoformat()
+
+    blobs = []
+    for index in range(5):
+        properties = BlobProperties()
+        properties.last_modified = current_date - timedelta(minutes=index)
+        properties.name = f"blob-{index}"
+        blobs.append(properties)
+
+    mock_list_blobs = MagicMock()
+    mock_list_blobs.__aiter__.return_value = blobs
+
+    compressed = gzip.compress(blob_content)
+    running = 0
+    max_running = 0
+
+    async def stream_blob(name):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        for index in range(0, len(compressed), 4):
+            await asyncio.sleep(0)
+            yield compressed[index : index + 4]
+        running -= 1
+
+    azure_blob_storage_wrapper = MagicMock()
+    azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
+    azure_blob_storage_wrapper.stream_blob.side_effect = stream_blob
+    connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
+
+    result = await connector.get_azure_blob_data()
+
+    assert result == [blob_content.decode("utf-8")] * 5
+    assert max_running == 2
+    assert connector.push_data_to_intakes.await_count >= 2
+
+    with connector.context as cache:
+        assert cache["last_event_date"] == current_date.isoformat()
+
+
+@pytest.mark.asyncio
+async def test_azure_blob_get_azure_blob_data_failure(connector: AzureBlobConnector, session_faker, blob_content):
+    """
+    Test AzureBlobConnector doesn't save the checkpoint when a blob can't be read.
+
+    Args:
+        connector: AzureBlobConnector
+        session_faker: Faker
+        blob_content: bytes
+    """
+    current_date = datetime.now(timezone.utc).replace(microsecond=0)
+    last_event_date = (current_date - timedelta(minutes=30)).isoformat()
+
+    with connector.context as cache:
+        cache["last_event_date"] = last_event_date
+
+    properties = BlobProperties()
+    properties.last_modified = current_date
+    properties.name = session_faker.word()
+
+    mock_list_blobs = MagicMock()
+    mock_list_blobs.__aiter__.return_value = [properties]
+
+    async def stream_blob(name):
+        yield blob_content
+        raise ConnectionError("connection reset")
+
+    azure_blob_storage_wrapper = MagicMock()
+    azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
+    azure_blob_storage_wrapper.stream_blob.side_effect = stream_blob
+    connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
+
+    with pytest.raises(ConnectionError):
+        await connector.get_azure_blob_data()
+
+    with connector.context as cache:
+        assert cache["last_event_date"] == last_event_date
+
+
+@pytest.mark.asyncio
+async def test_azure_blob_get_azure_blob_data_streams_records(connector: AzureBlobConnector):
+    """
+    Test AzureBlobConnector pushes the records of a blob while it is still downloaded.
+
+    Args:
+        connector: AzureBlobConnector
+    """
+    connector.limit_of_events_to_push = 10
+
+    current_date = datetime.now(timezone.utc).replace(microsecond=0)
+    with connector.context as cache:
+        cache["last_event_date"] = (current_date - timedelta(minutes=30)).isoformat()
+
+    properties = BlobProperties()
+    properties.last_modified = current_date
+    properties.name = "blob"
+
+    mock_list_blobs = MagicMock()
+    mock_list_blobs.__aiter__.return_value = [properties]
+
+    lines = [f"line {index}" for index in range(100)]
+    pushes_during_download = []
+
+    async def stream_blob(name):
+        for line in lines:
+            pushes_during_download.append(connector.push_data_to_intakes.await_count)
+            yield f"{line}\n".encode("utf-8")
+
+    azure_blob_storage_wrapper = MagicMock()
+    azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
+    azure_blob_storage_wrapper.stream_blob.side_effect = stream_blob
+    connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
+
+    result = await connector.get_azure_blob_data()
+
+    assert result == lines
+    assert connector.push_data_to_intakes.await_count == 10
+    # the first records are pushed before the end of the blob
+    assert pushes_during_download[-1] == 9
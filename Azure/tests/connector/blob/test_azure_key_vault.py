@@ -2,10 +2,9 @@
 
 from datetime import datetime, timedelta, timezone
 from gzip import GzipFile
-from tempfile import NamedTemporaryFile
-from unittest.mock import AsyncMock, MagicMock
+from io import BytesIO
+from unittest.mock import MagicMock
 
-import aiofiles
 import pytest
 from azure.storage.blob import BlobProperties
 from orjson import orjson
@@ -119,10 +118,10 @@ async def test_azure_key_vault_get_azure_blob_data_1(connector: AzureKeyVaultCon
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (None, blob_content)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [blob_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -152,9 +151,7 @@ async def test_azure_key_vault_get_azure_blob_data_2(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    async with aiofiles.tempfile.NamedTemporaryFile("wb", delete=False, dir="") as file:
-        file_name = str(file.name)
-        await file.write(blob_content)
+    file_content = blob_content
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -169,10 +166,10 @@ async def test_azure_key_vault_get_azure_blob_data_2(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -202,9 +199,10 @@ async def test_azure_key_vault_get_azure_blob_data_3(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    with NamedTemporaryFile("wb", delete=False, dir="") as file, GzipFile(fileobj=file, mode="w+") as gfile:
-        file_name = str(file.name)
+    buffer = BytesIO()
+    with GzipFile(fileobj=buffer, mode="wb") as gfile:
         gfile.write(blob_content)
+    file_content = buffer.getvalue()
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -219,10 +217,10 @@ async def test_azure_key_vault_get_azure_blob_data_3(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -252,9 +250,10 @@ async def test_azure_key_vault_get_azure_blob_data_4(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    with NamedTemporaryFile("wb", delete=False, dir="") as file, GzipFile(fileobj=file, mode="w+") as gfile:
-        file_name = str(file.name)
+    buffer = BytesIO()
+    with GzipFile(fileobj=buffer, mode="wb") as gfile:
         gfile.write(blob_content_simple_format)
+    file_content = buffer.getvalue()
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -269,10 +268,10 @@ async def test_azure_key_vault_get_azure_blob_data_4(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -326,3 +325,32 @@ async def test_azure_key_vault_get_most_recent_blob(
     blobs_list = [n async for n in connector.get_most_recent_blobs(lower_bound=current_date + timedelta(minutes=2))]
 
     assert blobs_list == [properties2, properties3]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "content,expected",
+    [
+        (b'{"category": "AuditEvent"}', []),
+        (b'{"records": [{"id": 1}, "text"]}', ['{"id":1}', '"text"']),
+        (b'{"id": 1}\n{"id": 2}\n', ['{"id":1}', '{"id":2}']),
+    ],
+)
+async def test_azure_key_vault_get_blob_records(connector: AzureKeyVaultConnector, content, expected):
+    """
+    Test AzureKeyVaultConnector extracts the records like `filter_blob_data`.
+
+    Args:
+        connector: AzureKeyVaultConnector
+        content: bytes
+        expected: list[str]
+    """
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [content]
+    connector._azure_blob_storage_wrapper = MagicMock()
+    connector._azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
+
+    batches = [batch async for batch in connector.get_blob_records("blob")]
+
+    assert [record for batch in batches for record in batch] == expected
+    assert connector.filter_blob_data(content.decode("utf-8")) == expected
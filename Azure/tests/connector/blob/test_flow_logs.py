@@ -2,16 +2,22 @@
 
 from datetime import datetime, timedelta, timezone
 from gzip import GzipFile
-from tempfile import NamedTemporaryFile
-from unittest.mock import AsyncMock, MagicMock
+from io import BytesIO
+from unittest.mock import MagicMock, PropertyMock, patch
 
-import aiofiles
+import orjson
 import pytest
 from azure.storage.blob import BlobProperties
+from dateutil.parser import isoparse
 from sekoia_automation.module import Module
 
 from connectors.blob import AzureBlobConnectorConfig
-from connectors.blob.azure_flow_logs import AzureFlowLogsConnector
+from connectors.blob.azure_flow_logs import (
+    AzureFlowLogsConnector,
+    get_flow_tuple_layout,
+    parse_record_time,
+    split_flow_tuple,
+)
 from connectors.blob.azure_network_watcher import AzureNetworkWatcherConnector
 
 
@@ -100,10 +106,10 @@ async def test_flow_logs_get_network_watcher_data_1(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (None, flow_logs_content)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [flow_logs_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -132,9 +138,7 @@ async def test_flow_logs_get_network_watcher_data_2(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    async with aiofiles.tempfile.NamedTemporaryFile("wb", delete=False, dir="") as file:
-        file_name = str(file.name)
-        await file.write(flow_logs_content)
+    file_content = flow_logs_content
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -149,10 +153,10 @@ async def test_flow_logs_get_network_watcher_data_2(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -180,9 +184,10 @@ async def test_flow_logs_get_network_watcher_data_3(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    with NamedTemporaryFile("wb", delete=False, dir="") as file, GzipFile(fileobj=file, mode="w+") as gfile:
-        file_name = str(file.name)
+    buffer = BytesIO()
+    with GzipFile(fileobj=buffer, mode="wb") as gfile:
         gfile.write(flow_logs_content)
+    file_content = buffer.getvalue()
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -197,13 +202,299 @@ async def test_flow_logs_get_network_watcher_data_3(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
     result = await connector.get_azure_blob_data()
 
     assert result == connector.filter_blob_data(flow_logs_content.decode("utf-8"))
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        "2022-09-14T09:00:52.5625085Z",
+        "2022-09-14T09:00:52.5Z",
+        "2022-09-14T09:00:52Z",
+        "2022-09-14T09:00:52.562508+00:00",
+        "2022-09-14T11:00:52.562508+02:00",
+        "2022-09-14 09:00:52Z",
+    ],
+)
+def test_parse_record_time(value):
+    assert parse_record_time(value) == isoparse(value).astimezone(timezone.utc)
+
+
+def test_split_flow_tuple():
+    assert split_flow_tuple("1663146003606,1.2.3.4,192.0.2.180,23956,443,6,O,E,NX,3,767,2,1580") == {
+        "timestamp": 1663146003606,
+        "source_ip": "1.2.3.4",
+        "destination_ip": "192.0.2.180",
+        "source_port": 23956,
+        "destination_port": 443,
+        "protocol": 6,
+        "direction": "O",
+        "state": "E",
+        "encryption": "NX",
+        "packets_sent": 3,
+        "bytes_sent": 767,
+        "packets_received": 2,
+        "bytes_received": 1580,
+    }
+    assert split_flow_tuple("1663146003599,1.2.3.4,192.0.2.180,23956,443,6,O,B,NX,,,,") == {
+        "timestamp": 1663146003599,
+        "source_ip": "1.2.3.4",
+        "destination_ip": "192.0.2.180",
+        "source_port": 23956,
+        "destination_port": 443,
+        "protocol": 6,
+        "direction": "O",
+        "state": "B",
+        "encryption": "NX",
+    }
+
+
+def test_split_flow_tuple_by_version():
+    assert split_flow_tuple("1542110377,10.0.0.4,13.67.143.118,44931,443,T,O,A", version=1) == {
+        "timestamp": 1542110377,
+        "source_ip": "10.0.0.4",
+        "destination_ip": "13.67.143.118",
+        "source_port": 44931,
+        "destination_port": 443,
+        "protocol": "T",
+        "direction": "O",
+        "decision": "A",
+    }
+    assert split_flow_tuple("1542110377,10.0.0.4,13.67.143.118,44931,443,T,O,A,E,66,12873,55,8962", version=2) == {
+        "timestamp": 1542110377,
+        "source_ip": "10.0.0.4",
+        "destination_ip": "13.67.143.118",
+        "source_port": 44931,
+        "destination_port": 443,
+        "protocol": "T",
+        "direction": "O",
+        "decision": "A",
+        "state": "E",
+        "packets_sent": 66,
+        "bytes_sent": 12873,
+        "packets_received": 55,
+        "bytes_received": 8962,
+    }
+
+
+@pytest.mark.parametrize(
+    "version,flow_tuple",
+    [
+        (4, "1663146003606,1.2.3.4,192.0.2.180,23956,443,6,O,E,NX,3,767,2,1580"),
+        (4, "1663146003606,2001:db8::1,192.0.2.180,23956,443,6,O,E,NX,3,767,2,1580"),
+        # not serialized with the template
+        (4, "1663146003599,1.2.3.4,192.0.2.180,23956,443,6,O,B,NX,,,,"),
+        (4, "1663146003599,1.2.3.4,192.0.2.180,023956,443,6,O,B,NX,0,0,0,0"),
+        (4, '1663146003599,1.2.3.4,"192.0.2.180",23956,443,6,O,B,NX,0,0,0,0'),
+        (4, "1663146003599,1.2.3.4"),
+        (2, "1542110377,10.0.0.4,13.67.143.118,44931,443,T,O,A,E,66,12873,55,8962"),
+        (1, "1542110377,10.0.0.4,13.67.143.118,44931,443,T,O,A"),
+    ],
+)
+def test_flow_tuple_layout_serialize(version, flow_tuple):
+    assert orjson.loads("{%s}" % get_flow_tuple_layout(version).serialize(flow_tuple)) == {
+        "flow.0": flow_tuple,
+        "flow": split_flow_tuple(flow_tuple, version=version),
+    }
+
+
+def test_flow_logs_filter_blob_data(connector: AzureFlowLogsConnector):
+    """
+    Test the records produced for each flow tuple.
+
+    Args:
+        connector: AzureFlowLogsConnector
+    """
+    current_date = datetime.now(timezone.utc).replace(microsecond=0)
+    lower_bound = current_date - timedelta(minutes=30)
+
+    data = {
+        "records": [
+            {
+                "time": (current_date - timedelta(minutes=40)).strftime("%Y-%m-%dT%H:%M:%S.%f") + "5Z",
+                "flowLogVersion": 4,
+                "flowLogGUID": "guid0",
+                "macAddress": "112233445566",
+                "operationName": "FlowLogFlowEvent",
+                "flowRecords": {
+                    "flows": [{"aclID": "acl0", "flowGroups": [{"rule": "rule0", "flowTuples": ["old"]}]}]
+                },
+            },
+            {
+                "time": current_date.strftime("%Y-%m-%dT%H:%M:%S.%f") + "5Z",
+                "flowLogVersion": 4,
+                "flowLogGUID": "guid1",
+                "macAddress": "112233445566",
+                "operationName": "FlowLogFlowEvent",
+                "flowRecords": {
+                    "flows": [
+                        {
+                            "aclID": "acl1",
+                            "flowGroups": [
+                                {
+                                    "rule": 'rule "1"',
+                                    "flowTuples": [
+                                        "1663146003599,1.2.3.4,192.0.2.180,23956,443,6,O,B,NX,0,0,0,0",
+                                        "1663146003606,1.2.3.4,192.0.2.180,23956,443,6,O,E,NX,3,767,2,1580",
+                                    ],
+                                }
+                            ],
+                        }
+                    ]
+                },
+            },
+        ]
+    }
+
+    # The lower bound of the blob is used instead of the checkpoint of the context
+    with patch.object(AzureFlowLogsConnector, "last_event_date", new_callable=PropertyMock) as last_event_date:
+        result = connector.filter_blob_records(data["records"], lower_bound)
+        last_event_date.assert_not_called()
+
+    assert [orjson.loads(value) for value in result] == [
+        {
+            "time": current_date.isoformat(),
+            "flowLogVersion": 4,
+            "flowLogGUID": "guid1",
+            "macAddress": "112233445566",
+            "operationName": "FlowLogFlowEvent",
+            "aclID": "acl1",
+            "rule": 'rule "1"',
+            "flow.0": flow_tuple,
+        }
+        for flow_tuple in data["records"][1]["flowRecords"]["flows"][0]["flowGroups"][0]["flowTuples"]
+    ]
+
+    connector.split_flow_tuples = True
+    result = connector.filter_blob_records(data["records"], lower_bound)
+
+    assert [orjson.loads(value)["flow"] for value in result] == [
+        split_flow_tuple(flow_tuple)
+        for flow_tuple in data["records"][1]["flowRecords"]["flows"][0]["flowGroups"][0]["flowTuples"]
+    ]
+    assert (
+        orjson.loads(result[0])["flow.0"]
+        == data["records"][1]["flowRecords"]["flows"][0]["flowGroups"][0]["flowTuples"][0]
+    )
+
+    # The fields of the tuples depend on the version of the flow logs
+    data["records"][1]["flowLogVersion"] = 2
+    data["records"][1]["flowRecords"]["flows"][0]["flowGroups"][0]["flowTuples"] = [
+        "1542110377,10.0.0.4,13.67.143.118,44931,443,T,O,A,E,66,12873,55,8962"
+    ]
+    result = connector.filter_blob_records(data["records"], lower_bound)
+
+    assert [orjson.loads(value)["flow"] for value in result] == [
+        {
+            "timestamp": 1542110377,
+            "source_ip": "10.0.0.4",
+            "destination_ip": "13.67.143.118",
+            "source_port": 44931,
+            "destination_port": 443,
+            "protocol": "T",
+            "direction": "O",
+            "decision": "A",
+            "state": "E",
+            "packets_sent": 66,
+            "bytes_sent": 12873,
+            "packets_received": 55,
+            "bytes_received": 8962,
+        }
+    ]
+
+
+def test_parse_blob_prefix_templates():
+    template = "resourceId=/SUBSCRIPTIONS/ID/y=%Y/m=%m/d=%d/h=%H/"
+
+    assert AzureFlowLogsConnector.parse_blob_prefix_templates("") == []
+    assert AzureFlowLogsConnector.parse_blob_prefix_templates(f" {template}, y=%Y/h=%H/") == [template, "y=%Y/h=%H/"]
+
+    with pytest.raises(ValueError):
+        AzureFlowLogsConnector.parse_blob_prefix_templates("y=%Y/m=%m/d=%d/")
+
+    with pytest.raises(ValueError):
+        AzureFlowLogsConnector.parse_blob_prefix_templates("/y=%Y/m=%m/d=%d/h=%H/")
+
+
+@pytest.mark.asyncio
+async def test_flow_logs_late_blob_filtered_with_the_marker_of_its_prefix(connector: AzureFlowLogsConnector):
+    """
+    Test the records of a blob updated late are filtered with the marker of its prefix, not the one of the cycle.
+
+    Args:
+        connector: AzureFlowLogsConnector
+    """
+    templates = [
+        "resourceId=/SUBSCRIPTIONS/ID/NSG1/y=%Y/m=%m/d=%d/h=%H/",
+        "resourceId=/SUBSCRIPTIONS/ID/NSG2/y=%Y/m=%m/d=%d/h=%H/",
+    ]
+    connector.blob_prefix_templates = templates
+
+    current_date = datetime.now(timezone.utc).replace(microsecond=0)
+    late_prefix, recent_prefix = (current_date.strftime(template) for template in templates)
+
+    # The blob of the first security group was last read 20 minutes ago, the one of the second 2 minutes ago
+    late_marker = current_date - timedelta(minutes=20)
+    recent_marker = current_date - timedelta(minutes=2)
+    with connector.context as cache:
+        cache["last_event_date"] = recent_marker.isoformat()
+        cache["prefix_markers"] = {late_prefix: late_marker.isoformat(), recent_prefix: recent_marker.isoformat()}
+
+    def record(record_time: datetime, flow_tuple: str) -> dict:
+        return {
+            "time": record_time.isoformat(),
+            "flowLogVersion": 4,
+            "flowLogGUID": "guid",
+            "macAddress": "112233445566",
+            "operationName": "FlowLogFlowEvent",
+            "flowRecords": {"flows": [{"aclID": "acl", "flowGroups": [{"rule": "rule", "flowTuples": [flow_tuple]}]}]},
+        }
+
+    # The late blob is updated with records older than the marker of the cycle, but newer than the one of its prefix
+    late_blob = BlobProperties()
+    late_blob.name = late_prefix + "macAddress=112233445566/PT1H.json"
+    late_blob.last_modified = current_date - timedelta(minutes=1)
+    late_records = [
+        record(current_date - timedelta(minutes=30), "already-read"),
+        record(current_date - timedelta(minutes=10), "late"),
+    ]
+
+    recent_blob = BlobProperties()
+    recent_blob.name = recent_prefix + "macAddress=112233445566/PT1H.json"
+    recent_blob.last_modified = current_date
+    recent_records = [
+        record(current_date - timedelta(minutes=10), "already-read"),
+        record(current_date - timedelta(minutes=1), "recent"),
+    ]
+
+    blobs_by_prefix = {late_prefix: [late_blob], recent_prefix: [recent_blob]}
+    contents = {
+        late_blob.name: orjson.dumps({"records": late_records}),
+        recent_blob.name: orjson.dumps({"records": recent_records}),
+    }
+
+    def list_blobs(name_starts_with=None):
+        mock_list_blobs = MagicMock()
+        mock_list_blobs.__aiter__.return_value = blobs_by_prefix.get(name_starts_with, [])
+        return mock_list_blobs
+
+    async def stream_blob(name):
+        yield contents[name]
+
+    azure_blob_storage_wrapper = MagicMock()
+    azure_blob_storage_wrapper.list_blobs.side_effect = list_blobs
+    azure_blob_storage_wrapper.stream_blob.side_effect = stream_blob
+    connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
+
+    result = await connector.get_azure_blob_data()
+
+    assert sorted(orjson.loads(value)["flow.0"] for value in result) == ["late", "recent"]
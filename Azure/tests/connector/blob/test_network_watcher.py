@@ -2,10 +2,9 @@
 
 from datetime import datetime, timedelta, timezone
 from gzip import GzipFile
-from tempfile import NamedTemporaryFile
-from unittest.mock import AsyncMock, MagicMock
+from io import BytesIO
+from unittest.mock import MagicMock
 
-import aiofiles
 import pytest
 from azure.storage.blob import BlobProperties
 from sekoia_automation.module import Module
@@ -99,10 +98,10 @@ async def test_network_watcher_get_network_watcher_data_1(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (None, blob_content)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [blob_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -131,9 +130,7 @@ async def test_network_watcher_get_network_watcher_data_2(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    async with aiofiles.tempfile.NamedTemporaryFile("wb", delete=False, dir="") as file:
-        file_name = str(file.name)
-        await file.write(blob_content)
+    file_content = blob_content
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -148,10 +145,10 @@ async def test_network_watcher_get_network_watcher_data_2(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -179,9 +176,10 @@ async def test_network_watcher_get_network_watcher_data_3(
     with connector.context as cache:
         cache["last_event_date"] = (current_date - timedelta(days=1)).isoformat()
 
-    with NamedTemporaryFile("wb", delete=False, dir="") as file, GzipFile(fileobj=file, mode="w+") as gfile:
-        file_name = str(file.name)
+    buffer = BytesIO()
+    with GzipFile(fileobj=buffer, mode="wb") as gfile:
         gfile.write(blob_content)
+    file_content = buffer.getvalue()
 
     azure_blob_storage_wrapper = MagicMock()
 
@@ -196,10 +194,10 @@ async def test_network_watcher_get_network_watcher_data_3(
 
     azure_blob_storage_wrapper.list_blobs.return_value = mock_list_blobs
 
-    download_blob_result = AsyncMock()
-    download_blob_result.return_value = (file_name, None)
+    mock_stream_blob = MagicMock()
+    mock_stream_blob.__aiter__.return_value = [file_content]
 
-    azure_blob_storage_wrapper.download_blob = download_blob_result
+    azure_blob_storage_wrapper.stream_blob.return_value = mock_stream_blob
 
     connector._azure_blob_storage_wrapper = azure_blob_storage_wrapper
 
@@ -7,8 +7,9 @@ from tempfile import mkdtemp
 from threading import Thread
 from unittest.mock import AsyncMock, Mock
 
+import orjson
 import pytest
-from azure.eventhub import EventData
+from azure.eventhub import CloseReason, EventData
 from sekoia_automation import constants
 from sekoia_automation.module import Module
 
@@ -328,3 +329,173 @@ def test_get_records_from_message_str():
     # assert
     assert len(records[0]) == 1
     assert records[0][0] == "teststring"
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_checkpoint_every_n_events(trigger):
+    trigger._checkpoint_events = 5
+    trigger._checkpoint_interval = 3600
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+
+    batches = [[EventData(f'{{"name": "record{i}-{j}"}}') for j in range(2)] for i in range(4)]
+    for batch in batches:
+        await trigger.handle_messages(partition_context, batch)
+
+    # The first batch is checkpointed, then every 5 events
+    assert [call.args[0] for call in partition_context.update_checkpoint.await_args_list] == [
+        batches[0][-1],
+        batches[3][-1],
+    ]
+
+    # The pending events are checkpointed when the partition is closed
+    await trigger.handle_messages(partition_context, [EventData('{"name": "last"}')])
+    await trigger.handle_partition_close(partition_context, CloseReason.SHUTDOWN)
+    assert partition_context.update_checkpoint.await_count == 3
+    assert trigger._partitions == {}
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_pipeline(trigger):
+    trigger._pipeline_depth = 2
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+
+    pushed = asyncio.Event()
+
+    async def push_data_to_intakes(events):
+        await pushed.wait()
+        return events
+
+    trigger.push_data_to_intakes = AsyncMock(side_effect=push_data_to_intakes)
+
+    # The batches are received while the first one is pushed
+    batches = [[EventData(f'{{"name": "record{i}"}}')] for i in range(3)]
+    for batch in batches:
+        await asyncio.wait_for(trigger.handle_messages(partition_context, batch), 1)
+
+    assert partition_context.update_checkpoint.await_count == 0
+
+    pushed.set()
+    await trigger.handle_partition_close(partition_context, CloseReason.SHUTDOWN)
+
+    calls = [record for call in trigger.push_data_to_intakes.await_args_list for record in call.kwargs["events"]]
+    assert calls == ['{"name":"record0"}', '{"name":"record1"}', '{"name":"record2"}']
+    assert partition_context.update_checkpoint.await_args.args[0] == batches[-1][-1]
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_pipeline_failure(trigger):
+    trigger._pipeline_depth = 1
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+    trigger.push_data_to_intakes = AsyncMock(side_effect=[["ok"], ValueError("push failed"), ["ok"]])
+
+    batches = [[EventData(f'{{"name": "record{i}"}}')] for i in range(3)]
+    for batch in batches:
+        await trigger.handle_messages(partition_context, batch)
+
+    # The failure is raised on the next batch, so the partition restarts from the last checkpoint
+    with pytest.raises(ValueError):
+        for _ in range(10):
+            await trigger.handle_messages(partition_context, [EventData('{"name": "next"}')])
+            await asyncio.sleep(0.01)
+
+    await trigger.handle_partition_close(partition_context, CloseReason.OWNERSHIP_LOST)
+
+    # Only the first batch, pushed before the failure, is checkpointed
+    assert [call.args[0] for call in partition_context.update_checkpoint.await_args_list] == [batches[0][-1]]
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_pipeline_idle_checkpoint(trigger):
+    trigger._pipeline_depth = 2
+    trigger._checkpoint_interval = 3600
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+
+    pushed = asyncio.Event()
+
+    async def push_data_to_intakes(events):
+        await pushed.wait()
+        return events
+
+    trigger.push_data_to_intakes = AsyncMock(side_effect=push_data_to_intakes)
+
+    batches = [[EventData(f'{{"name": "record{i}"}}')] for i in range(2)]
+    for batch in batches:
+        await trigger.handle_messages(partition_context, batch)
+    await asyncio.sleep(0.01)
+
+    # The partition is idle while the worker pushes the batches: the checkpoint waits for them
+    await trigger.handle_messages(partition_context, [])
+    assert partition_context.update_checkpoint.await_count == 0
+
+    pushed.set()
+    await asyncio.sleep(0.01)
+    await trigger.handle_messages(partition_context, [])
+    await asyncio.sleep(0.01)
+
+    assert [call.args[0] for call in partition_context.update_checkpoint.await_args_list] == [
+        batches[0][-1],
+        batches[-1][-1],
+    ]
+    await trigger.handle_partition_close(partition_context, CloseReason.SHUTDOWN)
+
+
+@pytest.mark.asyncio
+async def test_handle_messages_pipeline_failure_on_idle_partition(trigger):
+    trigger._pipeline_depth = 1
+    partition_context = AsyncMock()
+    partition_context.partition_id = "0"
+    trigger.push_data_to_intakes = AsyncMock(side_effect=ValueError("push failed"))
+
+    await trigger.handle_messages(partition_context, [EventData('{"name": "record"}')])
+    await asyncio.sleep(0.01)
+
+    # The failure is raised even if no more messages are received
+    with pytest.raises(ValueError):
+        await trigger.handle_messages(partition_context, [])
+
+    assert partition_context.update_checkpoint.await_count == 0
+    assert trigger._partitions["0"].queue is None
+
+
+def test_get_records_from_message_json_not_supported_by_orjson():
+    # arrange
+    message = EventData(body='{"records": [{"name": "record1", "value": NaN}]}')
+
+    # act
+    records, body_type = AzureEventsHubTrigger.get_records_from_message(message)
+
+    # assert
+    assert body_type == "json"
+    assert records[0]["name"] == "record1"
+
+
+def test_get_records_from_message_json_scalar():
+    # arrange
+    message = EventData(body='"teststring"')
+
+    # act
+    records = AzureEventsHubTrigger.get_records_from_message(message)
+
+    # assert
+    assert records == (['"teststring"'], "str")
+
+
+@pytest.mark.asyncio
+async def test_forward_events_with_filtering_logs_once(trigger):
+    # arrange
+    records = [{"name": f"record{i}", "category": f"test{i % 3}"} for i in range(9)]
+    messages = [EventData(orjson.dumps({"records": records}).decode("utf-8"))]
+    trigger.configuration.categories = ["test1"]
+
+    # act
+    await trigger.forward_events(messages)
+
+    # assert
+    events = trigger.push_data_to_intakes.await_args.kwargs["events"]
+    assert events == [orjson.dumps(record).decode("utf-8") for record in records if record["category"] == "test1"]
+    skip_logs = [call for call in trigger.log.call_args_list if "Skip" in call.kwargs.get("message", "")]
+    assert len(skip_logs) == 1
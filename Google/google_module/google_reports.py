@@ -1,4 +1,6 @@
+import os
 import orjson
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import cached_property
 from typing import Optional
 
@@ -7,7 +9,7 @@ from dateutil.parser import isoparse
 import time
 
 from enum import Enum
-from threading import Event
+from threading import Event, local
 
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
@@ -76,6 +78,10 @@ class GoogleReports(GoogleTrigger):
         ]
         self._stop_event = Event()
         self.from_date = ""
+        self._local = local()
+
+        # number of windows fetched concurrently when catching up a backlog
+        self.catch_up_workers = max(1, int(os.environ.get("CATCH_UP_WORKERS", 1)))
 
     @property
     def stepper(self):
@@ -92,6 +98,7 @@ class GoogleReports(GoogleTrigger):
                     self.configuration.frequency,
                     self.configuration.timedelta,
                     self.configuration.start_time,
+                    catch_up=self.catch_up_workers > 1,
                 )
 
             # parse the most recent date seen
@@ -116,6 +123,7 @@ class GoogleReports(GoogleTrigger):
                 end,
                 timedelta(seconds=self.configuration.frequency),
                 timeshift,
+                catch_up=self.catch_up_workers > 1,
             )
 
     @stepper.setter
@@ -129,17 +137,24 @@ class GoogleReports(GoogleTrigger):
     def pagination_limit(self):
         return max(self.configuration.chunk_size, 1000)
 
-    @cached_property
+    @property
     def reports_service(self):
         """
         Returns a build object for accessing Google Admin Reports API.
+
+        The object is built per thread, as its http client is not thread-safe.
         """
-        credentials = service_account.Credentials.from_service_account_file(
-            self.service_account_path, scopes=self.scopes
-        )
-        delegated_credentials = credentials.with_subject(self.configuration.admin_mail)
+        service = getattr(self._local, "reports_service", None)
+        if service is None:
+            credentials = service_account.Credentials.from_service_account_file(
+                self.service_account_path, scopes=self.scopes
+            )
+            delegated_credentials = credentials.with_subject(self.configuration.admin_mail)
 
-        return build("admin", "reports_v1", credentials=delegated_credentials)
+            service = build("admin", "reports_v1", credentials=delegated_credentials)
+            self._local.reports_service = service
+
+        return service
 
     def stop(self, *args, **kwargs):
         self.log(message="Stopping Google Reports API trigger", level="info")
@@ -152,27 +167,18 @@ class GoogleReports(GoogleTrigger):
         )
 
         try:
-            for start, end in self.stepper.ranges():
+            stepper = self.stepper
+            for start, end in stepper.ranges():
                 # check if the trigger should stop
                 if self._stop_event.is_set():
                     break
 
                 duration_start = time.time()
 
-                try:
-                    self.get_reports_events(start, end)
-                except (HTTPError, BaseHTTPError) as ex:
-                    self.log_exception(ex, message="Failed to get next batch of events")
-                except Exception as ex:
-                    self.log(
-                        message=f"An unknown exception occurred : {str(ex)}",
-                        level="error",
-                    )
-                    raise
-
-                # Save the most recent date seen
-                self.stepper = end.isoformat()
-                self.log(message=f"Changing recent date in get reports events to  {end.isoformat()}", level="info")
+                forwarded_until = self.forward_windows(stepper.split(start, end, self.catch_up_workers))
+                if forwarded_until < end:
+                    # resume from the first window not forwarded
+                    stepper.end = forwarded_until
 
                 # compute the duration of the last events fetching
                 duration = int(time.time() - duration_start)
@@ -184,6 +190,75 @@ class GoogleReports(GoogleTrigger):
                 level="info",
             )
 
+    def forward_window(self, start: datetime, end: datetime) -> bool:
+        """
+        Forward the events of a window. Return False if the events could not be retrieved
+        """
+        try:
+            self.get_reports_events(start, end)
+        except (HTTPError, BaseHTTPError) as ex:
+            self.log_exception(ex, message="Failed to get next batch of events")
+            return False
+        except Exception as ex:
+            self.log(
+                message=f"An unknown exception occurred : {str(ex)}",
+                level="error",
+            )
+            raise
+
+        return True
+
+    def forward_windows(self, windows: list[tuple[datetime, datetime]]) -> datetime:
+        """
+        Forward the events of contiguous windows, concurrently if several.
+
+        The most recent date seen only advances over the windows forwarded without gap,
+        so a restart never skips a window still in progress or failed.
+        Return the end of the windows forwarded without gap.
+        """
+        if len(windows) == 1:
+            start, end = windows[0]
+            self.forward_window(start, end)
+            self.save_most_recent_date_seen(end)
+            return end
+
+        self.log(message=f"Catching up the backlog with {len(windows)} concurrent windows", level="info")
+        forwarded = [False] * len(windows)
+        nb_contiguous_forwarded = 0
+
+        with ThreadPoolExecutor(max_workers=len(windows)) as executor:
+            futures = {
+                executor.submit(self.forward_window, start, end): index for index, (start, end) in enumerate(windows)
+            }
+            try:
+                for future in as_completed(futures):
+                    forwarded[futures[future]] = future.result()
+
+                    # advance the checkpoint over the contiguous forwarded windows
+                    previous_nb_contiguous_forwarded = nb_contiguous_forwarded
+                    while nb_contiguous_forwarded < len(windows) and forwarded[nb_contiguous_forwarded]:
+                        nb_contiguous_forwarded += 1
+
+                    if nb_contiguous_forwarded > previous_nb_contiguous_forwarded:
+                        self.save_most_recent_date_seen(windows[nb_contiguous_forwarded - 1][1])
+            finally:
+                for future in futures:
+                    future.cancel()
+
+        if nb_contiguous_forwarded < len(windows):
+            failed_start, failed_end = windows[nb_contiguous_forwarded]
+            self.log(
+                message=f"Failed to forward the window from {failed_start.isoformat()} to {failed_end.isoformat()}",
+                level="warning",
+            )
+            return failed_start
+
+        return windows[-1][1]
+
+    def save_most_recent_date_seen(self, end: datetime):
+        self.stepper = end.isoformat()
+        self.log(message=f"Changing recent date in get reports events to  {end.isoformat()}", level="info")
+
     def get_activities(self, start: str, end: str, next_key: Optional[str] = None):
         message_without_nk = f"Initiating Google reports request using the created credential object."
         message_with_nk = f"Initiating Google reports request using the created credential object. Next_key {next_key} included for pagination."
@@ -4,13 +4,17 @@ import time
 from collections.abc import Generator
 from datetime import datetime, timezone
 from functools import cached_property
-from threading import Event, Thread
+from threading import Condition, Event, Thread
+from typing import NamedTuple
 
 from google.api_core import exceptions, retry
 from google.cloud.pubsub_v1 import SubscriberClient, types
+from google.cloud.pubsub_v1.subscriber.futures import StreamingPullFuture
+from google.cloud.pubsub_v1.subscriber.message import Message
 from google_module.base import GoogleTrigger
 from google_module.metrics import EVENTS_LAG, FORWARD_EVENTS_DURATION, INCOMING_MESSAGES, OUTCOMING_EVENTS
 from pydantic import BaseModel
+from sekoia_automation.constants import EVENT_BYTES_MAX_SIZE
 
 max_chunk_size: int = 1000
 
@@ -38,6 +42,16 @@ class Worker(Thread):
     def is_running(self):
         return not self._stop_event.is_set()
 
+    def retire(self, timeout: float | None = None) -> bool:
+        """
+        Stop the worker while the others keep running, and wait for it. Return True if the worker is stopped
+        """
+        self.stop()
+        if self.is_alive():
+            self.join(timeout=timeout)
+
+        return not self.is_alive()
+
 
 class MessagesConsumer(Worker):
     KIND = "Consumer"
@@ -50,6 +64,26 @@ class MessagesConsumer(Worker):
         self.configuration = connector.configuration
         self.client: SubscriberClient | None = None
 
+        # the last lag measured, in seconds, and when it was measured
+        self.lag: float = 0.0
+        self.lag_measured_at: float = 0.0
+
+    def set_lag(self, lag: float, report: bool = True):
+        self.lag = lag
+        self.lag_measured_at = time.time()
+
+        if report:
+            EVENTS_LAG.labels(intake_key=self.configuration.intake_key).set(int(lag))
+
+    def recent_lag(self, max_age: float = 60) -> float:
+        """
+        Return the last lag measured, if recent enough, otherwise consider the consumer as up to date
+        """
+        if time.time() - self.lag_measured_at > max_age:
+            return 0.0
+
+        return self.lag
+
     def stop(self):
         super().stop()
 
@@ -103,12 +137,13 @@ class MessagesConsumer(Worker):
                     else:
                         now = datetime.now(timezone.utc)
                         current_lag = now - most_recent_date_seen
-                        EVENTS_LAG.labels(intake_key=self.configuration.intake_key).set(
-                            int(current_lag.total_seconds())
-                        )
+                        self.set_lag(current_lag.total_seconds())
 
                     yield messages
                 else:
+                    # the subscription is drained
+                    self.set_lag(0.0, report=False)
+
                     batch_duration = time.time() - batch_start_time
                     FORWARD_EVENTS_DURATION.labels(intake_key=self.configuration.intake_key).observe(batch_duration)
                     delta_sleep = self.configuration.frequency - batch_duration
@@ -126,6 +161,121 @@ class MessagesConsumer(Worker):
                 self.connector.log_exception(ex, message=f"failed to fetch messages from {self.subscription_name}")
 
 
+class ReceivedEvent(NamedTuple):
+    """
+    An event received from a streaming pull, with the message to acknowledge once the event is forwarded
+    and the consumer which received it
+    """
+
+    event: str
+    message: Message
+    consumer: "StreamingMessagesConsumer | None" = None
+
+
+class StreamingMessagesConsumer(MessagesConsumer):
+    """
+    Consume the messages with a streaming pull.
+
+    The messages are acknowledged by the forwarders, once their events are pushed to the intake.
+    Until then, the client extends their ack deadlines, in the limits of the flow control.
+    Once stopped, the consumer waits for its messages to be settled before closing its client,
+    otherwise their acknowledgements would be lost.
+    """
+
+    KIND = "Streaming consumer"
+
+    # Maximum time, in seconds, to wait for the messages to be settled once stopped
+    SETTLE_TIMEOUT = 20
+
+    def __init__(
+        self,
+        connector: "PubSub",
+        subscription_name: str,
+        queue: queue.Queue,
+        flow_control: types.FlowControl | None = None,
+    ):
+        super().__init__(connector, subscription_name, queue)
+        self.flow_control = flow_control or types.FlowControl()
+        self.future: StreamingPullFuture | None = None
+
+        # the number of messages handed to the forwarders and not settled yet
+        self.outstanding_messages = 0
+        self._settled = Condition()
+
+    def stop(self):
+        # stop the streaming pull, if defined. The client is closed by the consumer once its messages are settled
+        Worker.stop(self)
+        if self.future:
+            self.future.cancel()
+
+    def message_settled(self):
+        """
+        Notify the consumer that one of its messages was acknowledged or nacked
+        """
+        with self._settled:
+            self.outstanding_messages -= 1
+            self._settled.notify_all()
+
+    def wait_settled_messages(self, timeout: float) -> bool:
+        """
+        Wait for the messages handed to the forwarders to be settled. Return True if they are all settled
+        """
+        with self._settled:
+            return self._settled.wait_for(lambda: self.outstanding_messages <= 0, timeout=timeout)
+
+    def on_message(self, message: Message):
+        INCOMING_MESSAGES.labels(intake_key=self.configuration.intake_key).inc()
+
+        # Compute the current lag
+        if message.publish_time is not None:
+            current_lag = datetime.now(timezone.utc) - message.publish_time
+            self.set_lag(current_lag.total_seconds())
+
+        received_event = ReceivedEvent(message.data.decode("utf-8"), message, self)
+        with self._settled:
+            self.outstanding_messages += 1
+
+        while self.is_running:
+            try:
+                self.queue.put(received_event, timeout=0.5)
+                return
+            except queue.Full:
+                pass
+
+        # The consumer is stopping: let the message be redelivered
+        message.nack()
+        self.message_settled()
+
+    def run(self):
+        while self.is_running:
+            try:
+                self.client = SubscriberClient()
+                with self.client as subscriber:
+                    self.future = subscriber.subscribe(
+                        self.subscription_name, callback=self.on_message, flow_control=self.flow_control
+                    )
+
+                    # wait for the end of the stream or for the stop of the consumer
+                    while self.is_running and not self.future.done():
+                        self._stop_event.wait(timeout=1)
+
+                    self.future.cancel()
+                    try:
+                        self.future.result()
+                    finally:
+                        # the acknowledgements go through the client: wait for them before closing it
+                        if not self.wait_settled_messages(timeout=self.SETTLE_TIMEOUT):
+                            self.connector.log(
+                                message=f"{self.outstanding_messages} messages were not settled "
+                                "before closing the consumer and will be redelivered",
+                                level="warning",
+                            )
+            except exceptions.Cancelled:
+                pass
+            except Exception as ex:
+                self.connector.log_exception(ex, message=f"failed to fetch messages from {self.subscription_name}")
+
+
 class EventsForwarder(Worker):
     KIND = "forwarder"
 
@@ -135,14 +285,36 @@ class EventsForwarder(Worker):
         self.configuration = connector.configuration
         self.queue = queue
         self.max_batch_size = max_batch_size
+        self.pending_messages: list[ReceivedEvent] = []
+
+        # once stopped, drain the queue (when all the forwarders are stopped) or not (when scaled down)
+        self.drain_on_stop = True
+
+        # the duration, in seconds, of the last push to the intake
+        self.push_latency: float | None = None
+
+    def retire(self, timeout: float | None = None) -> bool:
+        # let the other forwarders consume the queue
+        self.drain_on_stop = False
+        return super().retire(timeout=timeout)
+
+    @property
+    def must_forward(self) -> bool:
+        return self.is_running or (self.drain_on_stop and not self.queue.empty())
 
     def next_batch(self, max_batch_size: int) -> list:
         events = []
-        while self.is_running:
+        # once stopped, the forwarder drains the queue
+        while self.must_forward:
             try:
                 messages = self.queue.get(block=True, timeout=0.5)
 
-                if len(messages) > 0:
+                # events from a streaming pull are acknowledged once forwarded
+                if isinstance(messages, ReceivedEvent):
+                    events.append(messages.event)
+                    self.pending_messages.append(messages)
+
+                elif len(messages) > 0:
                     events.extend(messages)
 
                 if len(events) >= max_batch_size:
@@ -155,7 +327,7 @@ class EventsForwarder(Worker):
 
     def run(self):
         try:
-            while self.is_running or self.queue.qsize() > 0:
+            while self.must_forward:
                 events = self.next_batch(self.max_batch_size)
 
                 if len(events) > 0:
@@ -164,9 +336,87 @@ class EventsForwarder(Worker):
                         level="info",
                     )
                     OUTCOMING_EVENTS.labels(intake_key=self.configuration.intake_key).inc(len(events))
-                    self.connector.push_events_to_intakes(events=events)
+                    push_start = time.time()
+                    event_ids = self.connector.push_events_to_intakes(events=events)
+                    self.push_latency = time.time() - push_start
+                    self.settle_pending_messages(events, event_ids)
         except Exception as ex:
             self.connector.log_exception(ex, message="Failed to forward events")
+        finally:
+            # let the messages not forwarded be redelivered
+            self.settle_pending_messages(forwarded=False)
+
+    def settle_pending_messages(
+        self, events: list | None = None, event_ids: list[str] | None = None, forwarded: bool = True
+    ):
+        """
+        Acknowledge the pending messages if all their events were accepted by the intake, otherwise nack them
+        """
+        if not self.pending_messages:
+            return
+
+        # The events too large are discarded when pushed to the intake
+        if forwarded and events is not None:
+            nb_expected_events = sum(1 for event in events if len(str(event)) <= EVENT_BYTES_MAX_SIZE)
+            forwarded = len(event_ids or []) >= nb_expected_events
+
+        if not forwarded:
+            self.connector.log(
+                message=f"{len(self.pending_messages)} messages were not forwarded and will be redelivered",
+                level="warning",
+            )
+
+        for received_event in self.pending_messages:
+            if forwarded:
+                received_event.message.ack()
+            else:
+                received_event.message.nack()
+
+            if received_event.consumer is not None:
+                received_event.consumer.message_settled()
+
+        self.pending_messages = []
+
+
+class AutoscalingConfig(BaseModel):
+    """
+    Bounds and thresholds used to scale the consumers and the forwarders
+    """
+
+    min_consumers: int = 1
+    max_consumers: int = 1
+    min_forwarders: int = 1
+    max_forwarders: int = 1
+
+    # the queue fill levels above which the forwarders are late, and under which they are idle
+    high_queue_level: float = 0.8
+    low_queue_level: float = 0.2
+
+    # the lag, in seconds, above which the consumers are late
+    lag_threshold: float = 60
+
+    # the push duration, in seconds, above which the intake is considered slow
+    push_latency_threshold: float = 5
+
+    # the minimal delay, in seconds, between two scalings of the same kind of workers
+    cooldown: float = 30
+
+    @classmethod
+    def from_env(cls) -> "AutoscalingConfig":
+        nb_consumers = int(os.environ.get("NB_CONSUMERS", 1))
+        nb_forwarders = int(os.environ.get("NB_FORWARDERS", 1))
+
+        min_consumers = int(os.environ.get("MIN_CONSUMERS", nb_consumers))
+        min_forwarders = int(os.environ.get("MIN_FORWARDERS", nb_forwarders))
+        return cls(
+            min_consumers=min_consumers,
+            max_consumers=max(min_consumers, int(os.environ.get("MAX_CONSUMERS", nb_consumers))),
+            min_forwarders=min_forwarders,
+            max_forwarders=max(min_forwarders, int(os.environ.get("MAX_FORWARDERS", nb_forwarders))),
+            lag_threshold=float(os.environ.get("AUTOSCALING_LAG_THRESHOLD", 60)),
+            push_latency_threshold=float(os.environ.get("AUTOSCALING_PUSH_LATENCY_THRESHOLD", 5)),
+            cooldown=float(os.environ.get("AUTOSCALING_COOLDOWN", 30)),
+        )
 
 
 class PubSub(GoogleTrigger):
@@ -176,6 +426,9 @@ class PubSub(GoogleTrigger):
 
     configuration: PubSubConfig
 
+    # Maximum time, in seconds, to wait for a worker removed by the autoscaling to stop
+    WORKER_STOP_TIMEOUT = 30
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.client: SubscriberClient | None = None
@@ -191,6 +444,20 @@ class PubSub(GoogleTrigger):
         self.log(message="Stopping Google Cloud PubSub connector", level="info")
         super().stop(*args, **kwargs)
 
+    def get_consumer_class(self) -> tuple[type[MessagesConsumer], dict]:
+        """
+        Return the class of the consumers and their extra arguments, according to the environment
+        """
+        if os.environ.get("STREAMING_PULL", "false").lower() not in ("1", "true", "yes"):
+            return MessagesConsumer, {}
+
+        flow_control = types.FlowControl(
+            max_messages=int(os.environ.get("MAX_OUTSTANDING_MESSAGES", 20000)),
+            max_bytes=int(os.environ.get("MAX_OUTSTANDING_BYTES", 100 * 1024 * 1024)),
+            max_lease_duration=float(os.environ.get("MAX_LEASE_DURATION", 3600)),
+        )
+        return StreamingMessagesConsumer, {"flow_control": flow_control}
+
     def create_workers(self, nb_workers: int, klass: type[Worker], *args, **kwargs) -> list[Worker]:
         return [klass(*args, **kwargs) for _ in range(nb_workers)]
 
@@ -201,6 +468,74 @@ class PubSub(GoogleTrigger):
                 workers[index] = klass(*args, **kwargs)
                 workers[index].start()
 
+    def compute_scaling(
+        self,
+        events_queue: queue.Queue,
+        consumers: list[MessagesConsumer],
+        forwarders: list[EventsForwarder],
+        config: AutoscalingConfig,
+    ) -> tuple[int, int]:
+        """
+        Return how many consumers and forwarders to add (or to remove, if negative),
+        according to the fill level of the queue, the lag of the consumers and the duration of the pushes
+        """
+        queue_level = events_queue.qsize() / events_queue.maxsize if events_queue.maxsize > 0 else 0.0
+        lag = max((consumer.recent_lag() for consumer in consumers if consumer.is_running), default=0.0)
+        push_latencies = [
+            forwarder.push_latency
+            for forwarder in forwarders
+            if forwarder.is_running and forwarder.push_latency is not None
+        ]
+        push_latency = sum(push_latencies) / len(push_latencies) if push_latencies else 0.0
+
+        # The forwarders don't keep up with the consumers
+        if queue_level >= config.high_queue_level or (
+            queue_level >= config.low_queue_level and push_latency >= config.push_latency_threshold
+        ):
+            forwarders_delta = 1
+        # The forwarders are idle
+        elif queue_level <= config.low_queue_level and push_latency < config.push_latency_threshold:
+            forwarders_delta = -1
+        else:
+            forwarders_delta = 0
+
+        # The consumers are late and the forwarders have room for more events
+        if lag >= config.lag_threshold and queue_level < config.high_queue_level:
+            consumers_delta = 1
+        # The consumers are up to date
+        elif lag < config.lag_threshold / 4:
+            consumers_delta = -1
+        else:
+            consumers_delta = 0
+
+        return consumers_delta, forwarders_delta
+
+    def scale_workers(
+        self, workers: list[Worker], delta: int, minimum: int, maximum: int, klass: type[Worker], *args, **kwargs
+    ) -> bool:
+        """
+        Add or remove workers, within the bounds. Return True if the workers were scaled
+        """
+        target = max(minimum, min(maximum, len(workers) + delta))
+        if target == len(workers):
+            return False
+
+        self.log(message=f"Scale the {klass.KIND}s from {len(workers)} to {target}", level="info")
+        while len(workers) < target:
+            worker = klass(*args, **kwargs)
+            worker.start()
+            workers.append(worker)
+
+        while len(workers) > target:
+            # keep tracking the worker until it is stopped
+            if not workers[-1].retire(timeout=self.WORKER_STOP_TIMEOUT):
+                self.log(message=f"The {klass.KIND} did not stop in time", level="warning")
+                break
+
+            workers.pop()
+
+        return True
+
     def start_workers(self, workers: list[Worker]):
         for worker in workers:
             worker.start()
@@ -233,17 +568,59 @@ class PubSub(GoogleTrigger):
         self.start_workers(forwarders)
 
         # start the consumers
+        consumer_class, consumer_kwargs = self.get_consumer_class()
         consumers = self.create_workers(
-            int(os.environ.get("NB_CONSUMERS", 1)), MessagesConsumer, self, self.subscription_name, events_queue
+            int(os.environ.get("NB_CONSUMERS", 1)),
+            consumer_class,
+            self,
+            self.subscription_name,
+            events_queue,
+            **consumer_kwargs,
         )
         self.start_workers(consumers)
 
+        # the bounds of the workers
+        autoscaling_config = AutoscalingConfig.from_env()
+        last_consumers_scaling = last_forwarders_scaling = time.time()
+
         while self.running:
             # Wait 5 seconds for the next supervision
             time.sleep(5)
 
             self.supervise_workers(forwarders, EventsForwarder, self, events_queue, max_batch_size=batch_size)
-            self.supervise_workers(consumers, MessagesConsumer, self, self.subscription_name, events_queue)
+            self.supervise_workers(
+                consumers, consumer_class, self, self.subscription_name, events_queue, **consumer_kwargs
+            )
+
+            # Scale the workers according to the load
+            consumers_delta, forwarders_delta = self.compute_scaling(
+                events_queue, consumers, forwarders, autoscaling_config
+            )
+            now = time.time()
+            if now - last_forwarders_scaling >= autoscaling_config.cooldown and self.scale_workers(
+                forwarders,
+                forwarders_delta,
+                autoscaling_config.min_forwarders,
+                autoscaling_config.max_forwarders,
+                EventsForwarder,
+                self,
+                events_queue,
+                max_batch_size=batch_size,
+            ):
+                last_forwarders_scaling = now
+
+            if now - last_consumers_scaling >= autoscaling_config.cooldown and self.scale_workers(
+                consumers,
+                consumers_delta,
+                autoscaling_config.min_consumers,
+                autoscaling_config.max_consumers,
+                consumer_class,
+                self,
+                self.subscription_name,
+                events_queue,
+                **consumer_kwargs,
+            ):
+                last_consumers_scaling = now
 
         # Stop the consumer
         self.stop_workers(consumers, timeout=2)
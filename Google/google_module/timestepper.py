@@ -15,12 +15,15 @@ class TimeStepper:
         end: datetime.datetime,
         frequency: datetime.timedelta,
         timedelta: datetime.timedelta,
+        catch_up: bool = False,
     ):
         self.trigger = trigger
         self.start = start
         self.end = end
         self.frequency = frequency
         self.timedelta = timedelta
+        # when late, return the whole backlog as the next range, instead of a range of `frequency`
+        self.catch_up = catch_up
 
     def ranges(
         self,
@@ -41,6 +44,10 @@ class TimeStepper:
             )
             EVENTS_LAG.labels(intake_key=self.trigger.configuration.intake_key).set(int(current_lag.total_seconds()))
 
+            # Catch up the backlog in a single range
+            if self.catch_up and next_end < now:
+                next_end = now
+
             # If the next end is in the future
             if next_end > now:
                 # compute the max date allowed in the future and set the next_end according
@@ -59,6 +66,18 @@ class TimeStepper:
             self.start = self.end
             self.end = next_end
 
+    def split(
+        self, start: datetime.datetime, end: datetime.datetime, nb_windows: int
+    ) -> list[tuple[datetime.datetime, datetime.datetime]]:
+        """
+        Split a range in, at most, `nb_windows` contiguous windows, not shorter than the frequency
+        """
+        nb_windows = max(1, min(nb_windows, int((end - start) / self.frequency)))
+        window = (end - start) / nb_windows
+
+        bounds = [start + window * index for index in range(nb_windows)] + [end]
+        return list(zip(bounds[:-1], bounds[1:]))
+
     @classmethod
     def create(
         cls,
@@ -66,6 +85,7 @@ class TimeStepper:
         frequency: int = 60,
         timedelta: int = 1,
         start_time: int = 1,
+        catch_up: bool = False,
     ) -> "TimeStepper":
         t_frequency = datetime.timedelta(seconds=frequency)
         t_timedelta = datetime.timedelta(minutes=timedelta)
@@ -77,7 +97,7 @@ class TimeStepper:
 
         start = end - t_frequency
 
-        return cls(trigger, start, end, t_frequency, t_timedelta)
+        return cls(trigger, start, end, t_frequency, t_timedelta, catch_up)
 
     @classmethod
     def create_from_time(
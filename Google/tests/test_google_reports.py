@@ -3,13 +3,17 @@ import os
 from unittest.mock import Mock, patch
 
 from freezegun import freeze_time
+from requests.exceptions import HTTPError
 
 from google_module.google_reports import GoogleReports
+from google_module.timestepper import TimeStepper
 
 import tempfile
 import json
 import codecs
 import datetime
+import threading
+import time
 
 
 @pytest.fixture
@@ -188,3 +192,120 @@ def test_get_google_reports_data_integration():
     os.remove(temp_file_path)
     results = [call.kwargs["events"] for call in trigger.push_events_to_intakes.call_args_list]
     assert len(results[0]) != 0
+
+
+def test_timestepper_split(trigger):
+    stepper = TimeStepper(
+        trigger,
+        datetime.datetime(2024, 8, 1, 0, 0, tzinfo=datetime.timezone.utc),
+        datetime.datetime(2024, 8, 1, 6, 0, tzinfo=datetime.timezone.utc),
+        datetime.timedelta(hours=1),
+        datetime.timedelta(minutes=1),
+    )
+
+    windows = stepper.split(stepper.start, stepper.end, 3)
+    assert [(start.hour, end.hour) for start, end in windows] == [(0, 2), (2, 4), (4, 6)]
+
+    # the windows are not shorter than the frequency
+    assert len(stepper.split(stepper.start, stepper.end, 10)) == 6
+    assert stepper.split(stepper.start, stepper.start + datetime.timedelta(minutes=5), 4) == [
+        (stepper.start, stepper.start + datetime.timedelta(minutes=5))
+    ]
+
+
+def test_timestepper_catch_up(trigger):
+    with freeze_time("2024-08-01 05:44:32"):
+        stepper = TimeStepper.create(trigger, frequency=60, timedelta=1, start_time=5, catch_up=True)
+        ranges = stepper.ranges()
+
+        start, end = next(ranges)
+        assert end - start == datetime.timedelta(seconds=60)
+
+        # the next range covers the whole backlog
+        start, end = next(ranges)
+        assert end == datetime.datetime(2024, 8, 1, 5, 43, 32, tzinfo=datetime.timezone.utc)
+
+
+def test_forward_windows_checkpoint_contiguous_windows(trigger):
+    start = datetime.datetime(2024, 8, 1, 0, 0, tzinfo=datetime.timezone.utc)
+    windows = [
+        (start + datetime.timedelta(hours=index), start + datetime.timedelta(hours=index + 1)) for index in range(3)
+    ]
+    first_window_release = threading.Event()
+    checkpoints = []
+
+    def get_reports_events(window_start, window_end):
+        # the first window completes the last
+        if window_start == start:
+            first_window_release.wait(timeout=5)
+        elif window_end == windows[-1][1]:
+            time.sleep(0.1)
+            first_window_release.set()
+
+    with patch.object(GoogleReports, "get_reports_events", side_effect=get_reports_events), patch.object(
+        GoogleReports, "save_most_recent_date_seen", side_effect=checkpoints.append
+    ):
+        assert trigger.forward_windows(windows) == windows[-1][1]
+
+    assert checkpoints == [windows[-1][1]]
+
+
+def test_forward_windows_middle_window_failure(trigger):
+    start = datetime.datetime(2024, 8, 1, 0, 0, tzinfo=datetime.timezone.utc)
+    windows = [
+        (start + datetime.timedelta(hours=index), start + datetime.timedelta(hours=index + 1)) for index in range(3)
+    ]
+    checkpoints = []
+
+    def get_reports_events(window_start, window_end):
+        if window_start == windows[1][0]:
+            raise HTTPError("503 Server Error")
+
+    with patch.object(GoogleReports, "get_reports_events", side_effect=get_reports_events), patch.object(
+        GoogleReports, "save_most_recent_date_seen", side_effect=checkpoints.append
+    ):
+        # the events are forwarded again from the failed window
+        assert trigger.forward_windows(windows) == windows[1][0]
+
+    # the checkpoint never goes beyond the failed window, even if the next one is forwarded
+    assert checkpoints == [windows[0][1]]
+
+
+def test_run_resumes_from_the_failed_window(trigger):
+    start = datetime.datetime(2024, 8, 1, 0, 0, tzinfo=datetime.timezone.utc)
+    end = start + datetime.timedelta(hours=3)
+    stepper = TimeStepper(trigger, start, end, datetime.timedelta(hours=1), datetime.timedelta(minutes=1))
+    ranges = []
+
+    def ranges_generator():
+        yield start, end
+        ranges.append(stepper.end)
+        trigger._stop_event.set()
+        yield stepper.end, end
+
+    stepper.ranges = ranges_generator
+    with patch.object(GoogleReports, "stepper", stepper), patch.object(
+        GoogleReports, "forward_windows", return_value=start + datetime.timedelta(hours=1)
+    ):
+        trigger.run()
+
+    assert ranges == [start + datetime.timedelta(hours=1)]
+
+
+def test_forward_windows_failure(trigger):
+    start = datetime.datetime(2024, 8, 1, 0, 0, tzinfo=datetime.timezone.utc)
+    windows = [
+        (start + datetime.timedelta(hours=index), start + datetime.timedelta(hours=index + 1)) for index in range(3)
+    ]
+
+    def get_reports_events(window_start, window_end):
+        if window_start == windows[1][0]:
+            raise ValueError("unexpected response")
+
+    with patch.object(GoogleReports, "get_reports_events", side_effect=get_reports_events):
+        with pytest.raises(ValueError):
+            trigger.forward_windows(windows)
+
+    # the checkpoint never goes beyond the failed window
+    with trigger.context as cache:
+        assert cache.get("most_recent_date_seen_drive") in (None, windows[0][1].isoformat())
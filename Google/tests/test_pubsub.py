@@ -1,14 +1,24 @@
+import os
 import queue
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 from threading import Thread
 from unittest.mock import Mock, patch
 
 from google.cloud import pubsub_v1
+from google.cloud.pubsub_v1 import types
 from google.protobuf.timestamp_pb2 import Timestamp
 from pytest import fixture
 
-from google_module.pubsub import EventsForwarder, MessagesConsumer, PubSub, Worker
+from google_module.pubsub import (
+    AutoscalingConfig,
+    EventsForwarder,
+    MessagesConsumer,
+    PubSub,
+    ReceivedEvent,
+    StreamingMessagesConsumer,
+    Worker,
+)
 
 
 @fixture
@@ -162,3 +172,296 @@ def test_event_forwarder_run(trigger, forwarder, events_queue):
     assert trigger.log_exception.called is False
     assert events_queue.qsize() == 0
     assert trigger.push_events_to_intakes.call_count == 3
+
+
+@fixture
+def streaming_consumer(trigger, events_queue):
+    yield StreamingMessagesConsumer(trigger, "subscription_name", events_queue, types.FlowControl(max_messages=10))
+
+
+def create_streamed_message(data: bytes) -> Mock:
+    message = Mock()
+    message.data = data
+    message.publish_time = datetime.now(timezone.utc)
+    return message
+
+
+def test_streaming_consumer_on_message(streaming_consumer, events_queue):
+    message = create_streamed_message(b"data1")
+
+    streaming_consumer.on_message(message)
+
+    assert events_queue.get_nowait() == ReceivedEvent("data1", message, streaming_consumer)
+    assert not message.ack.called
+    assert streaming_consumer.outstanding_messages == 1
+
+
+def test_streaming_consumer_on_message_when_stopping(trigger):
+    full_queue = queue.Queue(maxsize=1)
+    full_queue.put(["data0"])
+    consumer = StreamingMessagesConsumer(trigger, "subscription_name", full_queue)
+    consumer.stop()
+    message = create_streamed_message(b"data1")
+
+    consumer.on_message(message)
+
+    assert message.nack.called
+    assert full_queue.qsize() == 1
+
+
+def test_streaming_consumer_run(streaming_consumer):
+    with patch("google_module.pubsub.SubscriberClient") as mock:
+        instance = mock.return_value
+        instance.__enter__.return_value = instance
+        future = Mock()
+        future.done.return_value = False
+        instance.subscribe.return_value = future
+
+        thread = Thread(target=streaming_consumer.run)
+        thread.start()
+        time.sleep(0.5)
+        streaming_consumer.stop()
+        thread.join(timeout=5)
+
+        assert not thread.is_alive()
+        instance.subscribe.assert_called_once_with(
+            "subscription_name",
+            callback=streaming_consumer.on_message,
+            flow_control=types.FlowControl(max_messages=10),
+        )
+        assert future.cancel.called
+
+
+def test_event_forwarder_acknowledges_forwarded_messages(trigger, forwarder, events_queue):
+    messages = [create_streamed_message(f"data{index}".encode()) for index in range(3)]
+    for message in messages:
+        events_queue.put(ReceivedEvent(message.data.decode(), message), block=False)
+    trigger.push_events_to_intakes.side_effect = lambda events: [f"id-{event}" for event in events]
+
+    thread = Thread(target=forwarder.run)
+    thread.start()
+    time.sleep(1)
+    forwarder.stop()
+    thread.join(timeout=5)
+
+    trigger.push_events_to_intakes.assert_called_once_with(events=["data0", "data1", "data2"])
+    for message in messages:
+        assert message.ack.called
+        assert not message.nack.called
+
+
+def test_event_forwarder_nacks_messages_not_forwarded(trigger, forwarder, events_queue):
+    messages = [create_streamed_message(f"data{index}".encode()) for index in range(3)]
+    for message in messages:
+        events_queue.put(ReceivedEvent(message.data.decode(), message), block=False)
+
+    # one of the chunks was not accepted by the intake
+    trigger.push_events_to_intakes.side_effect = lambda events: ["id-1"]
+
+    thread = Thread(target=forwarder.run)
+    thread.start()
+    time.sleep(1)
+    forwarder.stop()
+    thread.join(timeout=5)
+
+    for message in messages:
+        assert message.nack.called
+        assert not message.ack.called
+
+
+def test_event_forwarder_nacks_messages_on_failure(trigger, forwarder, events_queue):
+    message = create_streamed_message(b"data0")
+    events_queue.put(ReceivedEvent("data0", message), block=False)
+    trigger.push_events_to_intakes.side_effect = Exception("intake unavailable")
+
+    thread = Thread(target=forwarder.run)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert trigger.log_exception.called
+    assert message.nack.called
+    assert not message.ack.called
+
+
+def test_get_consumer_class(trigger):
+    with patch.dict(os.environ, {}, clear=True):
+        assert trigger.get_consumer_class() == (MessagesConsumer, {})
+
+    with patch.dict(os.environ, {"STREAMING_PULL": "true", "MAX_OUTSTANDING_MESSAGES": "500"}):
+        consumer_class, kwargs = trigger.get_consumer_class()
+
+    assert consumer_class is StreamingMessagesConsumer
+    assert kwargs["flow_control"].max_messages == 500
+
+
+def test_consumer_recent_lag(consumer):
+    assert consumer.recent_lag() == 0.0
+
+    consumer.set_lag(120.0)
+    assert consumer.recent_lag() == 120.0
+
+    consumer.lag_measured_at -= 61
+    assert consumer.recent_lag() == 0.0
+
+
+def test_autoscaling_config_from_env():
+    with patch.dict(os.environ, {"NB_CONSUMERS": "2", "NB_FORWARDERS": "3"}, clear=True):
+        config = AutoscalingConfig.from_env()
+
+    assert (config.min_consumers, config.max_consumers, config.min_forwarders, config.max_forwarders) == (2, 2, 3, 3)
+
+    with patch.dict(os.environ, {"MIN_CONSUMERS": "1", "MAX_CONSUMERS": "4", "MAX_FORWARDERS": "0"}, clear=True):
+        config = AutoscalingConfig.from_env()
+
+    assert (config.min_consumers, config.max_consumers, config.min_forwarders, config.max_forwarders) == (1, 4, 1, 1)
+
+
+def test_compute_scaling(trigger):
+    config = AutoscalingConfig(max_consumers=4, max_forwarders=4)
+    events_queue = queue.Queue(maxsize=10)
+    consumer = MessagesConsumer(trigger, "subscription_name", events_queue)
+    forwarder = EventsForwarder(trigger, events_queue)
+
+    # the queue is full: more forwarders, and the consumers are up to date
+    for _ in range(9):
+        events_queue.put(["event"])
+    assert trigger.compute_scaling(events_queue, [consumer], [forwarder], config) == (-1, 1)
+
+    # the queue is half filled and the pushes are slow: more forwarders
+    for _ in range(4):
+        events_queue.get()
+    forwarder.push_latency = 10
+    consumer.set_lag(30)
+    assert trigger.compute_scaling(events_queue, [consumer], [forwarder], config) == (0, 1)
+
+    # the queue is empty but the consumers are late: more consumers, less forwarders
+    while not events_queue.empty():
+        events_queue.get()
+    forwarder.push_latency = 1
+    consumer.set_lag(600)
+    assert trigger.compute_scaling(events_queue, [consumer], [forwarder], config) == (1, -1)
+
+
+def test_scale_workers(trigger, events_queue):
+    with patch.object(Worker, "start") as mock_start:
+        workers = trigger.create_workers(1, EventsForwarder, trigger, events_queue)
+
+        assert trigger.scale_workers(workers, 1, 1, 2, EventsForwarder, trigger, events_queue) is True
+        assert len(workers) == 2
+        assert mock_start.call_count == 1
+
+        # the maximum is reached
+        assert trigger.scale_workers(workers, 1, 1, 2, EventsForwarder, trigger, events_queue) is False
+        assert len(workers) == 2
+
+        removed = workers[-1]
+        assert trigger.scale_workers(workers, -1, 1, 2, EventsForwarder, trigger, events_queue) is True
+        assert len(workers) == 1
+        assert not removed.is_running
+
+        # the minimum is reached
+        assert trigger.scale_workers(workers, -1, 1, 2, EventsForwarder, trigger, events_queue) is False
+        assert len(workers) == 1
+
+
+def test_scale_down_joins_the_removed_worker(trigger, events_queue):
+    workers = trigger.create_workers(2, EventsForwarder, trigger, events_queue)
+    for worker in workers:
+        worker.start()
+    removed = workers[-1]
+
+    assert trigger.scale_workers(workers, -1, 1, 2, EventsForwarder, trigger, events_queue) is True
+    assert len(workers) == 1
+    assert not removed.is_running
+    assert not removed.is_alive()
+
+    trigger.stop_workers(workers, timeout=5)
+
+
+def test_scale_down_keeps_the_worker_not_stopped_in_time(trigger, events_queue):
+    workers = trigger.create_workers(1, EventsForwarder, trigger, events_queue)
+    workers[0].start()
+    blocked = Mock(spec=EventsForwarder)
+    blocked.retire.return_value = False
+    workers.append(blocked)
+
+    trigger.scale_workers(workers, -1, 1, 2, EventsForwarder, trigger, events_queue)
+    assert len(workers) == 2
+    assert workers[-1] is blocked
+
+    workers.pop()
+    trigger.stop_workers(workers, timeout=5)
+
+
+def test_retired_event_forwarder_does_not_drain_queue(trigger, forwarder, events_queue):
+    for _ in range(10):
+        events_queue.put(["aaaaa"], block=False)
+
+    assert forwarder.retire(timeout=5) is True
+    forwarder.run()
+
+    # the events are left to the forwarders still running
+    assert events_queue.qsize() == 10
+    trigger.push_events_to_intakes.assert_not_called()
+
+
+def test_streaming_consumer_waits_for_its_messages_to_be_settled(trigger, streaming_consumer, events_queue):
+    message = create_streamed_message(b"data1")
+    streaming_consumer.on_message(message)
+    assert streaming_consumer.wait_settled_messages(timeout=0.1) is False
+
+    forwarder = EventsForwarder(trigger, events_queue, max_batch_size=1)
+    forwarder.pending_messages = [events_queue.get_nowait()]
+    forwarder.settle_pending_messages(["data1"], ["id1"])
+
+    assert message.ack.called
+    assert streaming_consumer.outstanding_messages == 0
+    assert streaming_consumer.wait_settled_messages(timeout=0.1) is True
+
+
+def test_stopped_streaming_consumer_closes_its_client_once_messages_settled(trigger, events_queue):
+    received = []
+
+    def subscribe(subscription, callback, flow_control):
+        message = create_streamed_message(b"data1")
+        callback(message)
+        received.append(message)
+        return Mock(**{"done.return_value": False})
+
+    consumer = StreamingMessagesConsumer(trigger, "subscription_name", events_queue)
+    with patch("google_module.pubsub.SubscriberClient") as mock_client_class:
+        client = mock_client_class.return_value
+        subscriber = client.__enter__.return_value
+        subscriber.subscribe.side_effect = subscribe
+
+        consumer.start()
+        received_event = events_queue.get(timeout=5)
+        consumer.stop()
+        time.sleep(0.2)
+
+        # the client is kept open while the message is not settled
+        assert consumer.is_alive()
+        client.__exit__.assert_not_called()
+
+        forwarder = EventsForwarder(trigger, events_queue, max_batch_size=1)
+        forwarder.pending_messages = [received_event]
+        forwarder.settle_pending_messages(["data1"], ["id1"])
+        consumer.join(timeout=5)
+
+    assert not consumer.is_alive()
+    assert received[0].ack.called
+    client.__exit__.assert_called_once()
+
+
+def test_stopped_event_forwarder_drains_queue(trigger, forwarder, events_queue):
+    events_queue.put(["aaaaa"] * 10, block=False)
+    forwarder.stop()
+
+    thread = Thread(target=forwarder.run)
+    thread.start()
+    thread.join(timeout=5)
+
+    assert not thread.is_alive()
+    assert events_queue.qsize() == 0
+    assert trigger.push_events_to_intakes.call_count == 1
+    assert forwarder.push_latency is not None
@@ -1,5 +1,7 @@
+import os
 import time
 import uuid
+from collections.abc import Hashable
 from datetime import datetime, timedelta, timezone
 from posixpath import join as urljoin
 from threading import Lock, Thread, Event
@@ -8,12 +10,16 @@ from typing import Any, Optional
 import orjson
 import requests
 import urllib3
+from dateutil.parser import isoparse
 from pydantic import BaseModel, ConfigDict, Field, model_validator
+from requests.adapters import HTTPAdapter
 from tenacity import retry, wait_exponential, stop_after_attempt, retry_if_exception_type
 
 from sekoiaio.utils import user_agent
 
 from .base import _SEKOIANotificationBaseTrigger
+from .helpers.alert_cache import AlertCache
+from .helpers.event_count_batcher import EventCountBatcher
 from .helpers.state_manager import AlertStateManager
 from .metrics import EVENTS_FORWARDED, EVENTS_FILTERED, THRESHOLD_CHECKS, STATE_SIZE
 
@@ -22,6 +28,68 @@ class SecurityAlertsTrigger(_SEKOIANotificationBaseTrigger):
     # List of alert types we can handle.
     HANDLED_EVENT_SUB_TYPES = [("alert", "created"), ("alert", "updated"), ("alert-comment", "created")]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Alerts retrieved from the Alert API, shared by the notifications of the same alert
+        self._alert_cache = AlertCache(
+            ttl=float(os.getenv("ALERT_CACHE_TTL", 5)),
+            max_size=int(os.getenv("ALERT_CACHE_MAX_SIZE", 1024)),
+        )
+        self._alert_api_session: Optional[requests.Session] = None
+
+    @property
+    def alert_api_session(self) -> requests.Session:
+        """Pooled HTTP session to the Alert API."""
+        if self._alert_api_session is None:
+            pool_size = int(os.getenv("ALERT_API_POOL_SIZE", 32))
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+            session.headers.update(
+                {
+                    "Authorization": f"Bearer {self.module.configuration['api_key']}",
+                    "User-Agent": user_agent(),
+                }
+            )
+            self._alert_api_session = session
+
+        return self._alert_api_session
+
+    def stop(self, *args, **kwargs):
+        super().stop(*args, **kwargs)
+        if self._alert_api_session is not None:
+            self._alert_api_session.close()
+            self._alert_api_session = None
+
+    @staticmethod
+    def _get_notification_time(message: dict[str, Any]) -> Optional[float]:
+        """Return the timestamp of the notification, if defined."""
+        created_at = message.get("metadata", {}).get("created_at")
+        if not created_at:
+            return None
+
+        try:
+            return isoparse(created_at).timestamp()
+        except (TypeError, ValueError):
+            return None
+
+    def _retrieve_notified_alert(self, alert_uuid: str, message: dict[str, Any]) -> dict[str, Any]:
+        """
+        Retrieve the alert of a notification.
+
+        An alert fetched, or being fetched, since the notification was received is reused, so the notifications
+        about the same alert share the same fetch. Without the reception time, the cached alerts can't be compared
+        reliably with the update notifications, nor with the notifications without a timestamp: the alert is
+        fetched again for them.
+        """
+        received_at = self.get_received_at(message)
+        if received_at is not None:
+            return self._retrieve_alert_from_alertapi(alert_uuid, not_before=received_at)
+
+        notification_time = self._get_notification_time(message)
+        refresh = notification_time is None or message.get("action") == "updated"
+        return self._retrieve_alert_from_alertapi(alert_uuid, not_before=notification_time, refresh=refresh)
+
     def handle_event(self, message):
         """Handle alert messages.
 
@@ -49,7 +117,7 @@ class SecurityAlertsTrigger(_SEKOIANotificationBaseTrigger):
             return
 
         try:
-            alert = self._retrieve_alert_from_alertapi(alert_uuid)
+            alert = self._retrieve_notified_alert(alert_uuid, message)
         except Exception as exp:
             self.log_exception(exp, message="Failed to fetch alert from Alert API")
             return
@@ -101,21 +169,30 @@ class SecurityAlertsTrigger(_SEKOIANotificationBaseTrigger):
     def _filter_notifications(self, message) -> bool:
         return True
 
+    def _retrieve_alert_from_alertapi(self, alert_uuid, not_before: Optional[float] = None, refresh: bool = False):
+        """
+        Retrieve an alert from the Alert API, through the alert cache.
+
+        Args:
+            alert_uuid: UUID of the alert
+            not_before: Time of the notification; alerts fetched before it are not reused
+            refresh: Fetch the alert again, even if cached
+        """
+        return self._alert_cache.get(
+            alert_uuid, lambda: self._fetch_alert_from_alertapi(alert_uuid), not_before=not_before, refresh=refresh
+        )
+
     @retry(
         reraise=True,
         wait=wait_exponential(max=10),
         stop=stop_after_attempt(10),
     )
-    def _retrieve_alert_from_alertapi(self, alert_uuid):
+    def _fetch_alert_from_alertapi(self, alert_uuid):
         api_url = urljoin(self.module.configuration["base_url"], f"api/v1/sic/alerts/{alert_uuid}")
         api_url = api_url.replace("/api/api", "/api")  # In case base_url ends with /api
 
-        api_key = self.module.configuration["api_key"]
-        headers = {"Authorization": f"Bearer {api_key}", "User-Agent": user_agent()}
-
-        response = requests.get(
+        response = self.alert_api_session.get(
             api_url,
-            headers=headers,
             params={
                 "stix": False,
                 "comments": False,
@@ -200,7 +277,7 @@ class AlertCommentCreatedTrigger(SecurityAlertsTrigger):
             return
 
         try:
-            alert = self._retrieve_alert_from_alertapi(alert_uuid)
+            alert = self._retrieve_notified_alert(alert_uuid, message)
             comment = self._retrieve_comment_from_alertapi(alert_uuid, comment_uuid)
         except Exception as exp:
             self.log_exception(exp, message="Failed to fetch alert from Alert API")
@@ -268,10 +345,7 @@ class AlertCommentCreatedTrigger(SecurityAlertsTrigger):
 
         api_url = api_url.replace("/api/api", "/api")  # In case base_url ends with /api
 
-        api_key = self.module.configuration["api_key"]
-        headers = {"Authorization": f"Bearer {api_key}", "User-Agent": user_agent()}
-
-        response = requests.get(api_url, headers=headers)
+        response = self.alert_api_session.get(api_url)
 
         if not response.ok:
             try:
@@ -413,6 +487,11 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
     # Check every 5 minutes to balance responsiveness vs resource usage
     TIME_THRESHOLD_CHECK_INTERVAL_SECONDS = 300
 
+    # Polling of the search jobs: the delay starts at the minimum and grows up to the maximum (in seconds)
+    SEARCH_JOB_POLL_MIN_INTERVAL = 0.25
+    SEARCH_JOB_POLL_MAX_INTERVAL = 5.0
+    SEARCH_JOB_POLL_BACKOFF = 1.5
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.state_manager: Optional[AlertStateManager] = None
@@ -427,6 +506,13 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         # Periodic time threshold check thread
         self._time_threshold_thread: Optional[Thread] = None
         self._time_threshold_stop_event = Event()
+        # Event counts from the search jobs, grouped by tick and cached
+        self._event_count_batcher = EventCountBatcher(
+            self._count_alerts_events,
+            batch_window=float(os.getenv("ALERT_EVENT_COUNT_BATCH_WINDOW", 0)),
+            max_batch_size=int(os.getenv("ALERT_EVENT_COUNT_BATCH_SIZE", 50)),
+            ttl=float(os.getenv("ALERT_EVENT_COUNT_CACHE_TTL", 10)),
+        )
 
     def _get_alert_lock(self, alert_uuid: str) -> Lock:
         """
@@ -492,7 +578,8 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         """
         Periodic loop that checks time thresholds for pending alerts.
 
-        This runs in a separate thread and checks every TIME_THRESHOLD_CHECK_INTERVAL_SECONDS.
+        This runs in a separate thread and checks when the next alert reaches the end of its time window,
+        at least every TIME_THRESHOLD_CHECK_INTERVAL_SECONDS.
         """
         self.log(message="Time threshold check loop started", level="debug")
 
@@ -502,11 +589,33 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
             except Exception as exp:
                 self.log_exception(exp, message="Error in time threshold check loop")
 
-            # Wait for interval or stop event
-            self._time_threshold_stop_event.wait(timeout=self.TIME_THRESHOLD_CHECK_INTERVAL_SECONDS)
+            # Wait for the next deadline or stop event
+            self._time_threshold_stop_event.wait(timeout=self._get_time_threshold_wait())
 
         self.log(message="Time threshold check loop stopped", level="debug")
 
+    def _get_time_threshold_wait(self) -> float:
+        """
+        Return the number of seconds to wait before the next time threshold check.
+
+        The wait ends when the next alert with pending events reaches the end of its time window, and is
+        capped to TIME_THRESHOLD_CHECK_INTERVAL_SECONDS to take into account the alerts becoming pending.
+        """
+        interval = float(self.TIME_THRESHOLD_CHECK_INTERVAL_SECONDS)
+        if self.state_manager is None:
+            return interval
+
+        try:
+            next_check = self.state_manager.get_next_time_check(self.validated_config.time_window_hours)
+        except Exception as exp:
+            self.log_exception(exp, message="Failed to compute the next time threshold check")
+            return interval
+
+        if next_check is None:
+            return interval
+
+        return min(interval, max(0.0, (next_check - datetime.now(timezone.utc)).total_seconds()))
+
     def _check_pending_time_thresholds(self):
         """
         Check all pending alerts for time threshold triggers.
@@ -535,7 +644,10 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
             self.log_exception(exp, message="Failed to reload state for time threshold check")
             return
 
-        pending_alerts = self.state_manager.get_alerts_pending_time_check(time_window_hours)
+        # Alerts not triggered are checked again at the next interval
+        pending_alerts = self.state_manager.get_alerts_pending_time_check(
+            time_window_hours, retry_delay_seconds=self.TIME_THRESHOLD_CHECK_INTERVAL_SECONDS
+        )
 
         if not pending_alerts:
             self.log(message="No pending alerts for time threshold check", level="debug")
@@ -745,6 +857,13 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         # Stop the time threshold thread
         self._stop_time_threshold_thread()
 
+        # Write the buffered state changes
+        if self.state_manager is not None:
+            try:
+                self.state_manager.flush()
+            except Exception as exp:
+                self.log_exception(exp, message="Failed to flush the state")
+
         # Close HTTP session
         if self._http_session is not None:
             self._http_session.close()
@@ -858,11 +977,8 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         # state from other concurrent notifications. Without this reload, we could read stale
         # data from the in-memory cache and trigger multiple times for the same alert.
         #
-        # Performance note: This reload adds S3 latency on every notification. This is an
-        # intentional trade-off: correctness (no duplicate triggers) over performance.
-        # In practice, alert notifications are relatively infrequent compared to event
-        # ingestion, and the S3 read latency (~50-100ms) is acceptable. For high-throughput
-        # scenarios, consider implementing a distributed lock or cache TTL mechanism.
+        # Performance note: The reload only lists the state journal and reads the segments
+        # written since the last load, so its cost doesn't depend on the number of tracked alerts.
         try:
             if self.state_manager is None:
                 self.log(message="State manager not initialized", level="error", alert_uuid=alert_uuid)
@@ -1597,63 +1713,70 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         Returns:
             True if job completed successfully, False otherwise
         """
+        return job_uuid in self._wait_for_search_jobs([job_uuid], timeout=timeout)
+
+    def _wait_for_search_jobs(self, job_uuids: list[str], timeout: int = 300) -> set[str]:
+        """
+        Wait for search jobs to complete, polling them together with an adaptive delay.
+
+        Args:
+            job_uuids: UUIDs of the search jobs
+            timeout: Maximum time to wait in seconds
+
+        Returns:
+            UUIDs of the jobs completed successfully
+        """
         if self._http_session is None:
             self.log(message="HTTP session not initialized", level="error")
-            return False
+            return set()
 
         start_time = time.time()
+        poll_interval = self.SEARCH_JOB_POLL_MIN_INTERVAL
+        pending = list(job_uuids)
+        completed: set[str] = set()
 
-        self.log(message=f"Waiting for search job {job_uuid} to complete", level="debug", job_uuid=job_uuid)
+        self.log(message=f"Waiting for {len(pending)} search jobs to complete", level="debug", job_uuids=pending)
 
         try:
-            # Wait for job to start (status != 0)
-            while True:
-                response = self._http_session.get(
-                    f"{self._events_api_path}/search/jobs/{job_uuid}",
-                    timeout=20,
-                )
-                response.raise_for_status()
-                status = response.json()["status"]
-
-                if status != 0:
-                    break
-
-                if time.time() - start_time > timeout:
-                    self.log(
-                        message=f"Search job {job_uuid} timed out waiting to start", level="error", job_uuid=job_uuid
-                    )
-                    return False
-
-                time.sleep(1)
-
-            # Wait for job to complete (status != 1)
-            while True:
-                response = self._http_session.get(
-                    f"{self._events_api_path}/search/jobs/{job_uuid}",
-                    timeout=20,
-                )
-                response.raise_for_status()
-                status = response.json()["status"]
-
-                if status != 1:
+            while pending:
+                # Status 0: not started, 1: in progress
+                still_pending = []
+                for job_uuid in pending:
+                    try:
+                        response = self._http_session.get(
+                            f"{self._events_api_path}/search/jobs/{job_uuid}",
+                            timeout=20,
+                        )
+                        response.raise_for_status()
+                        status = response.json()["status"]
+                    except Exception as e:
+                        self.log_exception(e, message=f"Failed to wait for search job {job_uuid}", job_uuid=job_uuid)
+                        continue
+
+                    if status in (0, 1):
+                        still_pending.append(job_uuid)
+                    else:
+                        self.log(message=f"Search job {job_uuid} completed", level="debug", job_uuid=job_uuid)
+                        completed.add(job_uuid)
+
+                pending = still_pending
+                if not pending:
                     break
 
                 if time.time() - start_time > timeout:
                     self.log(
-                        message=f"Search job {job_uuid} timed out waiting to complete",
+                        message=f"{len(pending)} search jobs timed out waiting to complete",
                         level="error",
-                        job_uuid=job_uuid,
+                        job_uuids=pending,
                     )
-                    return False
-
-                time.sleep(1)
-
-            self.log(message=f"Search job {job_uuid} completed", level="debug", job_uuid=job_uuid)
-            return True
+                    break
 
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * self.SEARCH_JOB_POLL_BACKOFF, self.SEARCH_JOB_POLL_MAX_INTERVAL)
         except Exception as e:
-            self.log_exception(e, message=f"Failed to wait for search job {job_uuid}", job_uuid=job_uuid)
-            return False
+            self.log_exception(e, message="Failed to wait for search jobs", job_uuids=pending)
+
+        return completed
 
     @retry(
         wait=wait_exponential(multiplier=1, min=1, max=10),
@@ -1827,7 +1950,8 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
         Get total count of events for an alert using the search job API.
 
         This method triggers a search job with size=0 to get only the total count
-        without fetching all events, which is much more efficient.
+        without fetching all events, which is much more efficient. The counts requested
+        during the same tick are grouped, and cached for a few seconds.
 
         Args:
             alert: Alert data dictionary (must contain short_id, first_seen_at, last_seen_at)
@@ -1857,23 +1981,75 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
             )
             return None
 
-        # Step 1: Trigger the search job with max_last_events=1 to minimize data transfer
-        job_uuid = self._trigger_event_search_job(alert_short_id, first_seen_at, last_seen_at, limit=1)
-        if not job_uuid:
-            self.log(message="Failed to trigger search job for event counting", level="error", alert_uuid=alert_uuid)
-            return None
-
-        # Step 2: Wait for the job to complete
-        if not self._wait_for_search_job(job_uuid):
+        event_count = self._event_count_batcher.get((alert_short_id, first_seen_at, last_seen_at), alert)
+        if event_count is not None:
             self.log(
-                message="Search job did not complete for event counting",
-                level="error",
+                message=f"Successfully got total event count",
+                level="debug",
                 alert_uuid=alert_uuid,
-                job_uuid=job_uuid,
+                event_count=event_count,
             )
-            return None
 
-        # Step 3: Get only the first page to extract the total count
+        return event_count
+
+    def _count_alerts_events(self, alerts: dict[Hashable, dict[str, Any]]) -> dict[Hashable, Optional[int]]:
+        """
+        Count the events of several alerts, with search jobs run concurrently.
+
+        Args:
+            alerts: Alerts to count the events of, by key
+
+        Returns:
+            Total number of events of each alert, or None if the count failed
+        """
+        # Step 1: Trigger the search jobs with max_last_events=1 to minimize data transfer
+        jobs: dict[Hashable, str] = {}
+        for key, alert in alerts.items():
+            job_uuid = self._trigger_event_search_job(
+                alert["short_id"], alert["first_seen_at"], alert["last_seen_at"], limit=1
+            )
+            if job_uuid:
+                jobs[key] = job_uuid
+            else:
+                self.log(
+                    message="Failed to trigger search job for event counting",
+                    level="error",
+                    alert_uuid=alert.get("uuid"),
+                )
+
+        # Step 2: Wait for the jobs to complete
+        completed = self._wait_for_search_jobs(list(jobs.values())) if jobs else set()
+
+        # Step 3: Get only the first page of each job to extract the total count
+        counts: dict[Hashable, Optional[int]] = {}
+        for key, alert in alerts.items():
+            job_uuid = jobs.get(key)
+            if job_uuid is None:
+                counts[key] = None
+            elif job_uuid not in completed:
+                self.log(
+                    message="Search job did not complete for event counting",
+                    level="error",
+                    alert_uuid=alert.get("uuid"),
+                    job_uuid=job_uuid,
+                )
+                counts[key] = None
+            else:
+                counts[key] = self._get_search_job_total(job_uuid, alert_uuid=alert.get("uuid"))
+
+        return counts
+
+    def _get_search_job_total(self, job_uuid: str, alert_uuid: Optional[str] = None) -> Optional[int]:
+        """
+        Get the total number of events found by a completed search job.
+
+        Args:
+            job_uuid: UUID of the search job
+            alert_uuid: UUID of the alert the events are counted for
+
+        Returns:
+            Total number of events, or None if API call failed
+        """
         try:
             if self._http_session is None:
                 self.log(message="HTTP session not initialized", level="error")
@@ -1886,17 +2062,7 @@ class AlertEventsThresholdTrigger(SecurityAlertsTrigger):
             )
             response.raise_for_status()
 
-            data = response.json()
-            event_count = data.get("total", 0)
-
-            self.log(
-                message=f"Successfully got total event count",
-                level="debug",
-                alert_uuid=alert_uuid,
-                event_count=event_count,
-            )
-
-            return event_count
+            return response.json().get("total", 0)
 
         except Exception as e:
             self.log_exception(e, message=f"Failed to get event count from search job", alert_uuid=alert_uuid)
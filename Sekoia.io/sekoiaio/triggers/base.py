@@ -1,5 +1,6 @@
 # flake8: noqa: E402
 import os
+import time
 from datetime import datetime, timedelta
 from posixpath import join as urljoin
 
@@ -42,9 +43,18 @@ class _SEKOIANotificationBaseTrigger(Trigger):
     seconds_without_events = 3600 * 24  # Force restart the pod every day if no events were received
     last_heartbeat_threshold = 600  # Force restart the pod if no heartbeat was received for 10 minutes
 
+    # Delay between the pings of the websocket and maximum time, in seconds, to receive their pong
+    ping_interval = 20
+    ping_timeout = 5
+
+    # Key under which the local time a message was received at is added to it
+    RECEIVED_AT_KEY = "_received_at"
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self._message_processor: MessagesProcessor = MessagesProcessor(self.handler_dispatcher)
+        self._message_processor: MessagesProcessor = MessagesProcessor(
+            self.handler_dispatcher, key_func=self.get_message_key
+        )
         self._websocket: WebSocketApp | None = None
         self._last_error: datetime | None = None
         self._last_close: datetime | None = None
@@ -104,7 +114,9 @@ class _SEKOIANotificationBaseTrigger(Trigger):
         self.log("Websocket starts listening", level="info")
         while self.running:
             try:
-                self._websocket.run_forever(ping_interval=20, ping_timeout=5, sslopt=self.ssl_opt)
+                self._websocket.run_forever(
+                    ping_interval=self.ping_interval, ping_timeout=self.ping_timeout, sslopt=self.ssl_opt
+                )
             except WebSocketTimeoutException:
                 self.log("The websocket timed out", level="error")
 
@@ -141,20 +153,74 @@ class _SEKOIANotificationBaseTrigger(Trigger):
         self._last_close = now
         self.log("Socket closed", level="warning")
 
-    def on_message(self, _, raw_message: str):
+    def on_message(self, ws, raw_message: str):
         self.heartbeat()
-        self._message_processor.push_message(raw_message)
 
-    def handler_dispatcher(self, raw_message: str):
+        # Decode the message once, to find its key; invalid messages are reported by the dispatcher
+        message: str | dict = raw_message
+        try:
+            message = json.loads(raw_message)
+        except Exception:
+            pass
+
+        received_at = time.time()
+        if isinstance(message, dict):
+            message[self.RECEIVED_AT_KEY] = received_at
+
+        self._message_processor.push_message(message)
+        self._forget_unread_pings(ws, received_at)
+
+    @classmethod
+    def get_received_at(cls, message: dict) -> float | None:
+        """Return the local time the message was received at, if known."""
+        received_at = message.get(cls.RECEIVED_AT_KEY)
+        return received_at if isinstance(received_at, float) else None
+
+    @staticmethod
+    def _forget_unread_pings(ws: WebSocketApp | None, since: float):
+        """Reset the pings sent while the reader was blocked by the back-pressure of the messages processor.
+
+        Their pongs could not be read yet, so the websocket would see them as timed out and drop the
+        connection. The next ping checks the connection again.
+
+        """
+        if isinstance(ws, WebSocketApp) and ws.last_ping_tm >= since:
+            ws.last_ping_tm = ws.last_pong_tm = 0.0
+
+    @staticmethod
+    def get_message_key(message: str | dict) -> str | None:
+        """Return the UUID of the entity (alert, case) the message is about.
+
+        Messages about the same entity are processed sequentially, in
+        the order they were received.
+
+        """
+        if not isinstance(message, dict):
+            return None
+
+        attributes = message.get("attributes")
+        if not isinstance(attributes, dict):
+            return None
+
+        return attributes.get("alert_uuid") or attributes.get("case_uuid") or attributes.get("uuid")
+
+    def handler_dispatcher(self, raw_message: str | dict):
         """Dispatch events to handler methods given the event type.
 
         This method will load JSON messages and then forward message
         (as dict) to `handle_${event_type}` method.
 
         """
-        try:
-            message = json.loads(raw_message)
-        except Exception:
+        if isinstance(raw_message, dict):
+            message = raw_message
+        else:
+            try:
+                message = json.loads(raw_message)
+            except Exception:
+                self.log("Invalid JSON message received from LiveAPI", level="error")
+                return
+
+        if not isinstance(message, dict):
             self.log("Invalid JSON message received from LiveAPI", level="error")
             return
 
@@ -0,0 +1,136 @@
+# alert_cache.py
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import Any, Optional
+
+from ..metrics import ALERT_CACHE_REQUESTS
+
+
+@dataclass
+class _CachedValue:
+    value: Any
+    fetched_at: float
+    expires_at: float
+
+
+@dataclass
+class _Fetch:
+    started_at: float
+    done: Event = field(default_factory=Event)
+    value: Any = None
+    error: Optional[BaseException] = None
+
+
+class AlertCache:
+    """
+    Short-lived and size-bounded cache of the alerts retrieved from the Alert API.
+
+    Concurrent retrievals of the same alert are coalesced into a single fetch (single-flight).
+
+    A value (or a fetch in progress) is only used for a notification received before the fetch started, so
+    a notification gets a version of the alert at least as recent as the notification itself. The fetch times
+    are local: they are best compared with the local time the notification was received at. The notifications
+    whose time can't be compared reliably refresh the alert instead.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_size: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Lifetime of the cached values, in seconds (0 disables the cache, but not the coalescing)
+            max_size: Maximum number of values kept in cache
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._values: OrderedDict[Hashable, _CachedValue] = OrderedDict()
+        self._fetches: dict[Hashable, _Fetch] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def get(
+        self, key: Hashable, fetch: Callable[[], Any], not_before: Optional[float] = None, refresh: bool = False
+    ) -> Any:
+        """
+        Get the value of a key, fetching it if not in cache.
+
+        Args:
+            key: The key of the value (e.g. the alert UUID)
+            fetch: Callable fetching the value
+            not_before: Time of the notification; values fetched before this time are ignored
+            refresh: Always fetch a new value, without using the cached value or a fetch in progress
+
+        Returns:
+            The value
+        """
+        with self._lock:
+            now = time.time()
+
+            cached = None if refresh else self._values.get(key)
+            if cached is not None:
+                if cached.expires_at > now and (not_before is None or cached.fetched_at >= not_before):
+                    self._values.move_to_end(key)
+                    ALERT_CACHE_REQUESTS.labels(result="hit").inc()
+                    return cached.value
+
+                if cached.expires_at <= now:
+                    del self._values[key]
+
+            current_fetch = None if refresh else self._fetches.get(key)
+            if current_fetch is not None and (not_before is None or current_fetch.started_at >= not_before):
+                is_leader = False
+                ALERT_CACHE_REQUESTS.labels(result="coalesced").inc()
+            else:
+                current_fetch = _Fetch(started_at=now)
+                self._fetches[key] = current_fetch
+                is_leader = True
+                ALERT_CACHE_REQUESTS.labels(result="miss").inc()
+
+        if not is_leader:
+            current_fetch.done.wait()
+            if current_fetch.error is not None:
+                raise current_fetch.error
+
+            return current_fetch.value
+
+        try:
+            current_fetch.value = fetch()
+        except BaseException as error:
+            current_fetch.error = error
+            raise
+        finally:
+            with self._lock:
+                if self._fetches.get(key) is current_fetch:
+                    del self._fetches[key]
+
+                if current_fetch.error is None and self.ttl > 0:
+                    self._store(key, current_fetch)
+
+            current_fetch.done.set()
+
+        return current_fetch.value
+
+    def _store(self, key: Hashable, completed_fetch: _Fetch):
+        # Don't replace a value fetched more recently
+        cached = self._values.get(key)
+        if cached is not None and cached.fetched_at > completed_fetch.started_at:
+            return
+
+        self._values[key] = _CachedValue(
+            value=completed_fetch.value,
+            fetched_at=completed_fetch.started_at,
+            expires_at=time.time() + self.ttl,
+        )
+        self._values.move_to_end(key)
+
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
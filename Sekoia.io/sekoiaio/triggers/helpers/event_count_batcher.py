@@ -0,0 +1,129 @@
+# event_count_batcher.py
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass, field
+from threading import Event, Lock
+from typing import Any, Optional
+
+
+@dataclass
+class _Batch:
+    items: dict[Hashable, Any] = field(default_factory=dict)
+    results: dict[Hashable, Optional[int]] = field(default_factory=dict)
+    full: Event = field(default_factory=Event)
+    done: Event = field(default_factory=Event)
+    error: Optional[BaseException] = None
+
+
+class EventCountBatcher:
+    """
+    Group the event count requests received during a short window (a tick) and count them together.
+
+    The first request of a tick waits up to `batch_window` seconds (or until the batch is full) for other
+    requests, then counts the events of the whole batch with a single call of `count_many`.
+    A request for a key already being counted joins the batch in progress, and the counts are cached
+    for `ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        count_many: Callable[[dict[Hashable, Any]], dict[Hashable, Optional[int]]],
+        batch_window: float = 0.0,
+        max_batch_size: int = 50,
+        ttl: float = 10.0,
+        max_cache_size: int = 1024,
+    ):
+        """
+        Args:
+            count_many: Function counting the events of the items of a batch, by key (None if the count failed)
+            batch_window: Seconds to wait for other requests before counting (0 to count each request on arrival)
+            max_batch_size: Maximum number of items counted together
+            ttl: Lifetime of the cached counts, in seconds (0 disables the cache)
+            max_cache_size: Maximum number of counts kept in cache
+        """
+        self.count_many = count_many
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self.ttl = ttl
+        self.max_cache_size = max_cache_size
+        self._cache: OrderedDict[Hashable, tuple[int, float]] = OrderedDict()
+        self._open_batch: Optional[_Batch] = None
+        self._batches: dict[Hashable, _Batch] = {}  # Batch in progress of each key
+        self._lock = Lock()
+
+    def get(self, key: Hashable, item: Any) -> Optional[int]:
+        """
+        Get the event count of an item.
+
+        Args:
+            key: Key identifying the count (e.g. the alert and its time range)
+            item: Item to count the events of
+
+        Returns:
+            The event count, or None if the count failed
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                if cached[1] > time.monotonic():
+                    self._cache.move_to_end(key)
+                    return cached[0]
+                del self._cache[key]
+
+            is_leader = False
+            batch = self._batches.get(key)
+            if batch is None:
+                batch = self._open_batch
+                if batch is None or len(batch.items) >= self.max_batch_size:
+                    batch = self._open_batch = _Batch()
+                    is_leader = True
+
+                batch.items[key] = item
+                self._batches[key] = batch
+                if len(batch.items) >= self.max_batch_size:
+                    batch.full.set()
+
+        if is_leader:
+            self._run(batch)
+
+        batch.done.wait()
+        if batch.error is not None:
+            raise batch.error
+
+        return batch.results.get(key)
+
+    def _run(self, batch: _Batch):
+        if self.batch_window > 0:
+            batch.full.wait(self.batch_window)
+
+        with self._lock:
+            # Close the batch: next requests open a new one
+            if self._open_batch is batch:
+                self._open_batch = None
+            items = dict(batch.items)
+
+        try:
+            batch.results = self.count_many(items)
+        except BaseException as error:
+            batch.error = error
+        finally:
+            with self._lock:
+                expires_at = time.monotonic() + self.ttl
+                for key in items:
+                    if self._batches.get(key) is batch:
+                        del self._batches[key]
+
+                    count = batch.results.get(key)
+                    if batch.error is None and self.ttl > 0 and count is not None:
+                        self._cache[key] = (count, expires_at)
+                        self._cache.move_to_end(key)
+
+                while len(self._cache) > self.max_cache_size:
+                    self._cache.popitem(last=False)
+
+            batch.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
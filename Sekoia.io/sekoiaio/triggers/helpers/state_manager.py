@@ -1,9 +1,15 @@
 # state_manager.py
+import heapq
 import json
-from datetime import datetime, timezone
+import os
+import time
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from threading import RLock
 from typing import Any, Optional, Callable
 
+import orjson
+
 
 class AlertStateManager:
     """
@@ -32,23 +38,60 @@ class AlertStateManager:
         "metadata": {
             "version": str,
             "last_cleanup": str (ISO 8601),
+            "journal_sequence": int (last journal segment included in the snapshot),
         }
     }
+
+    Persistence:
+    The state file is a snapshot of the state. Each change of an alert is appended to a journal,
+    made of numbered segments stored next to the snapshot (`<state file stem>.journal/`), so
+    the cost of a change doesn't depend on the number of tracked alerts. The changes are buffered
+    for `flush_interval` seconds before being written in a new segment. Once `compaction_threshold`
+    changes are journaled, the journal is compacted into a new snapshot.
+    On load, the segments more recent than the snapshot are replayed.
+
+    Time threshold index:
+    The alerts with pending events are indexed in a min-heap by the reference time of their
+    time window, so the alerts due for a time threshold check are found without scanning the
+    whole state. The heap is lazily cleaned: an entry is ignored if it doesn't match the current
+    reference time of its alert.
     """
 
     VERSION = "1.1"
 
-    def __init__(self, state_file_path: Path, logger: Optional[Callable] = None):
+    def __init__(
+        self,
+        state_file_path: Path,
+        logger: Optional[Callable] = None,
+        flush_interval: Optional[float] = None,
+        compaction_threshold: Optional[int] = None,
+    ):
         """
         Initialize state manager.
 
         Args:
             state_file_path: Path to the state JSON file (can be S3Path or PosixPath)
             logger: Optional logger callable (can be a function or logger object)
+            flush_interval: Seconds to buffer the changes before writing them in the journal (0 to write each change)
+            compaction_threshold: Number of journaled changes triggering a compaction into a snapshot
         """
         # Keep the original path object (S3Path, PosixPath, etc.) to preserve S3 functionality
         self.state_file_path = state_file_path
+        self.journal_path = state_file_path.parent / f"{state_file_path.stem}.journal"
         self.logger = logger
+        self.flush_interval = (
+            flush_interval if flush_interval is not None else float(os.getenv("ALERT_STATE_FLUSH_INTERVAL", 0))
+        )
+        self.compaction_threshold = compaction_threshold or int(os.getenv("ALERT_STATE_COMPACTION_THRESHOLD", 1000))
+
+        self._lock = RLock()
+        self._pending_changes: list[dict[str, Any]] = []  # Changes not written in the journal yet
+        self._journaled_changes = 0  # Changes written in the journal since the last snapshot
+        self._sequence = 0  # Number of the last journal segment written or replayed
+        self._last_flush = time.monotonic()
+        # Index of the time windows: heap of (reference timestamp, alert uuid), built on first use
+        self._time_check_heap: list[tuple[float, str]] = []
+        self._time_check_references: Optional[dict[str, float]] = None
         self._state: dict[str, Any] = self._load_state()
 
     def _log(self, message: str, level: str = "info", **kwargs):
@@ -64,8 +107,8 @@ class AlertStateManager:
         """Load JSON from S3 using Path.open() for SDK compatibility."""
         try:
             # Use Path.open() instead of smart_open for SDK-managed paths
-            with self.state_file_path.open("r") as f:
-                state = json.load(f)
+            with self.state_file_path.open("rb") as f:
+                state = orjson.loads(f.read())
                 self._log("State file loaded successfully from S3", level="debug")
         except json.JSONDecodeError as exc:
             self._log(
@@ -74,7 +117,7 @@ class AlertStateManager:
                 error=str(exc),
                 file_path=str(self.state_file_path),
             )
-            return {
+            state = {
                 "alerts": {},
                 "metadata": {
                     "version": self.VERSION,
@@ -89,7 +132,7 @@ class AlertStateManager:
                 error=str(exc),
                 error_type=type(exc).__name__,
             )
-            return {
+            state = {
                 "alerts": {},
                 "metadata": {
                     "version": self.VERSION,
@@ -116,18 +159,159 @@ class AlertStateManager:
                 "last_cleanup": datetime.now(timezone.utc).isoformat(),
             },
         )
+
+        # Replay the changes journaled after the snapshot
+        self._sequence = state["metadata"].get("journal_sequence", 0)
+        self._journaled_changes = self._replay_journal(state)
+        self._pending_changes = []
         return state
 
+    def _list_journal_segments(self) -> list[tuple[int, Path]]:
+        """List the segments of the journal, ordered by sequence number."""
+        try:
+            if not self.journal_path.exists():
+                return []
+
+            segments = []
+            for segment_path in self.journal_path.iterdir():
+                if segment_path.suffix == ".jsonl" and segment_path.stem.isdigit():
+                    segments.append((int(segment_path.stem), segment_path))
+        except (FileNotFoundError, IOError, OSError) as exc:
+            self._log("Failed to list the journal segments", level="warning", error=str(exc))
+            return []
+
+        return sorted(segments, key=lambda segment: segment[0])
+
+    def _replay_journal(self, state: dict[str, Any]) -> int:
+        """
+        Apply the journal segments more recent than the last applied one to the state.
+
+        Returns:
+            Number of changes applied
+        """
+        applied = 0
+        for sequence, segment_path in self._list_journal_segments():
+            if sequence <= self._sequence:
+                continue
+
+            try:
+                with segment_path.open("rb") as f:
+                    lines = f.read().splitlines()
+            except (FileNotFoundError, IOError, OSError) as exc:
+                self._log("Failed to read journal segment", level="error", error=str(exc), segment=str(segment_path))
+                continue
+
+            for line in lines:
+                try:
+                    change = orjson.loads(line)
+                    self._apply_change(state, change)
+                    if self._time_check_references is not None and state is self._state:
+                        self._index_alert(change["key"])
+                    applied += 1
+                except (orjson.JSONDecodeError, KeyError, TypeError) as exc:
+                    # A partially written change can't be recovered
+                    self._log(
+                        "Skipping invalid journal entry", level="warning", error=str(exc), segment=str(segment_path)
+                    )
+
+            self._sequence = sequence
+
+        if applied:
+            self._log("Journal replayed", level="debug", applied_changes=applied, sequence=self._sequence)
+
+        return applied
+
+    @staticmethod
+    def _apply_change(state: dict[str, Any], change: dict[str, Any]):
+        if change["op"] == "put":
+            state["alerts"][change["key"]] = change["value"]
+
+    def _record_change(self, change: dict[str, Any]):
+        """Append a change to the journal, writing it according to the flush interval."""
+        with self._lock:
+            self._pending_changes.append(change)
+            if time.monotonic() - self._last_flush >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """
+        Write the buffered changes in a new journal segment, and compact the journal if needed.
+        """
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending_changes:
+                return
+
+            if self._journaled_changes + len(self._pending_changes) >= self.compaction_threshold:
+                self.compact()
+                return
+
+            sequence = self._sequence + 1
+            segment_path = self.journal_path / f"{sequence:016d}.jsonl"
+            try:
+                self.journal_path.mkdir(parents=True, exist_ok=True)
+                with segment_path.open("wb") as f:
+                    f.write(b"".join(orjson.dumps(change) + b"\n" for change in self._pending_changes))
+            except Exception as e:
+                # Changes are kept to be written with the next flush
+                self._log(
+                    "Failed to write changes in the journal",
+                    level="error",
+                    error=str(e),
+                    error_type=type(e).__name__,
+                    segment=str(segment_path),
+                )
+                raise
+
+            self._sequence = sequence
+            self._journaled_changes += len(self._pending_changes)
+            self._pending_changes = []
+
+    def compact(self):
+        """
+        Write the whole state in a new snapshot and remove the journal segments it includes.
+        """
+        with self._lock:
+            self._save_state_to_s3()
+
+            for sequence, segment_path in self._list_journal_segments():
+                if sequence > self._sequence:
+                    continue
+
+                try:
+                    segment_path.unlink()
+                except (FileNotFoundError, IOError, OSError) as exc:
+                    # The segment is already included in the snapshot and will be ignored on load
+                    self._log(
+                        "Failed to remove journal segment",
+                        level="warning",
+                        error=str(exc),
+                        segment=str(segment_path),
+                    )
+
+            self._log("Journal compacted", level="debug", sequence=self._sequence)
+
     def _save_state_to_s3(self):
-        """Write JSON to S3 using Path.open() for SDK compatibility."""
+        """Write the snapshot to S3 using Path.open() for SDK compatibility."""
         try:
-            # Ensure parent directory exists - required for S3Path (see SDK storage.py)
-            # This pattern is used in all other automation modules
-            self.state_file_path.parent.mkdir(parents=True, exist_ok=True)
+            with self._lock:
+                # Ensure parent directory exists - required for S3Path (see SDK storage.py)
+                # This pattern is used in all other automation modules
+                self.state_file_path.parent.mkdir(parents=True, exist_ok=True)
+
+                # The snapshot includes every change, journaled or not
+                self._state["metadata"]["journal_sequence"] = self._sequence
+
+                # Use Path.open() for SDK-managed S3 paths
+                with self.state_file_path.open("wb") as f:
+                    f.write(orjson.dumps(self._state))
+
+                self._pending_changes = []
+                self._journaled_changes = 0
+                self._last_flush = time.monotonic()
 
-            # Use Path.open() for SDK-managed S3 paths
-            with self.state_file_path.open("w", encoding="utf-8") as f:
-                json.dump(self._state, f, indent=2)
+                # The snapshot may include changes made directly on the state: reindex it
+                self._time_check_references = None
             self._log("State saved successfully to S3", level="debug")
         except Exception as e:
             self._log(
@@ -142,6 +326,7 @@ class AlertStateManager:
     def _load_state(self) -> dict[str, Any]:
         """Load state from S3."""
         self._log("Loading state from S3", level="debug", file_path=str(self.state_file_path))
+        self._time_check_references = None  # The index will be rebuilt from the new state
         try:
             return self._load_state_from_s3()
         except Exception as exc:
@@ -164,7 +349,7 @@ class AlertStateManager:
         """Save state to S3."""
         self._log("Saving state to S3", level="debug", file_path=str(self.state_file_path))
         try:
-            self._save_state_to_s3()
+            self.compact()
             self._log(
                 "State saved successfully",
                 level="debug",
@@ -273,9 +458,6 @@ class AlertStateManager:
         )
         now = datetime.now(timezone.utc).isoformat()
 
-        # Reload state from S3 to get latest version (use _load_state for consistent error handling)
-        self._state = self._load_state()
-
         existing = self._state["alerts"].get(alert_uuid)
 
         if existing:
@@ -314,8 +496,10 @@ class AlertStateManager:
             }
             self._log(f"Created new state for alert {alert_short_id}", level="debug", alert_uuid=alert_uuid)
 
-        # Save back to S3
-        self._save_state_to_s3()
+        self._index_alert(alert_uuid)
+
+        # Journal the change
+        self._record_change({"op": "put", "key": alert_uuid, "value": self._state["alerts"][alert_uuid]})
 
     def cleanup_old_states(self, cutoff_date: datetime) -> int:
         """
@@ -336,6 +520,7 @@ class AlertStateManager:
 
         try:
             # Reload state from S3 to get latest version (use _load_state for consistent error handling)
+            self.flush()
             self._state = self._load_state()
 
             cutoff_iso = cutoff_date.isoformat()
@@ -359,8 +544,8 @@ class AlertStateManager:
 
             if to_remove:
                 self._state["metadata"]["last_cleanup"] = datetime.now(timezone.utc).isoformat()
-                # save back to S3
-                self._save_state_to_s3()
+                # The whole state was scanned: write a new snapshot
+                self.compact()
                 self._log(
                     f"Cleanup completed: removed {len(to_remove)} old states",
                     level="info",
@@ -403,10 +588,8 @@ class AlertStateManager:
         Update cached alert info and current event count (without triggering).
         Used to store alert data from notifications to avoid API calls.
 
-        Note: This method reloads state from S3 on each call to ensure consistency.
-        While this adds latency per notification, it ensures we don't lose updates
-        from other processes. For high-volume scenarios, consider implementing
-        a write-through cache or batching updates.
+        Note: Only the change is appended to the journal, the state isn't reloaded
+        (see `reload_state` for the concurrency model).
 
         Args:
             alert_uuid: UUID of the alert
@@ -415,10 +598,6 @@ class AlertStateManager:
         """
         now = datetime.now(timezone.utc).isoformat()
 
-        # Reload state from S3 to get latest version before updating
-        # This ensures consistency when multiple processes may be updating
-        self._state = self._load_state()
-
         existing = self._state["alerts"].get(alert_uuid)
 
         if existing:
@@ -460,8 +639,10 @@ class AlertStateManager:
                 event_count=event_count,
             )
 
-        # Save back to S3
-        self._save_state_to_s3()
+        self._index_alert(alert_uuid)
+
+        # Journal the change
+        self._record_change({"op": "put", "key": alert_uuid, "value": self._state["alerts"][alert_uuid]})
 
     def get_alert_info(self, alert_uuid: str) -> Optional[dict[str, Any]]:
         """
@@ -483,7 +664,105 @@ class AlertStateManager:
             return state.get("alert_info")
         return None
 
-    def get_alerts_pending_time_check(self, time_window_hours: int) -> list[dict[str, Any]]:
+    def _get_time_check_reference(self, alert_uuid: str, state: dict[str, Any]) -> Optional[float]:
+        """
+        Return the start of the time window of an alert with pending events, as a timestamp.
+
+        Returns:
+            The timestamp, or None if the alert has no pending events
+        """
+        last_event_at_str = state.get("last_event_at")
+        current_count = state.get("current_event_count", 0)
+        last_triggered_count = state.get("last_triggered_event_count", 0)
+
+        # Skip if no events received yet, or if there are no pending events (current > last triggered)
+        if not last_event_at_str or current_count - last_triggered_count <= 0:
+            return None
+
+        # Determine the reference time for the time window check:
+        # - If previously triggered: use last_triggered_at
+        # - If never triggered: use created_at (first time we saw this alert)
+        # - Fallback to last_event_at if no other timestamp available
+        reference_time_str = state.get("last_triggered_at") or state.get("created_at") or last_event_at_str
+
+        try:
+            reference_time = datetime.fromisoformat(reference_time_str.replace("Z", "+00:00"))
+            if reference_time.tzinfo is None:
+                reference_time = reference_time.replace(tzinfo=timezone.utc)
+        except (ValueError, AttributeError):
+            self._log(
+                f"Invalid reference timestamp for alert {alert_uuid}",
+                level="warning",
+                alert_uuid=alert_uuid,
+                reference_time=reference_time_str,
+            )
+            return None
+
+        return reference_time.timestamp()
+
+    def _index_alert(self, alert_uuid: str):
+        """Update the time window of an alert in the index."""
+        with self._lock:
+            if self._time_check_references is None:
+                return
+
+            state = self._state["alerts"].get(alert_uuid)
+            reference = self._get_time_check_reference(alert_uuid, state) if state else None
+            if reference is None:
+                # The entry left in the heap will be ignored
+                self._time_check_references.pop(alert_uuid, None)
+            elif self._time_check_references.get(alert_uuid) != reference:
+                self._time_check_references[alert_uuid] = reference
+                heapq.heappush(self._time_check_heap, (reference, alert_uuid))
+
+    def _build_time_check_index(self) -> dict[str, float]:
+        """Build the index of the time windows from the whole state, and return the time window of each alert."""
+        references: dict[str, float] = {}
+        for alert_uuid, state in self._state["alerts"].items():
+            reference = self._get_time_check_reference(alert_uuid, state)
+            if reference is not None:
+                references[alert_uuid] = reference
+
+        self._time_check_heap = [(reference, alert_uuid) for alert_uuid, reference in references.items()]
+        heapq.heapify(self._time_check_heap)
+        self._time_check_references = references
+        return references
+
+    def _peek_time_check(self) -> Optional[tuple[float, str]]:
+        """Return the index entry with the earliest time window, discarding the outdated entries."""
+        references = self._time_check_references
+        if references is None:
+            references = self._build_time_check_index()
+
+        while self._time_check_heap:
+            reference, alert_uuid = self._time_check_heap[0]
+            if references.get(alert_uuid) == reference:
+                return reference, alert_uuid
+            heapq.heappop(self._time_check_heap)
+
+        return None
+
+    def get_next_time_check(self, time_window_hours: int) -> Optional[datetime]:
+        """
+        Get the date when the next alert with pending events reaches the end of its time window.
+
+        Args:
+            time_window_hours: Time window in hours (1-168)
+
+        Returns:
+            The date, or None if no alert has pending events
+        """
+        with self._lock:
+            entry = self._peek_time_check()
+
+        if entry is None:
+            return None
+
+        return datetime.fromtimestamp(entry[0], tz=timezone.utc) + timedelta(hours=time_window_hours)
+
+    def get_alerts_pending_time_check(
+        self, time_window_hours: int, retry_delay_seconds: Optional[float] = None
+    ) -> list[dict[str, Any]]:
         """
         Get alerts that have pending events and the time window has elapsed since last trigger.
         Used for periodic time threshold checking.
@@ -493,83 +772,47 @@ class AlertStateManager:
         - If previously triggered: check if time_window_hours has passed since last trigger
         - Only return alerts with pending events (current_count > last_triggered_count)
 
+        Only the due alerts are read from the index. An alert returned and not triggered
+        (its state isn't updated) is returned again after `retry_delay_seconds`.
+
         Args:
             time_window_hours: Time window in hours (1-168)
+            retry_delay_seconds: Delay before returning again an alert not triggered (next call by default)
 
         Returns:
             List of alert states that need time threshold triggering
         """
-        from datetime import timedelta
-
-        now = datetime.now(timezone.utc)
+        window_seconds = timedelta(hours=time_window_hours).total_seconds()
+        now = datetime.now(timezone.utc).timestamp()
 
         pending_alerts = []
-        for alert_uuid, state in self._state["alerts"].items():
-            last_event_at_str = state.get("last_event_at")
-            last_triggered_at_str = state.get("last_triggered_at")
-            created_at_str = state.get("created_at")
-            current_count = state.get("current_event_count", 0)
-            last_triggered_count = state.get("last_triggered_event_count", 0)
-
-            # Skip if no events received yet
-            if not last_event_at_str:
-                continue
-
-            # Check if there are pending events (current > last triggered)
-            pending_events = current_count - last_triggered_count
-            if pending_events <= 0:
-                continue
-
-            # Determine the reference time for the time window check:
-            # - If previously triggered: use last_triggered_at
-            # - If never triggered: use created_at (first time we saw this alert)
-            if last_triggered_at_str is not None:
-                reference_time_str = last_triggered_at_str
-            elif created_at_str is not None:
-                reference_time_str = created_at_str
-            else:
-                # Fallback to last_event_at if no other timestamp available
-                reference_time_str = last_event_at_str
-
-            # Parse reference timestamp
-            try:
-                reference_time = datetime.fromisoformat(reference_time_str.replace("Z", "+00:00"))
-                if reference_time.tzinfo is None:
-                    reference_time = reference_time.replace(tzinfo=timezone.utc)
-            except (ValueError, AttributeError):
-                self._log(
-                    f"Invalid reference timestamp for alert {alert_uuid}",
-                    level="warning",
-                    alert_uuid=alert_uuid,
-                    reference_time=reference_time_str,
-                )
-                continue
-
-            # Check if time_window_hours has elapsed since reference time
-            time_since_reference = now - reference_time
-            required_duration = timedelta(hours=time_window_hours)
-
-            if time_since_reference < required_duration:
-                # Not enough time has passed yet
+        with self._lock:
+            due_alerts = []
+            while (entry := self._peek_time_check()) is not None and entry[0] + window_seconds <= now:
+                heapq.heappop(self._time_check_heap)
+                due_alerts.append(entry)
+
+            # Built by `_peek_time_check`
+            references = self._time_check_references
+            assert references is not None
+
+            for reference, alert_uuid in due_alerts:
+                state = self._state["alerts"][alert_uuid]
+                pending_alerts.append(state)
                 self._log(
-                    f"Alert {state.get('alert_short_id')} not ready yet (time remaining: {required_duration - time_since_reference})",
+                    f"Alert {state.get('alert_short_id')} ready for time threshold trigger",
                     level="debug",
                     alert_uuid=alert_uuid,
-                    pending_events=pending_events,
-                    time_since_reference_hours=time_since_reference.total_seconds() / 3600,
+                    pending_events=state.get("current_event_count", 0) - state.get("last_triggered_event_count", 0),
+                    time_since_reference_hours=(now - reference) / 3600,
                     required_hours=time_window_hours,
                 )
-                continue
 
-            pending_alerts.append(state)
-            self._log(
-                f"Alert {state.get('alert_short_id')} ready for time threshold trigger",
-                level="debug",
-                alert_uuid=alert_uuid,
-                pending_events=pending_events,
-                time_since_reference_hours=time_since_reference.total_seconds() / 3600,
-                required_hours=time_window_hours,
-            )
+                # Keep the alert in the index until its state is updated
+                if retry_delay_seconds:
+                    reference = now - window_seconds + retry_delay_seconds
+                    references[alert_uuid] = reference
+                heapq.heappush(self._time_check_heap, (reference, alert_uuid))
 
         return pending_alerts
 
@@ -587,7 +830,10 @@ class AlertStateManager:
         Reload state from storage (S3 or local file).
 
         This is useful when you need to get the latest state from storage,
-        for example in periodic background tasks.
+        for example in periodic background tasks. Only the journal segments
+        written since the last load are read and applied. The buffered changes
+        aren't written: they are more recent than the segments, and are applied
+        again on top of them.
 
         Concurrency model:
         - This class uses a single-writer model: one trigger instance owns the state
@@ -597,5 +843,11 @@ class AlertStateManager:
         - The current implementation is designed for single-instance deployments where
           one trigger process handles all notifications for a given configuration
         """
-        self._state = self._load_state()
+        with self._lock:
+            applied = self._replay_journal(self._state)
+            if applied:
+                self._journaled_changes += applied
+                for change in self._pending_changes:
+                    self._apply_change(self._state, change)
+                    self._index_alert(change["key"])
         self._log("State reloaded from storage", level="debug")
@@ -1,28 +1,84 @@
+import os
 import signal
-from collections.abc import Callable
+import time
+from collections import deque
+from collections.abc import Callable, Hashable
 from queue import Queue
-from threading import Event, Thread
+from threading import Event, Lock, Semaphore, Thread
+from typing import Any
 
 from gevent.pool import Pool
 
+from sekoiaio.logging import get_logger
+from sekoiaio.triggers.metrics import (
+    MESSAGES_DROPPED,
+    MESSAGES_PENDING,
+    MESSAGES_PROCESSING_DURATION,
+    MESSAGES_WAIT_DURATION,
+)
+
+logger = get_logger(__name__)
+
 
 class MessagesProcessor(Thread):
     """
     Class in charge of processing messages received by the trigger
+
+    Messages sharing the same key (e.g. the UUID of an alert) are processed sequentially, in the order
+    they were received, while messages of distinct keys are processed concurrently.
+
+    The number of messages received and not processed yet is bounded: once reached,
+    `push_message` waits for messages to be processed (back-pressure on the reader).
+    Dropping the messages instead is opt-in: with a `push_timeout`, a message is dropped once no slot
+    is released within this delay.
     """
 
     QUEUE_TIMEOUT = 1
 
+    # Minimal delay, in seconds, between two logs of dropped messages
+    DROP_LOG_INTERVAL = 10
+
     _queue: Queue
     _stop_event: Event
     _pool: Pool
 
-    def __init__(self, callback: Callable):
+    def __init__(
+        self,
+        callback: Callable,
+        key_func: Callable[[Any], Hashable | None] | None = None,
+        concurrency: int | None = None,
+        max_pending_messages: int | None = None,
+        push_timeout: float | None = None,
+    ):
+        """
+        Args:
+            callback: Function processing a message
+            key_func: Function returning the key of a message. Messages without key are not serialized
+            concurrency: Maximum number of messages processed concurrently
+            max_pending_messages: Maximum number of messages received and not processed yet
+            push_timeout: Maximum time, in seconds, to wait for a slot before dropping a message.
+                          By default, wait as long as needed and never drop
+        """
         super().__init__()
+        self.concurrency = concurrency or int(os.getenv("MESSAGES_PROCESSOR_CONCURRENCY", 100))
+        self.max_pending_messages = max_pending_messages or int(os.getenv("MESSAGES_PROCESSOR_MAX_PENDING", 10000))
+        if push_timeout is None and os.getenv("MESSAGES_PROCESSOR_PUSH_TIMEOUT"):
+            push_timeout = float(os.environ["MESSAGES_PROCESSOR_PUSH_TIMEOUT"])
+        self.push_timeout: float | None = push_timeout
+        self.dropped_messages = 0
+        self._saturated = False
+        self._last_drop_log: float | None = None
+
         self._queue = Queue()
         self._stop_event = Event()  # Event to notify we must stop the thread
-        self._pool = Pool(100)
+        self._pool = Pool(self.concurrency)
         self._callback: Callable = callback
+        self._key_func = key_func
+
+        self._slots = Semaphore(self.max_pending_messages)
+        # Messages waiting for the message being processed with the same key
+        self._waiting: dict[Hashable, deque[tuple[Any, float]]] = {}
+        self._waiting_lock = Lock()
 
         # Register signal to terminate thread
         signal.signal(signal.SIGINT, self.exit)
@@ -33,8 +89,63 @@ class MessagesProcessor(Thread):
             self._handle_message()
         self._pool.join()
 
-    def push_message(self, message: str):
-        self._queue.put(message)
+    def push_message(self, message: Any) -> bool:
+        """
+        Push a message to process, waiting for a slot if too many messages are pending.
+
+        Messages are dropped once the processor is stopped and, if a push timeout is set, when no slot
+        is released within it. In the latter case, once a message is dropped, the next ones are dropped
+        without waiting until a slot is released, so the reader never accumulates late messages.
+
+        Returns:
+            True if the message will be processed, False if dropped
+        """
+        if self._saturated:
+            acquired = self._slots.acquire(blocking=False)
+        else:
+            acquired = self._wait_for_slot(self.push_timeout)
+        if not acquired:
+            if self._stop_event.is_set():
+                MESSAGES_DROPPED.labels(reason="stopped").inc()
+                return False
+
+            self._saturated = True
+            self._drop_message("saturated")
+            return False
+
+        self._saturated = False
+        MESSAGES_PENDING.inc()
+        self._queue.put((message, time.monotonic()))
+        return True
+
+    def _wait_for_slot(self, timeout: float | None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # Wake up regularly to check if the processor is stopped
+            wait = (
+                self.QUEUE_TIMEOUT
+                if deadline is None
+                else max(0, min(self.QUEUE_TIMEOUT, deadline - time.monotonic()))
+            )
+            if self._slots.acquire(timeout=wait):
+                return True
+
+            if self._stop_event.is_set() or (deadline is not None and time.monotonic() >= deadline):
+                return False
+
+    def _drop_message(self, reason: str):
+        MESSAGES_DROPPED.labels(reason=reason).inc()
+        self.dropped_messages += 1
+
+        # Don't log each message dropped while the processor is saturated
+        now = time.monotonic()
+        if self._last_drop_log is None or now >= self._last_drop_log + self.DROP_LOG_INTERVAL:
+            self._last_drop_log = now
+            logger.warning(
+                "The messages processor is saturated: messages are dropped",
+                dropped_messages=self.dropped_messages,
+                max_pending_messages=self.max_pending_messages,
+            )
 
     def exit(self, _, __):
         # Exit signal received, asking the processor to stop
@@ -46,10 +157,55 @@ class MessagesProcessor(Thread):
         """
         self._stop_event.set()
 
+    def _get_key(self, message: Any) -> Hashable | None:
+        if self._key_func is None:
+            return None
+
+        try:
+            return self._key_func(message)
+        except Exception:
+            return None
+
     def _handle_message(self):
         try:
-            message = self._queue.get(timeout=self.QUEUE_TIMEOUT)
-            self._pool.spawn(self._callback, message)
+            message, received_at = self._queue.get(timeout=self.QUEUE_TIMEOUT)
         except Exception:
             # Don't block indefinitely to get a chance to exit properly
-            pass
+            return
+
+        key = self._get_key(message)
+        if key is not None:
+            with self._waiting_lock:
+                # A message with the same key is being processed: it will process this one next
+                if key in self._waiting:
+                    self._waiting[key].append((message, received_at))
+                    return
+
+                self._waiting[key] = deque()
+
+        # Blocks while the pool is full
+        self._pool.spawn(self._process, key, message, received_at)
+
+    def _process(self, key: Hashable | None, message: Any, received_at: float):
+        while True:
+            started_at = time.monotonic()
+            MESSAGES_WAIT_DURATION.observe(started_at - received_at)
+            try:
+                self._callback(message)
+            except Exception as error:
+                logger.error("Failed to process the message", error=str(error))
+            finally:
+                MESSAGES_PROCESSING_DURATION.observe(time.monotonic() - started_at)
+                MESSAGES_PENDING.dec()
+                self._slots.release()
+
+            if key is None:
+                return
+
+            with self._waiting_lock:
+                waiting = self._waiting[key]
+                if not waiting:
+                    del self._waiting[key]
+                    return
+
+                message, received_at = waiting.popleft()
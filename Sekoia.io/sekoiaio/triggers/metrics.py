@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 # New metrics for threshold trigger
 THRESHOLD_CHECKS = Counter(
@@ -23,3 +23,32 @@ STATE_SIZE = Gauge(
     "sekoiaio_alert_threshold_state_size",
     "Number of alerts tracked in state",
 )
+
+ALERT_CACHE_REQUESTS = Counter(
+    "sekoiaio_alert_cache_requests_total",
+    "Total number of alerts requested to the alert cache",
+    ["result"],  # Fixed labels: hit, miss, coalesced
+)
+
+MESSAGES_PENDING = Gauge(
+    "sekoiaio_messages_processor_pending",
+    "Number of LiveAPI messages received and not processed yet",
+)
+
+MESSAGES_DROPPED = Counter(
+    "sekoiaio_messages_processor_dropped_total",
+    "Total number of LiveAPI messages dropped by the messages processor",
+    ["reason"],  # Fixed labels: saturated, stopped
+)
+
+MESSAGES_WAIT_DURATION = Histogram(
+    "sekoiaio_messages_processor_wait_seconds",
+    "Time spent by the LiveAPI messages waiting to be processed",
+    buckets=[0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60],
+)
+
+MESSAGES_PROCESSING_DURATION = Histogram(
+    "sekoiaio_messages_processor_processing_seconds",
+    "Time spent processing the LiveAPI messages",
+    buckets=[0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60],
+)
@@ -0,0 +1,172 @@
+import time
+from threading import Event, Thread
+from unittest.mock import Mock
+
+import pytest
+
+from sekoiaio.triggers.helpers.alert_cache import AlertCache
+
+
+def test_get_miss_then_hit():
+    cache = AlertCache(ttl=60)
+    fetch = Mock(return_value={"uuid": "foo"})
+
+    assert cache.get("foo", fetch) == {"uuid": "foo"}
+    assert cache.get("foo", fetch) == {"uuid": "foo"}
+    assert fetch.call_count == 1
+    assert len(cache) == 1
+
+
+def test_get_expired_value():
+    cache = AlertCache(ttl=0.01)
+    fetch = Mock(side_effect=[{"version": 1}, {"version": 2}])
+
+    assert cache.get("foo", fetch) == {"version": 1}
+    time.sleep(0.02)
+    assert cache.get("foo", fetch) == {"version": 2}
+    assert fetch.call_count == 2
+
+
+def test_get_ignores_values_fetched_before_the_notification():
+    cache = AlertCache(ttl=60)
+    fetch = Mock(side_effect=[{"version": 1}, {"version": 2}])
+
+    assert cache.get("foo", fetch) == {"version": 1}
+    assert cache.get("foo", fetch, not_before=time.time() - 60) == {"version": 1}
+    assert cache.get("foo", fetch, not_before=time.time() + 1) == {"version": 2}
+    assert fetch.call_count == 2
+
+
+def test_get_refresh():
+    cache = AlertCache(ttl=60)
+    fetch = Mock(side_effect=[{"version": 1}, {"version": 2}])
+
+    assert cache.get("foo", fetch) == {"version": 1}
+    assert cache.get("foo", fetch, refresh=True) == {"version": 2}
+
+    # the refreshed value replaces the cached one
+    assert cache.get("foo", fetch) == {"version": 2}
+    assert fetch.call_count == 2
+
+
+def test_get_refresh_does_not_join_a_fetch_in_progress():
+    cache = AlertCache(ttl=60)
+    started = Event()
+    release = Event()
+    versions = iter([1, 2])
+
+    def fetch():
+        version = next(versions)
+        if version == 1:
+            started.set()
+            release.wait(5)
+        return {"version": version}
+
+    results = []
+    leader = Thread(target=lambda: results.append(cache.get("foo", fetch)))
+    leader.start()
+    started.wait(5)
+
+    assert cache.get("foo", fetch, refresh=True) == {"version": 2}
+    release.set()
+    leader.join(5)
+
+    assert results == [{"version": 1}]
+    # the older fetch doesn't replace the refreshed value
+    assert cache.get("foo", fetch) == {"version": 2}
+
+
+def test_get_disabled_cache():
+    cache = AlertCache(ttl=0)
+    fetch = Mock(return_value={"uuid": "foo"})
+
+    cache.get("foo", fetch)
+    cache.get("foo", fetch)
+    assert fetch.call_count == 2
+    assert len(cache) == 0
+
+
+def test_get_coalesces_concurrent_fetches():
+    cache = AlertCache(ttl=60)
+    started = Event()
+    release = Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"uuid": "foo"}
+
+    results = []
+    leader = Thread(target=lambda: results.append(cache.get("foo", fetch)))
+    leader.start()
+    started.wait(5)
+
+    followers = [Thread(target=lambda: results.append(cache.get("foo", fetch))) for _ in range(5)]
+    for follower in followers:
+        follower.start()
+
+    release.set()
+    for thread in [leader, *followers]:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert results == [{"uuid": "foo"}] * 6
+
+
+def test_get_propagates_errors_to_coalesced_callers():
+    cache = AlertCache(ttl=60)
+    started = Event()
+    release = Event()
+
+    def fetch():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def get():
+        try:
+            cache.get("foo", fetch)
+        except ValueError as error:
+            errors.append(error)
+
+    leader = Thread(target=get)
+    leader.start()
+    started.wait(5)
+    follower = Thread(target=get)
+    follower.start()
+
+    release.set()
+    leader.join(5)
+    follower.join(5)
+
+    assert len(errors) == 2
+    assert len(cache) == 0
+
+    # errors are not cached
+    assert cache.get("foo", Mock(return_value="bar")) == "bar"
+
+
+def test_get_evicts_least_recently_used_values():
+    cache = AlertCache(ttl=60, max_size=2)
+    cache.get("a", Mock(return_value=1))
+    cache.get("b", Mock(return_value=2))
+    cache.get("a", Mock(return_value=1))
+    cache.get("c", Mock(return_value=3))
+
+    assert len(cache) == 2
+
+    fetch = Mock(return_value=2)
+    cache.get("b", fetch)
+    fetch.assert_called_once()
+
+
+def test_clear():
+    cache = AlertCache(ttl=60)
+    cache.get("foo", Mock(return_value=1))
+    cache.clear()
+
+    assert len(cache) == 0
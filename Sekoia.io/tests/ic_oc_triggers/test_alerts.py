@@ -1,6 +1,8 @@
 import json
+import time
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from threading import Event, Thread
 from unittest.mock import MagicMock, Mock, patch
 
 import pytest
@@ -76,6 +78,119 @@ def test_securityalertstrigger_retrieve_alert_from_api(alert_trigger, sample_not
         assert sorted(alert) == sorted(sample_sicalertapi)
 
 
+def test_securityalertstrigger_retrieve_alert_from_api_cached(alert_trigger, sample_sicalertapi):
+    alert_uuid = sample_sicalertapi.get("uuid")
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"http://fake.url/api/v1/sic/alerts/{alert_uuid}", json=sample_sicalertapi)
+
+        alert_trigger._retrieve_alert_from_alertapi(alert_uuid)
+        alert = alert_trigger._retrieve_alert_from_alertapi(alert_uuid, not_before=time.time() - 60)
+        assert alert == sample_sicalertapi
+        assert mock.call_count == 1
+
+        # a notification emitted after the fetch requires a fresh alert
+        alert_trigger._retrieve_alert_from_alertapi(alert_uuid, not_before=time.time() + 1)
+        assert mock.call_count == 2
+
+
+def test_securityalertstrigger_retrieve_notified_alert(alert_trigger, sample_sicalertapi):
+    alert_uuid = sample_sicalertapi.get("uuid")
+    created_at = datetime.now(timezone.utc) - timedelta(minutes=1)
+    created = {"type": "alert", "action": "created", "metadata": {"created_at": created_at.isoformat()}}
+    updated = {"type": "alert", "action": "updated", "metadata": {"created_at": created_at.isoformat()}}
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"http://fake.url/api/v1/sic/alerts/{alert_uuid}", json=sample_sicalertapi)
+
+        alert_trigger._retrieve_notified_alert(alert_uuid, created)
+        alert_trigger._retrieve_notified_alert(alert_uuid, created)
+        assert mock.call_count == 1
+
+        # the update notifications always get the latest version of the alert
+        alert_trigger._retrieve_notified_alert(alert_uuid, updated)
+        assert mock.call_count == 2
+
+        # the cache is bypassed for the notifications without timestamp
+        alert_trigger._retrieve_notified_alert(alert_uuid, {"type": "alert", "action": "created"})
+        assert mock.call_count == 3
+
+
+def test_securityalertstrigger_retrieve_notified_alert_received(alert_trigger, sample_sicalertapi):
+    alert_uuid = sample_sicalertapi.get("uuid")
+    # the server clock is ahead: the notification times can't be compared with the local fetch times
+    created_at = (datetime.now(timezone.utc) + timedelta(minutes=1)).isoformat()
+    received_at = time.time()
+    updates = [
+        {
+            "type": "alert",
+            "action": "updated",
+            "metadata": {"created_at": created_at},
+            alert_trigger.RECEIVED_AT_KEY: received_at,
+        }
+        for _ in range(10)
+    ]
+
+    with requests_mock.Mocker() as mock:
+        mock.get(f"http://fake.url/api/v1/sic/alerts/{alert_uuid}", json=sample_sicalertapi)
+
+        # a storm of updates received before the fetch makes a single call
+        for update in updates:
+            assert alert_trigger._retrieve_notified_alert(alert_uuid, update) == sample_sicalertapi
+        assert mock.call_count == 1
+
+        # an update received after the fetch started gets a fresh alert
+        update = {"type": "alert", "action": "updated", alert_trigger.RECEIVED_AT_KEY: time.time() + 1}
+        alert_trigger._retrieve_notified_alert(alert_uuid, update)
+        assert mock.call_count == 2
+
+
+def test_securityalertstrigger_retrieve_notified_alert_joins_fetch(alert_trigger, sample_sicalertapi):
+    alert_uuid = sample_sicalertapi.get("uuid")
+    started = Event()
+    release = Event()
+    fetches = []
+
+    def fetch_alert(uuid):
+        fetches.append(uuid)
+        started.set()
+        release.wait(5)
+        return sample_sicalertapi
+
+    def update():
+        return {"type": "alert", "action": "updated", alert_trigger.RECEIVED_AT_KEY: time.time()}
+
+    # the updates received before the fetch started join it
+    updates = [update() for _ in range(5)]
+    results = []
+
+    def retrieve(message):
+        results.append(alert_trigger._retrieve_notified_alert(alert_uuid, message))
+
+    with patch.object(alert_trigger, "_fetch_alert_from_alertapi", side_effect=fetch_alert):
+        threads = [Thread(target=retrieve, args=(updates[0],))]
+        threads[0].start()
+        assert started.wait(5)
+        threads.extend(Thread(target=retrieve, args=(message,)) for message in updates[1:])
+        for thread in threads[1:]:
+            thread.start()
+
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+    assert results == [sample_sicalertapi] * 5
+    assert fetches == [alert_uuid]
+
+
+def test_securityalertstrigger_get_notification_time(alert_trigger):
+    assert (
+        alert_trigger._get_notification_time({"metadata": {"created_at": "2024-01-01T00:00:00+00:00"}}) == 1704067200
+    )
+    assert alert_trigger._get_notification_time({"metadata": {"created_at": "invalid"}}) is None
+    assert alert_trigger._get_notification_time({}) is None
+
+
 def test_securityalertstrigger_retrieve_alert_from_api_exp_raised(
     alert_trigger, samplenotif_alert_created, requests_mock
 ):
@@ -1044,6 +1159,144 @@ class TestAlertStateManager:
                 state_manager.cleanup_old_states(datetime.now(timezone.utc))
 
 
+class TestAlertStateManagerJournal:
+    @staticmethod
+    def _update(manager, alert_uuid, event_count=1):
+        manager.update_alert_state(
+            alert_uuid=alert_uuid,
+            alert_short_id=f"AL_{alert_uuid}",
+            rule_uuid="rule",
+            rule_name="Rule",
+            event_count=event_count,
+        )
+
+    def test_update_appends_to_journal(self, state_file_path, mock_logger):
+        manager = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        self._update(manager, "alert-1")
+        self._update(manager, "alert-2")
+
+        assert not state_file_path.exists()
+        segments = sorted(path.name for path in manager.journal_path.iterdir())
+        assert segments == ["0000000000000001.jsonl", "0000000000000002.jsonl"]
+
+    def test_recover_from_snapshot_and_journal(self, state_file_path, mock_logger):
+        manager1 = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        self._update(manager1, "alert-1")
+        manager1.compact()
+        self._update(manager1, "alert-1", event_count=5)
+        self._update(manager1, "alert-2")
+
+        manager2 = AlertStateManager(state_file_path, logger=mock_logger)
+        assert manager2.get_alert_state("alert-1")["last_triggered_event_count"] == 5
+        assert manager2.get_alert_state("alert-1")["total_triggers"] == 2
+        assert manager2.get_alert_state("alert-2") is not None
+
+    def test_compaction(self, state_file_path, mock_logger):
+        manager = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0, compaction_threshold=3)
+        for index in range(3):
+            self._update(manager, f"alert-{index}")
+
+        assert list(manager.journal_path.iterdir()) == []
+        snapshot = json.loads(state_file_path.read_bytes())
+        assert sorted(snapshot["alerts"]) == ["alert-0", "alert-1", "alert-2"]
+        assert snapshot["metadata"]["journal_sequence"] == 2
+
+        self._update(manager, "alert-3")
+        manager2 = AlertStateManager(state_file_path, logger=mock_logger)
+        assert len(manager2.get_all_alerts()) == 4
+
+    def test_ignore_segments_included_in_snapshot(self, state_file_path, mock_logger):
+        manager = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        self._update(manager, "alert-1", event_count=1)
+        segment = next(manager.journal_path.iterdir())
+        content = segment.read_bytes()
+        self._update(manager, "alert-1", event_count=2)
+        manager.compact()
+
+        # A segment left by an interrupted compaction
+        segment.write_bytes(content)
+
+        manager2 = AlertStateManager(state_file_path, logger=mock_logger)
+        assert manager2.get_alert_state("alert-1")["last_triggered_event_count"] == 2
+
+    def test_flush_interval(self, state_file_path, mock_logger):
+        manager = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=3600)
+        self._update(manager, "alert-1")
+        self._update(manager, "alert-2")
+        assert not manager.journal_path.exists()
+
+        manager.flush()
+        segments = list(manager.journal_path.iterdir())
+        assert len(segments) == 1
+        assert len(segments[0].read_bytes().splitlines()) == 2
+
+    def test_skip_invalid_journal_entries(self, state_file_path, mock_logger):
+        manager = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        self._update(manager, "alert-1")
+        (manager.journal_path / "0000000000000002.jsonl").write_bytes(b'{"op": "put", "key"')
+
+        manager2 = AlertStateManager(state_file_path, logger=mock_logger)
+        assert manager2.get_alert_state("alert-1") is not None
+        assert len(manager2.get_all_alerts()) == 1
+
+    def test_reload_state_applies_new_segments(self, state_file_path, mock_logger):
+        manager1 = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        manager2 = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        self._update(manager1, "alert-1")
+
+        assert manager2.get_alert_state("alert-1") is None
+        manager2.reload_state()
+        assert manager2.get_alert_state("alert-1") is not None
+
+    def test_reload_state_keeps_buffered_changes(self, state_file_path, mock_logger):
+        manager1 = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        manager2 = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=3600)
+        self._update(manager2, "alert-1", event_count=5)
+        self._update(manager1, "alert-1", event_count=2)
+        self._update(manager1, "alert-2")
+
+        manager2.reload_state()
+        assert manager2.get_alert_state("alert-1")["last_triggered_event_count"] == 5
+        assert manager2.get_alert_state("alert-2") is not None
+
+        manager2.flush()
+        manager3 = AlertStateManager(state_file_path, logger=mock_logger)
+        assert manager3.get_alert_state("alert-1")["last_triggered_event_count"] == 5
+
+    def test_flush_interval_batches_notifications(self, state_file_path, mock_logger):
+        manager = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=60)
+        with patch("sekoiaio.triggers.helpers.state_manager.time.monotonic", return_value=manager._last_flush):
+            # Each notification reloads the state, then records two changes
+            for index in range(10):
+                manager.reload_state()
+                self._update(manager, f"alert-{index}")
+                manager.update_alert_info(f"alert-{index}", {"short_id": f"AL_{index}"}, event_count=2)
+
+            assert not manager.journal_path.exists()
+
+        with patch("sekoiaio.triggers.helpers.state_manager.time.monotonic", return_value=manager._last_flush + 60):
+            manager.reload_state()
+            self._update(manager, "alert-10")
+
+        segments = list(manager.journal_path.iterdir())
+        assert len(segments) == 1
+        assert len(segments[0].read_bytes().splitlines()) == 21
+
+    def test_load_legacy_state_file(self, state_file_path, mock_logger):
+        state_file_path.write_text(
+            json.dumps(
+                {
+                    "alerts": {"alert-1": {"alert_uuid": "alert-1", "last_triggered_event_count": 3}},
+                    "metadata": {"version": "1.1", "last_cleanup": "2025-01-01T00:00:00+00:00"},
+                },
+                indent=2,
+            )
+        )
+
+        manager = AlertStateManager(state_file_path, logger=mock_logger)
+        assert manager.get_alert_state("alert-1")["last_triggered_event_count"] == 3
+
+
 # ==============================================================================
 # AlertEventsThresholdTrigger - Event Fetching Tests
 # ==============================================================================
@@ -1205,6 +1458,75 @@ class TestAlertEventsThresholdTrigger_EventFetching:
 
         assert result is False
 
+    def test_wait_for_search_jobs_adaptive_polling(self, threshold_trigger, requests_mock):
+        """Test that several search jobs are polled together, with a growing delay."""
+        threshold_trigger._ensure_initialized()
+
+        requests_mock.get(
+            "http://fake.url/api/v1/sic/conf/events/search/jobs/job-1",
+            [{"json": {"status": 0}}, {"json": {"status": 2}}],
+        )
+        requests_mock.get(
+            "http://fake.url/api/v1/sic/conf/events/search/jobs/job-2",
+            [{"json": {"status": 1}}, {"json": {"status": 1}}, {"json": {"status": 1}}, {"json": {"status": 2}}],
+        )
+        requests_mock.get("http://fake.url/api/v1/sic/conf/events/search/jobs/job-3", status_code=404)
+
+        with patch("sekoiaio.triggers.alerts.time.sleep") as mock_sleep:
+            completed = threshold_trigger._wait_for_search_jobs(["job-1", "job-2", "job-3"], timeout=10)
+
+        assert completed == {"job-1", "job-2"}
+        delays = [call.args[0] for call in mock_sleep.call_args_list]
+        assert delays == [0.25, 0.375, 0.5625]
+
+    def test_get_total_event_count_batched_and_cached(self, threshold_trigger, requests_mock):
+        """Test that the event counts are computed by concurrent search jobs and cached."""
+        threshold_trigger._ensure_initialized()
+
+        def create_job(request, context):
+            return {"uuid": "job-" + request.json()["term"].split('"')[1]}
+
+        requests_mock.post("http://fake.url/api/v1/sic/conf/events/search/jobs", json=create_job)
+        for short_id, total in [("ALT-1", 12), ("ALT-2", 34)]:
+            requests_mock.get(f"http://fake.url/api/v1/sic/conf/events/search/jobs/job-{short_id}", json={"status": 2})
+            requests_mock.get(
+                f"http://fake.url/api/v1/sic/conf/events/search/jobs/job-{short_id}/events",
+                json={"items": [], "total": total},
+            )
+
+        alerts = {
+            short_id: {
+                "uuid": f"uuid-{short_id}",
+                "short_id": short_id,
+                "first_seen_at": "2025-11-14T08:00:00Z",
+                "last_seen_at": "2025-11-14T10:00:00Z",
+            }
+            for short_id in ["ALT-1", "ALT-2"]
+        }
+
+        counts = threshold_trigger._count_alerts_events(alerts)
+        assert counts == {"ALT-1": 12, "ALT-2": 34}
+
+        requests_mock.reset_mock()
+        assert threshold_trigger._get_total_event_count(alerts["ALT-1"]) == 12
+        assert threshold_trigger._get_total_event_count(alerts["ALT-1"]) == 12
+        assert len([request for request in requests_mock.request_history if request.method == "POST"]) == 1
+
+        # A new event changes the last_seen_at: the count is computed again
+        requests_mock.reset_mock()
+        assert threshold_trigger._get_total_event_count({**alerts["ALT-1"], "last_seen_at": "2025-11-14T11:00:00Z"})
+        assert len([request for request in requests_mock.request_history if request.method == "POST"]) == 1
+
+    def test_count_alerts_events_failures(self, threshold_trigger, requests_mock):
+        """Test that the failed counts are reported as None."""
+        threshold_trigger._ensure_initialized()
+
+        requests_mock.post("http://fake.url/api/v1/sic/conf/events/search/jobs", status_code=500)
+        alert = {"uuid": "uuid-1", "short_id": "ALT-1", "first_seen_at": "2025", "last_seen_at": "2025"}
+
+        with patch("tenacity.nap.time"):
+            assert threshold_trigger._count_alerts_events({"ALT-1": alert}) == {"ALT-1": None}
+
     def test_get_search_job_results_success(self, threshold_trigger, sample_events, requests_mock):
         """Test retrieving search job results."""
         threshold_trigger._ensure_initialized()
@@ -2326,6 +2648,67 @@ class TestAlertStateManager_NewMethods:
         assert "alert-ready" in pending_uuids
         assert "alert-never-triggered" in pending_uuids
 
+    def test_get_alerts_pending_time_check_index_updates(self, state_manager):
+        """Test that the index follows the updates of the alerts."""
+        now = datetime.now(timezone.utc)
+        state_manager._state["alerts"]["alert-1"] = {
+            "alert_uuid": "alert-1",
+            "alert_short_id": "ALT-1",
+            "current_event_count": 5,
+            "last_triggered_event_count": 5,
+            "last_event_at": now.isoformat(),
+            "last_triggered_at": (now - timedelta(hours=2)).isoformat(),
+            "created_at": (now - timedelta(hours=3)).isoformat(),
+        }
+        assert state_manager.get_alerts_pending_time_check(time_window_hours=1) == []
+        assert state_manager.get_next_time_check(time_window_hours=1) is None
+
+        # New events: the alert is due
+        state_manager.update_alert_info("alert-1", {"short_id": "ALT-1"}, event_count=10)
+        pending = state_manager.get_alerts_pending_time_check(time_window_hours=1)
+        assert [state["alert_uuid"] for state in pending] == ["alert-1"]
+        assert state_manager.get_next_time_check(time_window_hours=1) <= datetime.now(timezone.utc)
+
+        # Not triggered: returned again
+        assert len(state_manager.get_alerts_pending_time_check(time_window_hours=1)) == 1
+
+        # Triggered: the alert is no longer pending
+        state_manager.update_alert_state("alert-1", "ALT-1", "rule", "Rule", event_count=10)
+        assert state_manager.get_alerts_pending_time_check(time_window_hours=1) == []
+        assert state_manager.get_next_time_check(time_window_hours=1) is None
+
+        # New events after the trigger: due at the end of the window
+        state_manager.update_alert_info("alert-1", {"short_id": "ALT-1"}, event_count=12)
+        assert state_manager.get_alerts_pending_time_check(time_window_hours=1) == []
+        next_check = state_manager.get_next_time_check(time_window_hours=1)
+        assert timedelta(minutes=59) < next_check - now <= timedelta(hours=1, minutes=1)
+
+    def test_get_alerts_pending_time_check_retry_delay(self, state_manager):
+        """Test that an alert not triggered is returned again after the retry delay."""
+        now = datetime.now(timezone.utc)
+        state_manager._state["alerts"]["alert-1"] = {
+            "alert_uuid": "alert-1",
+            "current_event_count": 10,
+            "last_triggered_event_count": 5,
+            "last_event_at": now.isoformat(),
+            "last_triggered_at": (now - timedelta(hours=2)).isoformat(),
+        }
+
+        assert len(state_manager.get_alerts_pending_time_check(time_window_hours=1, retry_delay_seconds=300)) == 1
+        assert state_manager.get_alerts_pending_time_check(time_window_hours=1, retry_delay_seconds=300) == []
+        next_check = state_manager.get_next_time_check(time_window_hours=1)
+        assert timedelta(minutes=4) < next_check - now <= timedelta(minutes=6)
+
+    def test_get_alerts_pending_time_check_after_reload(self, state_file_path, mock_logger):
+        """Test that the alerts replayed from the journal are indexed."""
+        manager1 = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        manager2 = AlertStateManager(state_file_path, logger=mock_logger, flush_interval=0)
+        assert manager2.get_alerts_pending_time_check(time_window_hours=1) == []
+
+        manager1.update_alert_info("alert-1", {"short_id": "ALT-1"}, event_count=10)
+        manager2.reload_state()
+        assert manager2.get_next_time_check(time_window_hours=1) is not None
+
     def test_get_all_alerts(self, state_manager):
         """Test that get_all_alerts returns all alert states."""
         state_manager._state["alerts"]["alert-1"] = {"alert_uuid": "alert-1"}
@@ -2851,6 +3234,29 @@ class TestAlertEventsThresholdTrigger_TriggerTimeThreshold:
 class TestAlertEventsThresholdTrigger_TimeThresholdLoop:
     """Test time threshold check loop edge cases."""
 
+    def test_wait_until_next_time_check(self, threshold_trigger):
+        """Test that the loop waits until the next alert reaches the end of its time window."""
+        threshold_trigger._ensure_initialized()
+        interval = threshold_trigger.TIME_THRESHOLD_CHECK_INTERVAL_SECONDS
+
+        assert threshold_trigger._get_time_threshold_wait() == interval
+
+        now = datetime.now(timezone.utc)
+        with patch.object(
+            threshold_trigger.state_manager, "get_next_time_check", return_value=now + timedelta(seconds=30)
+        ):
+            assert 25 < threshold_trigger._get_time_threshold_wait() <= 30
+
+        with patch.object(
+            threshold_trigger.state_manager, "get_next_time_check", return_value=now - timedelta(hours=1)
+        ):
+            assert threshold_trigger._get_time_threshold_wait() == 0
+
+        with patch.object(
+            threshold_trigger.state_manager, "get_next_time_check", return_value=now + timedelta(days=1)
+        ):
+            assert threshold_trigger._get_time_threshold_wait() == interval
+
     def test_loop_handles_exception_gracefully(self, threshold_trigger):
         """Test that _time_threshold_check_loop handles exceptions without crashing."""
         threshold_trigger._ensure_initialized()
@@ -1,4 +1,10 @@
+import base64
+import hashlib
 import json
+import socket
+import struct
+import time
+from threading import Event, Lock, Thread
 from unittest.mock import Mock
 
 import pytest
@@ -34,6 +40,42 @@ def test_sekoianotificationbasetrigger_handler_dispatch_invalid_json(base_trigge
     base_trigger.handler_dispatcher("dfdfg")
 
 
+def test_sekoianotificationbasetrigger_handler_dispatch_decoded_message(base_trigger):
+    base_trigger.handle_event = Mock()
+    message = {"metadata": {"version": 2}, "type": "alert", "action": "created", "attributes": {"uuid": "foo"}}
+
+    base_trigger.handler_dispatcher(message)
+    base_trigger.handle_event.assert_called_once_with(message)
+
+
+def test_sekoianotificationbasetrigger_on_message(base_trigger):
+    base_trigger.heartbeat = Mock()
+    base_trigger._message_processor = Mock()
+
+    before = time.time()
+    base_trigger.on_message(None, '{"attributes": {"uuid": "foo"}}')
+    base_trigger._message_processor.push_message.assert_called_once()
+    message = base_trigger._message_processor.push_message.call_args.args[0]
+    received_at = message.pop(base_trigger.RECEIVED_AT_KEY)
+    assert message == {"attributes": {"uuid": "foo"}}
+    assert before <= received_at <= time.time()
+    assert base_trigger.get_received_at({base_trigger.RECEIVED_AT_KEY: received_at}) == received_at
+    assert base_trigger.get_received_at({}) is None
+
+    base_trigger._message_processor.reset_mock()
+    base_trigger.on_message(None, "dfdfg")
+    base_trigger._message_processor.push_message.assert_called_once_with("dfdfg")
+
+
+def test_sekoianotificationbasetrigger_get_message_key(base_trigger):
+    assert base_trigger.get_message_key({"attributes": {"uuid": "foo"}}) == "foo"
+    assert base_trigger.get_message_key({"attributes": {"uuid": "bar", "alert_uuid": "foo"}}) == "foo"
+    assert base_trigger.get_message_key({"attributes": {"uuid": "bar", "case_uuid": "foo"}}) == "foo"
+    assert base_trigger.get_message_key({"attributes": None}) is None
+    assert base_trigger.get_message_key({}) is None
+    assert base_trigger.get_message_key("dfdfg") is None
+
+
 def test_sekoianotificationbasetrigger_liveapi_url(base_trigger):
     base_trigger.module.configuration["base_url"] = "https://app.sekoia.io"
     assert base_trigger.liveapi_url == "wss://app.sekoia.io/live/"
@@ -112,3 +154,170 @@ def test_ssl_opt_no_env(base_trigger):
 def test_ssl_opt_env(base_trigger, monkeypatch):
     monkeypatch.setenv("REQUESTS_CA_BUNDLE", "test")
     assert base_trigger.ssl_opt == {"ca_certs": "test"}
+
+
+class WebSocketServer(Thread):
+    """
+    Minimal WebSocket server sending a number of text messages at a fixed rate and answering the pings
+    """
+
+    def __init__(self, message: str, interval: float, count: int):
+        super().__init__(daemon=True)
+        self.message = message
+        self.interval = interval
+        self.count = count
+        self.connections = 0
+        self.pongs = 0
+        self._stop_event = Event()
+        self._send_lock = Lock()
+        self._server = socket.create_server(("127.0.0.1", 0))
+        self._server.settimeout(0.1)
+        self.port = self._server.getsockname()[1]
+
+    def stop(self):
+        self._stop_event.set()
+
+    def _send_frame(self, connection: socket.socket, opcode: int, payload: bytes):
+        header = bytes([0x80 | opcode])
+        if len(payload) < 126:
+            header += bytes([len(payload)])
+        else:
+            header += bytes([126]) + struct.pack("!H", len(payload))
+
+        with self._send_lock:
+            connection.sendall(header + payload)
+
+    @staticmethod
+    def _receive(connection: socket.socket, size: int) -> bytes:
+        data = b""
+        while len(data) < size:
+            chunk = connection.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError("closed")
+            data += chunk
+
+        return data
+
+    def _send_messages(self, connection: socket.socket):
+        try:
+            for _ in range(self.count):
+                if self._stop_event.is_set():
+                    return
+
+                self._send_frame(connection, 0x1, self.message.encode())
+                time.sleep(self.interval)
+        except OSError:
+            pass
+
+    def _serve(self, connection: socket.socket):
+        request = b""
+        while b"\r\n\r\n" not in request:
+            request += connection.recv(4096)
+
+        key = next(
+            line.split(b":", 1)[1].strip()
+            for line in request.split(b"\r\n")
+            if line.lower().startswith(b"sec-websocket-key")
+        )
+        accept = base64.b64encode(hashlib.sha1(key + b"258EAFA5-E914-47DA-95CA-C5AB0DC85B11").digest())
+        connection.sendall(
+            b"HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            b"Sec-WebSocket-Accept: " + accept + b"\r\n\r\n"
+        )
+        Thread(target=self._send_messages, args=(connection,), daemon=True).start()
+
+        try:
+            while not self._stop_event.is_set():
+                first, second = self._receive(connection, 2)
+                opcode, length = first & 0x0F, second & 0x7F
+                if length == 126:
+                    (length,) = struct.unpack("!H", self._receive(connection, 2))
+                elif length == 127:
+                    (length,) = struct.unpack("!Q", self._receive(connection, 8))
+
+                mask = self._receive(connection, 4)
+                payload = bytes(byte ^ mask[index % 4] for index, byte in enumerate(self._receive(connection, length)))
+                if opcode == 0x9:  # ping
+                    self._send_frame(connection, 0xA, payload)
+                    self.pongs += 1
+                elif opcode == 0x8:  # close
+                    self._send_frame(connection, 0x8, payload)
+                    return
+        except OSError:
+            pass
+        finally:
+            connection.close()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                connection, _ = self._server.accept()
+            except socket.timeout:
+                continue
+
+            self.connections += 1
+            Thread(target=self._serve, args=(connection,), daemon=True).start()
+
+        self._server.close()
+
+
+class ThreadsPool:
+    """
+    Run the processing of the messages in threads, the greenlets not being scheduled without monkey patching
+    """
+
+    def spawn(self, func, *args):
+        Thread(target=func, args=args, daemon=True).start()
+
+    def join(self):
+        pass
+
+
+def test_saturated_processor_keeps_the_websocket_connected(module_configuration, requests_mock, monkeypatch):
+    requests_mock.get("http://fake.url/api/v1/me", status_code=200)
+    monkeypatch.setenv("MESSAGES_PROCESSOR_MAX_PENDING", "1")
+
+    release = Event()
+    processed = []
+
+    class SlowTrigger(_SEKOIANotificationBaseTrigger):
+        ping_interval = 1
+        ping_timeout = 0.5
+
+        def handler_dispatcher(self, raw_message):
+            release.wait(10)
+            processed.append(raw_message)
+
+    server = WebSocketServer(json.dumps({"metadata": {"version": 2}}), interval=0.02, count=100)
+    server.start()
+
+    trigger = SlowTrigger()
+    trigger.module.configuration = {**module_configuration, "liveapi_url": f"ws://127.0.0.1:{server.port}/"}
+    trigger.module._community_uuid = "cc93fe3f-c26b-4eb1-82f7-082209cf1892"
+    trigger.log = Mock()
+    trigger.log_exception = Mock()
+    trigger.heartbeat = Mock()
+    trigger._message_processor._pool = ThreadsPool()
+
+    runner = Thread(target=trigger.run, daemon=True)
+    runner.start()
+    try:
+        # the processor is saturated for several ping intervals: the reader is blocked
+        time.sleep(3.5)
+        assert len(processed) == 0
+
+        release.set()
+        deadline = time.monotonic() + 10
+        while len(processed) < server.count and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+        # no message is lost and the connection is kept
+        assert len(processed) == server.count
+        assert trigger._message_processor.dropped_messages == 0
+        assert server.connections == 1
+        trigger.log_exception.assert_not_called()
+    finally:
+        release.set()
+        trigger.stop()
+        server.stop()
+        runner.join(5)
@@ -0,0 +1,111 @@
+import time
+from threading import Thread
+from unittest.mock import Mock
+
+import pytest
+
+from sekoiaio.triggers.helpers.event_count_batcher import EventCountBatcher
+
+
+def count_many(items):
+    return {key: len(item) for key, item in items.items()}
+
+
+def test_get_count():
+    batcher = EventCountBatcher(Mock(side_effect=count_many))
+
+    assert batcher.get("foo", "abc") == 3
+    batcher.count_many.assert_called_once_with({"foo": "abc"})
+
+
+def test_get_cached_count():
+    batcher = EventCountBatcher(Mock(side_effect=count_many), ttl=60)
+
+    assert batcher.get("foo", "abc") == 3
+    assert batcher.get("foo", "abc") == 3
+    assert batcher.count_many.call_count == 1
+
+    batcher.clear()
+    assert batcher.get("foo", "abc") == 3
+    assert batcher.count_many.call_count == 2
+
+
+def test_get_expired_count():
+    batcher = EventCountBatcher(Mock(side_effect=count_many), ttl=0.01)
+
+    batcher.get("foo", "abc")
+    time.sleep(0.02)
+    batcher.get("foo", "abc")
+    assert batcher.count_many.call_count == 2
+
+
+def test_failed_counts_are_not_cached():
+    batcher = EventCountBatcher(Mock(side_effect=[{"foo": None}, {"foo": 3}]), ttl=60)
+
+    assert batcher.get("foo", "abc") is None
+    assert batcher.get("foo", "abc") == 3
+
+
+def test_get_counts_by_batch():
+    batcher = EventCountBatcher(Mock(side_effect=count_many), batch_window=0.2)
+
+    results = {}
+
+    def get(key, item):
+        results[key] = batcher.get(key, item)
+
+    threads = [Thread(target=get, args=(f"key-{index}", "a" * index)) for index in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == {f"key-{index}": index for index in range(5)}
+    batcher.count_many.assert_called_once()
+    assert len(batcher.count_many.call_args[0][0]) == 5
+
+
+def test_get_counts_full_batch():
+    batcher = EventCountBatcher(Mock(side_effect=count_many), batch_window=10, max_batch_size=2)
+
+    threads = [Thread(target=batcher.get, args=(f"key-{index}", "a")) for index in range(4)]
+    start = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+
+    # Full batches are counted without waiting for the end of the window
+    assert time.monotonic() - start < 5
+    assert batcher.count_many.call_count == 2
+
+
+def test_same_key_joins_batch_in_progress():
+    calls = []
+
+    def slow_count_many(items):
+        calls.append(items)
+        time.sleep(0.1)
+        return count_many(items)
+
+    batcher = EventCountBatcher(slow_count_many, ttl=0)
+    results = []
+    threads = [Thread(target=lambda: results.append(batcher.get("foo", "abc"))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [3, 3, 3]
+    assert len(calls) == 1
+
+
+def test_errors_are_propagated():
+    batcher = EventCountBatcher(Mock(side_effect=ValueError("boom")))
+
+    with pytest.raises(ValueError):
+        batcher.get("foo", "abc")
+
+    batcher.count_many.side_effect = count_many
+    assert batcher.get("foo", "abc") == 3
@@ -1,6 +1,9 @@
+import time
+from threading import Thread
 from time import sleep
 from unittest.mock import Mock
 
+import gevent
 import pytest
 
 from sekoiaio.triggers.messages_processor import MessagesProcessor
@@ -45,3 +48,129 @@ def test_run(callback):
     processor.stop()
     sleep(0.2)  # Give time to the thread to join the pool
     callback.assert_called_once_with("foo")
+
+
+def test_process_messages_of_same_key_sequentially():
+    processed = []
+    running = set()
+
+    def callback(message):
+        key, index = message
+        assert key not in running
+        running.add(key)
+        gevent.sleep(0.01)
+        processed.append(message)
+        running.remove(key)
+
+    processor = MessagesProcessor(callback=callback, key_func=lambda message: message[0], concurrency=10)
+    for index in range(5):
+        processor.push_message(("alert-1", index))
+        processor.push_message(("alert-2", index))
+
+    for _ in range(10):
+        processor._handle_message()
+    processor._pool.join()
+
+    assert [index for key, index in processed if key == "alert-1"] == list(range(5))
+    assert [index for key, index in processed if key == "alert-2"] == list(range(5))
+    assert processor._waiting == {}
+
+
+def test_process_messages_of_distinct_keys_concurrently():
+    processed = []
+
+    def callback(message):
+        gevent.sleep(0.05)
+        processed.append(message)
+
+    processor = MessagesProcessor(callback=callback, key_func=lambda message: message, concurrency=10)
+    for index in range(10):
+        processor.push_message(index)
+
+    start = time.monotonic()
+    for _ in range(10):
+        processor._handle_message()
+    processor._pool.join()
+
+    assert sorted(processed) == list(range(10))
+    assert time.monotonic() - start < 0.4
+
+
+def test_process_message_failure_does_not_block_the_key():
+    callback = Mock(side_effect=[Exception("boom"), None])
+    processor = MessagesProcessor(callback=callback, key_func=lambda message: "alert-1")
+    processor.push_message("foo")
+    processor.push_message("bar")
+
+    processor._handle_message()
+    processor._handle_message()
+    processor._pool.join()
+
+    assert callback.call_count == 2
+    assert processor._waiting == {}
+
+
+def test_push_message_back_pressure(callback):
+    processor = MessagesProcessor(callback=callback, max_pending_messages=2)
+    processor.QUEUE_TIMEOUT = 0.01
+    processor.push_message("foo")
+    processor.push_message("bar")
+
+    # The processor is full: the message is dropped once the processor is stopped
+    pusher = Thread(target=processor.push_message, args=("baz",))
+    pusher.start()
+    sleep(0.05)
+    assert pusher.is_alive()
+    assert processor._queue.qsize() == 2
+
+    processor.stop()
+    pusher.join(1)
+    assert not pusher.is_alive()
+    assert processor._queue.qsize() == 2
+
+
+def test_push_message_waits_for_slot(callback):
+    processor = MessagesProcessor(callback=callback, max_pending_messages=1)
+    processor.push_message("foo")
+
+    pusher = Thread(target=processor.push_message, args=("bar",))
+    pusher.start()
+    sleep(0.05)
+    assert pusher.is_alive()
+
+    processor._handle_message()
+    processor._pool.join()
+    pusher.join(1)
+
+    assert not pusher.is_alive()
+    assert processor._queue.qsize() == 1
+    assert processor.dropped_messages == 0
+
+
+def test_push_message_timeout_is_opt_in(callback, monkeypatch):
+    assert MessagesProcessor(callback=callback).push_timeout is None
+
+    monkeypatch.setenv("MESSAGES_PROCESSOR_PUSH_TIMEOUT", "2.5")
+    assert MessagesProcessor(callback=callback).push_timeout == 2.5
+
+
+def test_push_message_drops_message_when_saturated(callback):
+    processor = MessagesProcessor(callback=callback, max_pending_messages=1, push_timeout=0.05)
+    assert processor.push_message("foo") is True
+
+    assert processor.push_message("bar") is False
+
+    # Once saturated, the messages are dropped without waiting
+    processor.push_timeout = 10
+    started_at = time.monotonic()
+    assert processor.push_message("baz") is False
+    assert time.monotonic() - started_at < 1
+
+    assert processor.dropped_messages == 2
+    assert processor._queue.qsize() == 1
+
+    # Until a slot is released
+    processor._handle_message()
+    processor._pool.join()
+    assert processor.push_message("qux") is True
+    assert processor._queue.qsize() == 1